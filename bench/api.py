@@ -0,0 +1,218 @@
+"""Latency and throughput of the API hot paths under concurrent load.
+
+    python -m bench.api --users 2000 --months 24 --expenses-per-month 40 --concurrency 32
+    python -m bench.api --scenario "GET /expense" --compare bench/results/abc1234.json
+
+Boots the app in-process against DATABASE_URL (a SQLite file under /tmp by
+default; point it at a throwaway or embedded Postgres to benchmark that),
+seeds it with db.seed.generate, which only pays on the first run, then
+drives each scenario for --requests requests and reports p50/p95/p99
+latency and throughput. Results are written as JSON, named after
+the current commit, so runs can be compared with --compare. Requires httpx.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+# The app reads its settings at import time, so these must be set first
+os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/budget_buddy_bench.db")
+for name, value in {
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "600",
+    "SECRET_KEY": "bench-secret",
+    "TWILIO_ACCOUNT_SID": "bench",
+    "TWILIO_AUTH_TOKEN": "bench",
+    "TWILIO_PHONE_NUMBER": "+10000000000",
+    "SMS_TRANSPORT": "fake",
+    "OUTBOX_DISPATCHER": "false",
+}.items():
+    os.environ.setdefault(name, value)
+
+import httpx
+from sqlalchemy import select
+from config import settings
+from db.database import SessionLocal, engine
+from db.migrate import upgrade
+from db.seed import SEED_PASSWORD, SEED_USER_PREFIX, generate
+from models.category import DbCategory
+from utils.auth_token import create_access_token
+
+
+def scenarios(login_requests: int, import_requests: int, import_rows: int):
+    """(name, method, path, request kwargs factory, request count override) for each scenario."""
+    category = db_category_name()
+    expenses = [{
+        "amount": 1 + i % 500,
+        "date": f"2024-06-{1 + i % 28:02d}",
+        "note": f"bench import {i}",
+        "category": {"name": category, "icon": "Utensils", "color": "amber", "budget": 5000},
+        "paymentMode": {"name": "Cash", "icon": "Wallet", "color": "green"},
+    } for i in range(import_rows)]
+    csv_file = "amount,date,note,category,paymentMode\n" + "".join(
+        f"{row['amount']},{row['date']},{row['note']},{category},Cash\n" for row in expenses
+    )
+    filters = {"category": category, "recurring": "true", "month": "2024-06", "search": "groceries"}
+    result = []
+    for size in range(len(filters) + 1):
+        for combination in itertools.combinations(filters, size):
+            params = {key: filters[key] for key in combination}
+            name = "GET /expense" + ("?" + "&".join(combination) if combination else "")
+            result.append((name, "GET", "/expense", lambda rng, params=params: {"params": params}, None))
+    result += [
+        ("POST /expense", "POST", "/expense", lambda rng: {"json": {
+            "amount": rng.randrange(1, 500),
+            "date": "2024-06-15",
+            "note": f"bench expense {rng.randrange(1000)}",
+            "category": {"name": category, "icon": "Utensils", "color": "amber", "budget": 5000},
+            "paymentMode": {"name": "Cash", "icon": "Wallet", "color": "green"},
+        }}, None),
+        ("GET /category_expense", "GET", "/category_expense", lambda rng: {}, None),
+        ("GET /income", "GET", "/income", lambda rng: {}, None),
+        ("GET /getCSV", "GET", "/getCSV", lambda rng: {}, None),
+        ("POST /users/login", "POST", "/users/login", None, login_requests),
+        # Throughput in rows is import_rows times the request rate
+        ("POST /expense/import", "POST", "/expense/import", lambda rng: {
+            "files": {"file": ("expenses.csv", csv_file, "text/csv")}
+        }, import_requests),
+        ("POST /expense/import/json", "POST", "/expense/import/json", lambda rng: {"json": expenses}, import_requests),
+    ]
+    return result
+
+
+def db_category_name() -> str:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(DbCategory.name).order_by(DbCategory.id))
+    finally:
+        db.close()
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def drive(client, method, path, make_kwargs, tokens, requests, concurrency, rng) -> dict:
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+    usernames = list(tokens)
+
+    async def one():
+        username = rng.choice(usernames)
+        if make_kwargs is None:
+            kwargs = {"data": {"username": username, "password": SEED_PASSWORD}}
+        else:
+            kwargs = make_kwargs(rng)
+            kwargs["headers"] = {"Authorization": f"Bearer {tokens[username]}"}
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statuses": statuses,
+    }
+
+
+async def run(args) -> dict:
+    from main import app
+
+    usernames = [f"{SEED_USER_PREFIX}{i}" for i in range(args.users)]
+    tokens = {username: create_access_token({"sub": username}) for username in usernames}
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, method, path, make_kwargs, requests in scenarios(
+            args.login_requests, args.import_requests, args.import_rows
+        ):
+            if args.scenario and not any(name.startswith(prefix) for prefix in args.scenario):
+                continue
+            # Warm caches and connections so the first requests do not skew the tail
+            await drive(client, method, path, make_kwargs, tokens, min(args.concurrency, 10), args.concurrency, rng)
+            results[name] = await drive(
+                client, method, path, make_kwargs, tokens, requests or args.requests, args.concurrency, rng
+            )
+            print(f"{name:45} {results[name]['throughput_rps']:8.1f} req/s  p50 {results[name]['p50_ms']:8.2f}ms  "
+                  f"p95 {results[name]['p95_ms']:8.2f}ms  p99 {results[name]['p99_ms']:8.2f}ms  {results[name]['statuses']}")
+    return results
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\nChange against {baseline_path} (p95, throughput):")
+    for name, result in results.items():
+        if name in baseline:
+            before = baseline[name]
+            p95 = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+            rps = (result["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+            print(f"{name:45} p95 {p95:+7.1f}%  throughput {rps:+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--expenses-per-month", type=float, default=40)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="bcrypt makes logins far slower")
+    parser.add_argument("--import-requests", type=int, default=20, help="imports per import scenario")
+    parser.add_argument("--import-rows", type=int, default=1000, help="expenses in each imported file")
+    parser.add_argument("--scenario", action="append", help="only run scenarios starting with this; repeatable")
+    parser.add_argument("--output", help="result file (default bench/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    upgrade(engine)
+    db = SessionLocal()
+    print("Seeded", generate(
+        db, args.users, months=args.months, seed=args.seed, expenses_per_month=args.expenses_per_month
+    ))
+    db.close()
+
+    results = asyncio.run(run(args))
+    report = {
+        "commit": commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "async": settings.DATABASE_ASYNC,
+        "options": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
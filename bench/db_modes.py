@@ -0,0 +1,96 @@
+"""Read throughput of the sync (threadpool) and async database paths.
+
+    python -m bench.db_modes --concurrency 64 --requests 2000
+
+Runs the same GET load once with DATABASE_ASYNC=0 and once with
+DATABASE_ASYNC=1, each in its own process so the engine is built from that
+setting. Requires httpx, plus aiosqlite or asyncpg for the async run.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+import httpx
+from db.database import SessionLocal
+from models.expense import DbExpense
+from models.user import DbUser
+from utils.auth_token import create_access_token
+from utils.hash import get_password_hash
+
+USERNAME = "bench_db_modes"
+EXPENSES = 2000
+PATHS = ["/expense?limit=20", "/category_expense", "/income"]
+
+
+def ensure_user() -> str:
+    db = SessionLocal()
+    user = db.query(DbUser).filter(DbUser.username == USERNAME).first()
+    if not user:
+        user = DbUser(
+            email=f"{USERNAME}@example.com",
+            username=USERNAME,
+            phone_number="+000000000001",
+            hashed_password=get_password_hash("bench-password"),
+            is_verified=True
+        )
+        db.add(user)
+        db.flush()
+        start = date(2024, 1, 1)
+        db.add_all(
+            DbExpense(amount=i % 500 + 1, date=start + timedelta(days=i % 365), note=f"bench {i}", user_id=user.id)
+            for i in range(EXPENSES)
+        )
+        db.commit()
+    db.close()
+    return create_access_token({"sub": USERNAME})
+
+
+async def run(concurrency: int, requests: int):
+    from main import app
+
+    token = ensure_user()
+    transport = httpx.ASGITransport(app=app)
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers={"Authorization": f"Bearer {token}"}
+    ) as client:
+        async def get(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(get(PATHS[i % len(PATHS)]) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+    mode = "async" if os.environ.get("DATABASE_ASYNC", "0").lower() in ("1", "true") else "sync"
+    print(f"{mode:5} {requests / elapsed:8.1f} req/s  p50 {p50 * 1000:7.1f}ms  "
+          f"p95 {p95 * 1000:7.1f}ms  statuses {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--single", action="store_true", help="run once with the current DATABASE_ASYNC")
+    args = parser.parse_args()
+    if args.single:
+        asyncio.run(run(args.concurrency, args.requests))
+    else:
+        print(f"concurrency={args.concurrency} requests={args.requests}")
+        for value in ("0", "1"):
+            subprocess.run(
+                [sys.executable, "-m", "bench.db_modes", "--single",
+                 "--concurrency", str(args.concurrency), "--requests", str(args.requests)],
+                env={**os.environ, "DATABASE_ASYNC": value, "OUTBOX_DISPATCHER": "false"},
+                check=True
+            )
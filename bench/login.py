@@ -0,0 +1,63 @@
+"""Login throughput under concurrency, driven in-process through the ASGI app.
+
+    python -m bench.login --concurrency 16 --requests 200
+
+Compare PASSWORD_HASH_WORKERS=0 (threads) against a worker pool, or two
+BCRYPT_ROUNDS values. Requires httpx.
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from db.database import SessionLocal
+from models.user import DbUser
+from utils.hash import get_password_hash
+from config import settings
+
+USERNAME = "bench_login"
+PASSWORD = "bench-password"
+
+
+def ensure_user():
+    db = SessionLocal()
+    if not db.query(DbUser).filter(DbUser.username == USERNAME).first():
+        db.add(DbUser(
+            email=f"{USERNAME}@example.com",
+            username=USERNAME,
+            phone_number="+000000000000",
+            hashed_password=get_password_hash(PASSWORD, settings.BCRYPT_ROUNDS),
+            is_verified=True
+        ))
+        db.commit()
+    db.close()
+
+
+async def run(concurrency: int, requests: int):
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            async with semaphore:
+                response = await client.post("/users/login", data={"username": USERNAME, "password": PASSWORD})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"workers={settings.PASSWORD_HASH_WORKERS} rounds={settings.BCRYPT_ROUNDS} "
+          f"concurrency={concurrency} requests={requests}")
+    print(f"{requests / elapsed:.1f} logins/s over {elapsed:.2f}s, statuses {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    ensure_user()
+    asyncio.run(run(args.concurrency, args.requests))
@@ -0,0 +1,112 @@
+"""Per-row CPU and memory of the list endpoints' read path, ORM against Core rows.
+
+    python -m db.seed generate 20 24
+    python -m bench.serialization --rows 2000
+
+The ORM path is what the endpoints did before: load instances (joined
+eager loads for expenses), validate them through the response model with
+from_attributes, encode and json.dumps. The Core path is what they do now:
+select the columns as tuples and dump plain dicts with FastJSONResponse.
+Both run against DATABASE_URL for the user with the most expenses, and the
+two payloads are checked to be equal before anything is timed.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+from db.database import SessionLocal
+from models.expense import DbExpense
+from models.income import DbIncome
+from routers.expense import expense_dict, expense_select
+from routers.incomes import INCOME_COLUMNS, income_dict
+from schemas.expense import Expense
+from schemas.income import Income
+from utils.responses import FastJSONResponse, orjson
+
+
+def orm_expenses(db, user_id, rows):
+    adapter = TypeAdapter(List[Expense])
+    expenses = db.query(DbExpense).options(
+        joinedload(DbExpense.category), joinedload(DbExpense.paymentMode)
+    ).filter(DbExpense.user_id == user_id).order_by(DbExpense.date.desc(), DbExpense.id.desc()).limit(rows).all()
+    content = adapter.dump_python(adapter.validate_python(expenses, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def core_expenses(db, user_id, rows):
+    stmt = expense_select().where(DbExpense.user_id == user_id).order_by(
+        DbExpense.date.desc(), DbExpense.id.desc()
+    ).limit(rows)
+    return FastJSONResponse([expense_dict(row) for row in db.execute(stmt)]).body
+
+
+def orm_incomes(db, user_id, rows):
+    adapter = TypeAdapter(List[Income])
+    incomes = db.query(DbIncome).filter(DbIncome.user_id == user_id).order_by(
+        DbIncome.date.desc(), DbIncome.id.desc()
+    ).limit(rows).all()
+    content = adapter.dump_python(adapter.validate_python(incomes, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def core_incomes(db, user_id, rows):
+    stmt = select(*INCOME_COLUMNS).where(DbIncome.user_id == user_id).order_by(
+        DbIncome.date.desc(), DbIncome.id.desc()
+    ).limit(rows)
+    return FastJSONResponse([income_dict(row) for row in db.execute(stmt)]).body
+
+
+def measure(path, user_id, rows, repeats):
+    # A fresh session each call, as each request gets one
+    def call():
+        db = SessionLocal()
+        try:
+            return path(db, user_id, rows)
+        finally:
+            db.close()
+
+    count = len(json.loads(call()))
+    started = time.process_time()
+    for _ in range(repeats):
+        call()
+    cpu = (time.process_time() - started) / repeats
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, cpu, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user_id = db.execute(
+        select(DbExpense.user_id).group_by(DbExpense.user_id).order_by(func.count().desc()).limit(1)
+    ).scalar()
+    if user_id is None:
+        raise SystemExit("No expenses to read; run python -m db.seed generate first")
+    for name, orm_path, core_path in (
+        ("expenses", orm_expenses, core_expenses),
+        ("incomes", orm_incomes, core_incomes),
+    ):
+        if json.loads(orm_path(db, user_id, args.rows)) != json.loads(core_path(db, user_id, args.rows)):
+            raise SystemExit(f"{name}: the ORM and Core payloads differ")
+    db.close()
+
+    print(f"json encoder: {'orjson' if orjson is not None else 'json'}")
+    for name, orm_path, core_path in (
+        ("expenses", orm_expenses, core_expenses),
+        ("incomes", orm_incomes, core_incomes),
+    ):
+        for label, path in (("orm", orm_path), ("core", core_path)):
+            count, cpu, peak = measure(path, user_id, args.rows, args.repeats)
+            print(f"{name:8} {label:4} {count:6} rows  {cpu / count * 1e6:7.2f} us/row CPU  "
+                  f"{peak / count:8.0f} B/row peak")
@@ -0,0 +1,71 @@
+"""Cold start: time to import the app and to serve its first request.
+
+    python -m bench.startup --runs 5 --budget 1.5
+
+Each run is a fresh interpreter, as on a serverless cold start. Prints the
+median of each phase as JSON, and exits non-zero when the median time to
+first response is over --budget seconds. Requires httpx. tests/test_startup.py
+runs the same probe against a fixed budget.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Imported on first use by the code that needs them, never by app startup
+OPTIONAL_MODULES = ("pandas", "numpy", "pyarrow", "passlib", "twilio")
+
+# Executed in the child interpreter; prints its timings as one JSON line
+_PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import httpx
+
+async def first_request():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return (await client.get("/")).status_code
+
+status = asyncio.run(first_request())
+modules = __import__("sys").modules
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_response_seconds": time.perf_counter() - started,
+    "status": status,
+    "modules": len(modules),
+    "optional_modules": [name for name in %r if name in modules],
+}))
+""" % (OPTIONAL_MODULES,)
+
+
+def measure() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    """Median of each phase over `runs`, and every optional module any run loaded."""
+    return {
+        "runs": len(runs),
+        "import_seconds": round(statistics.median(run["import_seconds"] for run in runs), 4),
+        "first_response_seconds": round(statistics.median(run["first_response_seconds"] for run in runs), 4),
+        "modules": runs[-1]["modules"],
+        "optional_modules": sorted({name for run in runs for name in run["optional_modules"]}),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, help="fail when time to first response exceeds this")
+    args = parser.parse_args()
+
+    result = summarize([measure() for _ in range(args.runs)])
+    print(json.dumps(result, indent=2))
+    if args.budget is not None and result["first_response_seconds"] > args.budget:
+        sys.exit(f"time to first response {result['first_response_seconds']}s is over the {args.budget}s budget")
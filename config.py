@@ -1,17 +1,98 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Serve requests from async handlers on an async driver (asyncpg / aiosqlite)
+    DATABASE_ASYNC: bool = False
+    # Apply pending migrations when the app starts; otherwise run `python -m db.migrate`
+    AUTO_MIGRATE: bool = False
+
+    # Connection pool per engine and worker. DB_NULL_POOL opens a connection per
+    # checkout instead, for serverless deployments where pools do not survive.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_NULL_POOL: bool = False
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     SECRET_KEY: str
 
+    # Verified tokens and their users are cached for this long, per worker
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_SIZE: int = 10000
+
+    # bcrypt cost for new hashes; stored hashes with another cost are upgraded at login
+    BCRYPT_ROUNDS: int = 12
+    # Worker processes for hashing (0 = threads) and how many more requests may wait
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_DEPTH: int = 16
+
+    # Log a warning when a request issues more SQL statements than this
+    MAX_QUERIES_PER_REQUEST: Optional[int] = None
+    # Report each request's SQL statement count in an X-Query-Count response header, for development
+    QUERY_COUNT_HEADER: bool = False
+    # Log statements slower than this (with their parameter types) to db.slow_query
+    SLOW_QUERY_SECONDS: Optional[float] = 0.5
+
+    # Entries kept by the category / payment mode find-or-create caches
+    LOOKUP_CACHE_SIZE: int = 1024
+
+    # Seconds the /testimonials snapshot is kept before re-reading the table, and
+    # browsers may cache it; /categories also re-reads whenever a category changes
+    REFERENCE_DATA_MAX_AGE: int = 300
+
+    # Rows fetched per round trip when streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+    # Rows per Parquet row group in exports, gathered from several fetch batches
+    EXPORT_PARQUET_ROW_GROUP_SIZE: int = 100_000
+
+    # Rows inserted and committed together by the bulk expense import
+    IMPORT_CHUNK_SIZE: int = 1000
+    # /expense/import/json parses its whole body in memory, so it is capped; larger imports go through /expense/import
+    IMPORT_JSON_MAX_BYTES: int = 10 * 1024 * 1024
+
+    # Materialize due recurrence rules inside the app; disable when running `python -m utils.recurrence` instead
+    RECURRENCE_SCHEDULER: bool = True
+    RECURRENCE_POLL_SECONDS: float = 3600
+    RECURRENCE_BATCH_SIZE: int = 500
+    # Write every occurrence missed while no scheduler ran; otherwise only the latest one
+    RECURRENCE_CATCH_UP: bool = True
+    # Occurrences POST /recurring writes before responding; the scheduler writes the rest of a long backlog
+    RECURRENCE_CREATE_MAX_OCCURRENCES: int = 100
+
+    # Memoized /analytics responses per worker, keyed by user and change version. The TTL
+    # only matters for writes that bypass the API, such as seed scripts
+    ANALYTICS_CACHE_SIZE: int = 1024
+    ANALYTICS_CACHE_TTL_SECONDS: int = 3600
+
+    # Server-sent event streams: events queued per stream before it is told to resync,
+    # idle seconds between keep-alive comments, and open streams allowed per user
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+    EVENTS_MAX_STREAMS_PER_USER: int = 5
+
+    # Bearer token for /internal/* and /metrics; unset, those endpoints are off (404)
+    INTERNAL_TOKEN: Optional[str] = None
+
     # Twilio Settings
     TWILIO_ACCOUNT_SID: str
     TWILIO_AUTH_TOKEN: str
     TWILIO_PHONE_NUMBER: str
 
+    # SMS delivery through the outbox: "fake" only logs messages
+    SMS_TRANSPORT: Literal["twilio", "fake"] = "twilio"
+    # Run the dispatcher inside the app; disable when running `python -m utils.outbox` instead
+    OUTBOX_DISPATCHER: bool = True
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_SECONDS: float = 5
+    OUTBOX_LEASE_SECONDS: int = 60
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: int = 10
+
     class Config:
         env_file = ".env"
 
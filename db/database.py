@@ -1,8 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config import settings
+from db import pool, query_counter, search
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **pool.engine_options(settings.DATABASE_URL))
+query_counter.install(engine)
+pool.install(engine, "sync")
+search.install(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -18,3 +22,39 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_database_url(url: str):
+    """The async-driver equivalent of a sync DATABASE_URL (aiosqlite / asyncpg)."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.get_backend_name() == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+# The sync engine above always exists (migrations, exports, background jobs);
+# request handlers use this one instead when DATABASE_ASYNC is enabled.
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL),
+        **pool.engine_options(settings.DATABASE_URL, is_async=True)
+    )
+    query_counter.install(async_engine.sync_engine)
+    pool.install(async_engine.sync_engine, "async")
+    search.install(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        autoflush=False,
+        expire_on_commit=False,
+        bind=async_engine
+    )
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,15 @@
+from importlib import import_module
+from sqlalchemy.orm import Session
+
+# Dialects whose insert() supports ON CONFLICT and RETURNING. Imported on first
+# use so a SQLite deployment never loads the Postgres dialect, and vice versa.
+_dialect_modules = {
+    "postgresql": "sqlalchemy.dialects.postgresql",
+    "sqlite": "sqlalchemy.dialects.sqlite",
+}
+
+
+def upsert_insert(db: Session):
+    """The dialect-specific insert() for the session's database, or None if it has no upsert."""
+    module = _dialect_modules.get(db.get_bind().dialect.name)
+    return import_module(module).insert if module else None
@@ -0,0 +1,92 @@
+from datetime import date
+from typing import Dict, List, Tuple
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from utils.pagination import encode_cursor, encode_sync_token
+
+USER_ID = 1
+
+
+def _rollup_key(dialect: str) -> str:
+    # The expense rollup has no named index of its own: it is read through its primary key
+    if dialect == "sqlite":
+        return "sqlite_autoindex_expense_monthly_rollups_1"
+    return "expense_monthly_rollups_pkey"
+
+
+def hot_queries(db: Session) -> Dict[str, Tuple[object, Tuple[str, ...]]]:
+    """The statements the routers run on every page load, built by the routers themselves,
+    paired with the indexes each one is expected to be served from."""
+    # Imported here so `python -m db.migrate` does not load the app for the other commands
+    from routers import expense, incomes, sync
+    from routers.categories import category_expense_query
+    from routers.expense import expense_csv_query, expense_list_query
+    from routers.incomes import income_list_query
+    from routers.summary import summary_query
+    from routers.sync import sync_queries
+
+    # The largest page each endpoint allows, plus the look-ahead row it fetches
+    def expense_page(built):
+        query, _ = built
+        return query.limit(expense.MAX_PAGE_SIZE + 1)
+
+    def income_page(built):
+        query, _ = built
+        return query.limit(incomes.MAX_PAGE_SIZE + 1)
+
+    cursor = encode_cursor(date(2024, 1, 31), 1000)
+    since = encode_sync_token(10, 0, 1000)
+    sync_expenses, sync_incomes = sync_queries(USER_ID, since)
+    return {
+        "get_expenses": (expense_page(expense_list_query(db, USER_ID)), ("ix_expenses_user_id_date",)),
+        "get_expenses_cursor": (
+            expense_page(expense_list_query(db, USER_ID, cursor=cursor)), ("ix_expenses_user_id_date",)
+        ),
+        "get_expenses_month": (
+            expense_page(expense_list_query(db, USER_ID, month="2024-01")), ("ix_expenses_user_id_date",)
+        ),
+        # Paged by date, so walking the date index beats filtering on recurring and sorting
+        "get_expenses_recurring": (
+            expense_page(expense_list_query(db, USER_ID, recurring=True)), ("ix_expenses_user_id_date",)
+        ),
+        "get_expenses_csv": (
+            expense_csv_query(db, USER_ID, date(2024, 1, 1), date(2024, 12, 31)), ("ix_expenses_user_id_date",)
+        ),
+        "get_incomes": (income_page(income_list_query(db, USER_ID)), ("ix_incomes_user_id_date",)),
+        "get_incomes_cursor": (
+            income_page(income_list_query(db, USER_ID, cursor=cursor)), ("ix_incomes_user_id_date",)
+        ),
+        "summary": (
+            summary_query(db, USER_ID, date(2024, 1, 1), date(2024, 6, 30)),
+            ("ix_expenses_user_id_date", "ix_incomes_user_id_date"),
+        ),
+        "category_expense": (
+            category_expense_query(USER_ID, date(2024, 1, 1)), (_rollup_key(db.get_bind().dialect.name),)
+        ),
+        "sync_expenses": (sync_expenses.limit(sync.MAX_BATCH_SIZE + 1), ("ix_expenses_user_id_version",)),
+        "sync_incomes": (sync_incomes.limit(sync.MAX_BATCH_SIZE + 1), ("ix_incomes_user_id_version",)),
+    }
+
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+        return "\n".join(row[-1] for row in rows)
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}").all()
+    return "\n".join(row[0] for row in rows)
+
+
+def check_hot_queries(engine: Engine) -> List[Tuple[str, str]]:
+    """Return (query name, plan) for every hot query whose plan skips one of its indexes."""
+    failures = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # An empty table is always cheaper to scan; ask whether the index is usable at all
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for name, (stmt, index_names) in hot_queries(Session(bind=conn)).items():
+            plan = explain(conn, stmt)
+            if not all(index_name in plan for index_name in index_names):
+                failures.append((name, plan))
+        conn.rollback()
+    return failures
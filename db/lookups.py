@@ -0,0 +1,51 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from db.dialect import upsert_insert
+from models.category import DbCategory
+from models.payment_mode import DbPaymentMode
+from utils.cache import LRUCache
+from config import settings
+
+# (name, icon, color) -> id. Rows in these tables are never edited or deleted
+# through the API, so a cached id stays valid.
+category_cache = LRUCache(settings.LOOKUP_CACHE_SIZE)
+payment_mode_cache = LRUCache(settings.LOOKUP_CACHE_SIZE)
+
+
+def _find_or_create(db: Session, model, cache: LRUCache, data: dict) -> int:
+    key = (data["name"], data["icon"], data.get("color"))
+    cached_id = cache.get(key)
+    if cached_id is not None:
+        return cached_id
+
+    insert = upsert_insert(db)
+    if insert is not None:
+        # The unique index on (name, icon, color) makes concurrent creates converge
+        stmt = insert(model).values(**data).on_conflict_do_nothing().returning(model.id)
+        new_id = db.execute(stmt).scalar()
+        if new_id is not None:
+            # Not cached: the caller may still roll this transaction back.
+            # The next lookup finds the committed row and caches it then.
+            return new_id
+
+    row_id = db.execute(select(model.id).where(
+        model.name == key[0],
+        model.icon == key[1],
+        model.color.is_(None) if key[2] is None else model.color == key[2]
+    )).scalar()
+    if row_id is None:
+        row = model(**data)
+        db.add(row)
+        db.flush()
+        return row.id
+
+    cache.put(key, row_id)
+    return row_id
+
+
+def find_or_create_category(db: Session, data: dict) -> int:
+    return _find_or_create(db, DbCategory, category_cache, data)
+
+
+def find_or_create_payment_mode(db: Session, data: dict) -> int:
+    return _find_or_create(db, DbPaymentMode, payment_mode_cache, data)
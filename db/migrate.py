@@ -0,0 +1,73 @@
+import sys
+from typing import Optional
+from sqlalchemy import Column, Integer, MetaData, Table, select
+from sqlalchemy.engine import Connection, Engine
+from db.migrations import MIGRATIONS
+
+# Kept off Base.metadata so it is only ever touched by the migration runner
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, nullable=False),
+)
+
+
+def current_version(conn: Connection) -> int:
+    schema_version.create(conn, checkfirst=True)
+    version = conn.execute(select(schema_version.c.version)).scalar()
+    return version or 0
+
+
+def _set_version(conn: Connection, version: int):
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version=version))
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> int:
+    """Apply pending migrations up to `target` (latest by default), one transaction each."""
+    target = MIGRATIONS[-1].revision if target is None else target
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for migration in MIGRATIONS:
+        if version < migration.revision <= target:
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                _set_version(conn, migration.revision)
+            version = migration.revision
+    return version
+
+
+def downgrade(engine: Engine, target: int) -> int:
+    """Revert applied migrations until the schema is at `target`."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for migration in reversed(MIGRATIONS):
+        if target < migration.revision <= version:
+            with engine.begin() as conn:
+                migration.downgrade(conn)
+                _set_version(conn, migration.revision - 1)
+            version = migration.revision - 1
+    return version
+
+
+if __name__ == "__main__":
+    from db.database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        print(f"Schema at version {upgrade(engine, target)}")
+    elif command == "downgrade":
+        print(f"Schema at version {downgrade(engine, int(sys.argv[2]))}")
+    elif command == "current":
+        with engine.begin() as conn:
+            print(f"Schema at version {current_version(conn)}")
+    elif command == "check":
+        from db.explain import check_hot_queries
+
+        failures = check_hot_queries(engine)
+        for name, plan in failures:
+            print(f"{name} does not use its indexes:\n{plan}")
+        sys.exit(1 if failures else 0)
+    else:
+        sys.exit("usage: python -m db.migrate [upgrade [N] | downgrade N | current | check]")
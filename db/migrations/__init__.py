@@ -0,0 +1,24 @@
+from db.migrations import (
+    m0001_initial,
+    m0002_user_date_indexes,
+    m0003_search_index,
+    m0004_lookup_unique,
+    m0005_monthly_rollups,
+    m0006_outbox,
+    m0007_sync_versions,
+    m0008_recurrence_rules,
+    m0009_reference_versions,
+)
+
+# Applied in order; each module exposes `revision`, `upgrade(conn)` and `downgrade(conn)`.
+MIGRATIONS = [
+    m0001_initial,
+    m0002_user_date_indexes,
+    m0003_search_index,
+    m0004_lookup_unique,
+    m0005_monthly_rollups,
+    m0006_outbox,
+    m0007_sync_versions,
+    m0008_recurrence_rules,
+    m0009_reference_versions,
+]
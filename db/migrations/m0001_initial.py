@@ -0,0 +1,73 @@
+"""Baseline schema, as previously created by Base.metadata.create_all."""
+from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Integer, MetaData, String, Table
+from db.migrations.ops import create_tables, drop_tables
+
+revision = 1
+
+metadata = MetaData()
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("username", String, unique=True, index=True, nullable=False),
+    Column("phone_number", String, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("is_active", Boolean),
+    Column("is_verified", Boolean),
+    Column("verification_code", String, nullable=True),
+)
+categories = Table(
+    "categories", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("icon", String, nullable=False),
+    Column("budget", Float, nullable=False),
+    Column("color", String, nullable=True),
+)
+payment_modes = Table(
+    "payment_modes", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("icon", String, nullable=False),
+    Column("color", String, nullable=True),
+)
+testimonials = Table(
+    "testimonials", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("role", String, nullable=False),
+    Column("quote", String, nullable=False),
+    Column("rating", Integer, nullable=False),
+    Column("image", String, nullable=True),
+)
+expenses = Table(
+    "expenses", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("amount", Float, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("note", String, nullable=True),
+    Column("recurring", Boolean),
+    Column("category_id", Integer, ForeignKey("categories.id")),
+    Column("payment_mode_id", Integer, ForeignKey("payment_modes.id")),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+)
+incomes = Table(
+    "incomes", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("amount", Float, nullable=False),
+    Column("date", Date, nullable=False),
+    Column("source", String, nullable=False),
+    Column("is_recurring", Boolean),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+)
+
+TABLES = (users, categories, payment_modes, testimonials, expenses, incomes)
+
+
+def upgrade(conn):
+    create_tables(conn, *TABLES)
+
+
+def downgrade(conn):
+    drop_tables(conn, *reversed(TABLES))
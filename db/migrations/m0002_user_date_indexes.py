@@ -0,0 +1,25 @@
+"""Composite indexes for the per-user expense and income queries."""
+from sqlalchemy import Column, Index, MetaData, Table
+from db.migrations.ops import create_indexes, drop_indexes
+
+revision = 2
+
+metadata = MetaData()
+expenses = Table("expenses", metadata, *(Column(name) for name in ("id", "date", "user_id", "category_id", "recurring")))
+incomes = Table("incomes", metadata, *(Column(name) for name in ("id", "date", "user_id", "is_recurring")))
+
+INDEXES = (
+    Index("ix_expenses_user_id_date", expenses.c.user_id, expenses.c.date.desc(), expenses.c.id.desc()),
+    Index("ix_expenses_user_id_category_id", expenses.c.user_id, expenses.c.category_id),
+    Index("ix_expenses_user_id_recurring", expenses.c.user_id, expenses.c.recurring),
+    Index("ix_incomes_user_id_date", incomes.c.user_id, incomes.c.date.desc(), incomes.c.id.desc()),
+    Index("ix_incomes_user_id_is_recurring", incomes.c.user_id, incomes.c.is_recurring),
+)
+
+
+def upgrade(conn):
+    create_indexes(conn, *INDEXES)
+
+
+def downgrade(conn):
+    drop_indexes(conn, *INDEXES)
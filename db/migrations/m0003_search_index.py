@@ -0,0 +1,66 @@
+"""Text search indexes for expense notes, income sources and category names.
+
+SQLite (3.34+) gets FTS5 external-content tables with the trigram tokenizer,
+kept in sync by triggers; Postgres gets pg_trgm GIN indexes. Other backends
+and older SQLite builds search without an index. db/search.py queries them.
+"""
+import sqlite3
+
+revision = 3
+
+INDEXED_COLUMNS = (
+    ("expenses", "note"),
+    ("incomes", "source"),
+    ("categories", "name"),
+)
+
+
+def _fts5(conn) -> bool:
+    return conn.dialect.name == "sqlite" and sqlite3.sqlite_version_info >= (3, 34)
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table_name, column_name in INDEXED_COLUMNS:
+            conn.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{column_name}_trgm "
+                f"ON {table_name} USING gin ({column_name} gin_trgm_ops)"
+            )
+        return
+    if not _fts5(conn):
+        return
+    for table_name, column_name in INDEXED_COLUMNS:
+        fts = f"{table_name}_{column_name}_fts"
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{column_name}, content='{table_name}', content_rowid='id', tokenize='trigram')"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.id, new.{column_name}); END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column_name}) VALUES ('delete', old.id, old.{column_name}); END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_name} ON {table_name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column_name}) VALUES ('delete', old.id, old.{column_name}); "
+            f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.id, new.{column_name}); END"
+        )
+        conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade(conn):
+    if conn.dialect.name == "postgresql":
+        for table_name, column_name in INDEXED_COLUMNS:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{table_name}_{column_name}_trgm")
+        return
+    if not _fts5(conn):
+        return
+    for table_name, column_name in INDEXED_COLUMNS:
+        fts = f"{table_name}_{column_name}_fts"
+        for suffix in ("ai", "ad", "au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {fts}")
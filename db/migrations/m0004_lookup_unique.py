@@ -0,0 +1,39 @@
+"""Unique (name, icon, color) on categories and payment modes, merging existing duplicates."""
+from sqlalchemy import Column, Index, MetaData, String, Table, func
+from db.migrations.ops import create_indexes, drop_indexes
+
+revision = 4
+
+metadata = MetaData()
+categories = Table("categories", metadata, *(Column(name, String) for name in ("name", "icon", "color")))
+payment_modes = Table("payment_modes", metadata, *(Column(name, String) for name in ("name", "icon", "color")))
+
+# NULL colors compare equal, so coalesce them for uniqueness
+LOOKUPS = tuple(
+    (table.name, foreign_key, Index(
+        f"uq_{table.name}_name_icon_color", table.c.name, table.c.icon, func.coalesce(table.c.color, ""),
+        unique=True
+    ))
+    for table, foreign_key in ((categories, "category_id"), (payment_modes, "payment_mode_id"))
+)
+
+
+def upgrade(conn):
+    for table, foreign_key, index in LOOKUPS:
+        # Point expenses at the oldest of each group of duplicates, then drop the rest
+        conn.exec_driver_sql(
+            f"UPDATE expenses SET {foreign_key} = ("
+            f"SELECT MIN(b.id) FROM {table} a JOIN {table} b ON b.name = a.name AND b.icon = a.icon "
+            f"AND COALESCE(b.color, '') = COALESCE(a.color, '') WHERE a.id = expenses.{foreign_key}"
+            f") WHERE {foreign_key} IS NOT NULL"
+        )
+        conn.exec_driver_sql(
+            f"DELETE FROM {table} WHERE id NOT IN ("
+            f"SELECT MIN(id) FROM {table} GROUP BY name, icon, COALESCE(color, ''))"
+        )
+        create_indexes(conn, index)
+
+
+def downgrade(conn):
+    for _, _, index in LOOKUPS:
+        drop_indexes(conn, index)
@@ -0,0 +1,54 @@
+"""Per-user monthly expense and income rollups, backfilled from existing rows."""
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, MetaData, String, Table, func, insert, select
+from db.migrations.ops import create_tables, drop_tables, month_start
+
+revision = 5
+
+metadata = MetaData()
+# Only what the backfill reads and the foreign keys point at
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+categories = Table("categories", metadata, Column("id", Integer, primary_key=True))
+expenses = Table(
+    "expenses", metadata,
+    Column("user_id", Integer), Column("date", Date), Column("category_id", Integer), Column("amount", Float),
+)
+incomes = Table(
+    "incomes", metadata,
+    Column("user_id", Integer), Column("date", Date), Column("source", String), Column("amount", Float),
+)
+
+expense_rollups = Table(
+    "expense_monthly_rollups", metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("month", Date, primary_key=True),
+    Column("category_id", Integer, ForeignKey("categories.id"), primary_key=True),
+    Column("total", Float, nullable=False),
+    Column("count", Integer, nullable=False),
+)
+income_rollups = Table(
+    "income_monthly_rollups", metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("month", Date, primary_key=True),
+    Column("source", String, primary_key=True),
+    Column("total", Float, nullable=False),
+    Column("count", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, expense_rollups, income_rollups)
+    expense_keys = [expenses.c.user_id, month_start(conn, expenses.c.date), expenses.c.category_id]
+    income_keys = [incomes.c.user_id, month_start(conn, incomes.c.date), incomes.c.source]
+    conn.execute(insert(expense_rollups).from_select(
+        ["user_id", "month", "category_id", "total", "count"],
+        select(*expense_keys, func.sum(expenses.c.amount), func.count())
+        .where(expenses.c.category_id.is_not(None)).group_by(*expense_keys)
+    ))
+    conn.execute(insert(income_rollups).from_select(
+        ["user_id", "month", "source", "total", "count"],
+        select(*income_keys, func.sum(incomes.c.amount), func.count()).group_by(*income_keys)
+    ))
+
+
+def downgrade(conn):
+    drop_tables(conn, expense_rollups, income_rollups)
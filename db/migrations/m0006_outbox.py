@@ -0,0 +1,29 @@
+"""Outbox table for messages delivered by the background dispatcher."""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table
+from db.migrations.ops import create_tables, drop_tables
+
+revision = 6
+
+metadata = MetaData()
+outbox_messages = Table(
+    "outbox_messages", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("recipient", String, nullable=False),
+    Column("body", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("claim", String, nullable=True),
+    Column("last_error", String, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("sent_at", DateTime, nullable=True),
+    Index("ix_outbox_messages_status_next_attempt_at", "status", "next_attempt_at"),
+)
+
+
+def upgrade(conn):
+    create_tables(conn, outbox_messages)
+
+
+def downgrade(conn):
+    drop_tables(conn, outbox_messages)
@@ -0,0 +1,88 @@
+"""Change versions, updated_at and soft-delete tombstones for delta sync.
+
+Rollups count live rows only from here on, so they are rebuilt skipping
+soft-deleted ones. Downgrading deletes the tombstones for good.
+"""
+from sqlalchemy import (
+    Column, Date, DateTime, Float, Index, Integer, MetaData, String, Table, delete, func, insert, select
+)
+from db.migrations.ops import add_column, create_indexes, drop_column, drop_indexes, month_start
+
+revision = 7
+
+COLUMNS = ("version", "updated_at", "deleted_at")
+
+
+def _sync_columns():
+    return (
+        Column("version", Integer, nullable=False, server_default="0"),
+        Column("updated_at", DateTime(timezone=True), server_default=func.now()),
+        Column("deleted_at", DateTime(timezone=True), nullable=True),
+    )
+
+
+metadata = MetaData()
+users = Table("users", metadata, Column("sync_version", Integer, nullable=False, server_default="0"))
+expenses = Table(
+    "expenses", metadata,
+    Column("id", Integer), Column("user_id", Integer), Column("date", Date),
+    Column("category_id", Integer), Column("amount", Float),
+    *_sync_columns(),
+)
+incomes = Table(
+    "incomes", metadata,
+    Column("id", Integer), Column("user_id", Integer), Column("date", Date),
+    Column("source", String), Column("amount", Float),
+    *_sync_columns(),
+)
+expense_rollups = Table(
+    "expense_monthly_rollups", metadata,
+    *(Column(name) for name in ("user_id", "month", "category_id", "total", "count")),
+)
+income_rollups = Table(
+    "income_monthly_rollups", metadata,
+    *(Column(name) for name in ("user_id", "month", "source", "total", "count")),
+)
+
+INDEXES = (
+    Index("ix_expenses_user_id_version", expenses.c.user_id, expenses.c.version, expenses.c.id),
+    Index("ix_incomes_user_id_version", incomes.c.user_id, incomes.c.version, incomes.c.id),
+)
+
+
+def _rebuild_rollups(conn):
+    expense_keys = [expenses.c.user_id, month_start(conn, expenses.c.date), expenses.c.category_id]
+    income_keys = [incomes.c.user_id, month_start(conn, incomes.c.date), incomes.c.source]
+    conn.execute(delete(expense_rollups))
+    conn.execute(insert(expense_rollups).from_select(
+        ["user_id", "month", "category_id", "total", "count"],
+        select(*expense_keys, func.sum(expenses.c.amount), func.count())
+        .where(expenses.c.category_id.is_not(None), expenses.c.deleted_at.is_(None)).group_by(*expense_keys)
+    ))
+    conn.execute(delete(income_rollups))
+    conn.execute(insert(income_rollups).from_select(
+        ["user_id", "month", "source", "total", "count"],
+        select(*income_keys, func.sum(incomes.c.amount), func.count())
+        .where(incomes.c.deleted_at.is_(None)).group_by(*income_keys)
+    ))
+
+
+def upgrade(conn):
+    add_column(conn, users.c.sync_version)
+    for table in (expenses, incomes):
+        for column_name in COLUMNS:
+            add_column(conn, table.c[column_name])
+    create_indexes(conn, *INDEXES)
+    _rebuild_rollups(conn)
+
+
+def downgrade(conn):
+    # Without deleted_at a tombstone would read as a live row again
+    for table in (expenses, incomes):
+        conn.execute(delete(table).where(table.c.deleted_at.is_not(None)))
+    _rebuild_rollups(conn)
+    drop_indexes(conn, *INDEXES)
+    for table in (expenses, incomes):
+        for column_name in reversed(COLUMNS):
+            drop_column(conn, table.name, column_name)
+    drop_column(conn, "users", "sync_version")
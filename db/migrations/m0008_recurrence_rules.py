@@ -0,0 +1,60 @@
+"""Recurrence rules, and the link from materialized expenses and incomes back to them."""
+from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Index, Integer, MetaData, String, Table
+from db.migrations.ops import add_column, create_indexes, create_tables, drop_column, drop_indexes, drop_tables
+
+revision = 8
+
+COLUMNS = ("recurrence_id", "occurrence")
+
+metadata = MetaData()
+# Only what the foreign keys point at
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+categories = Table("categories", metadata, Column("id", Integer, primary_key=True))
+payment_modes = Table("payment_modes", metadata, Column("id", Integer, primary_key=True))
+
+recurrence_rules = Table(
+    "recurrence_rules", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("kind", String, nullable=False),
+    Column("frequency", String, nullable=False),
+    Column("interval", Integer, nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("end_date", Date, nullable=True),
+    Column("amount", Float, nullable=False),
+    Column("note", String, nullable=False),
+    Column("category_id", Integer, ForeignKey("categories.id"), nullable=True),
+    Column("payment_mode_id", Integer, ForeignKey("payment_modes.id"), nullable=True),
+    Column("next_occurrence", Integer, nullable=False),
+    Column("next_date", Date, nullable=False),
+    Column("active", Boolean, nullable=False),
+    Index("ix_recurrence_rules_active_next_date", "active", "next_date"),
+    Index("ix_recurrence_rules_user_id", "user_id"),
+)
+expenses = Table(
+    "expenses", metadata, Column("recurrence_id", Integer, nullable=True), Column("occurrence", Integer, nullable=True)
+)
+incomes = Table(
+    "incomes", metadata, Column("recurrence_id", Integer, nullable=True), Column("occurrence", Integer, nullable=True)
+)
+
+INDEXES = {
+    table: Index(f"uq_{table.name}_recurrence_id_occurrence", table.c.recurrence_id, table.c.occurrence, unique=True)
+    for table in (expenses, incomes)
+}
+
+
+def upgrade(conn):
+    create_tables(conn, recurrence_rules)
+    for table, index in INDEXES.items():
+        for column_name in COLUMNS:
+            add_column(conn, table.c[column_name])
+        create_indexes(conn, index)
+
+
+def downgrade(conn):
+    for table, index in INDEXES.items():
+        drop_indexes(conn, index)
+        for column_name in reversed(COLUMNS):
+            drop_column(conn, table.name, column_name)
+    drop_tables(conn, recurrence_rules)
@@ -0,0 +1,60 @@
+"""A change counter per reference table, bumped by triggers in the writing transaction.
+
+Snapshots of a reference table (routers/categories.py) compare the counter
+to tell when to rebuild. Since the triggers bump it, every write counts,
+whichever code path, process or SQL console made it.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert
+from db.migrations.ops import create_tables, drop_tables
+
+revision = 9
+
+VERSIONED_TABLES = ("categories",)
+
+metadata = MetaData()
+reference_versions = Table(
+    "reference_versions", metadata,
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False, server_default="0"),
+)
+
+_BUMP = "UPDATE reference_versions SET version = version + 1 WHERE name = '{table_name}'"
+
+
+def upgrade(conn):
+    create_tables(conn, reference_versions)
+    conn.execute(insert(reference_versions), [{"name": table_name} for table_name in VERSIONED_TABLES])
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(
+            "CREATE OR REPLACE FUNCTION bump_reference_version() RETURNS trigger AS $$ BEGIN "
+            "UPDATE reference_versions SET version = version + 1 WHERE name = TG_TABLE_NAME; "
+            "RETURN NULL; END $$ LANGUAGE plpgsql"
+        )
+        for table_name in VERSIONED_TABLES:
+            # Per row, so an upsert that inserts nothing does not lock the counter
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {table_name}_version AFTER INSERT OR UPDATE OR DELETE ON {table_name} "
+                f"FOR EACH ROW EXECUTE FUNCTION bump_reference_version()"
+            )
+        return
+    if conn.dialect.name != "sqlite":
+        # Other backends leave the counter at 0, and snapshots rebuild on their TTL alone
+        return
+    for table_name in VERSIONED_TABLES:
+        for suffix, operation in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {table_name}_version_{suffix} AFTER {operation} ON {table_name} "
+                f"BEGIN {_BUMP.format(table_name=table_name)}; END"
+            )
+
+
+def downgrade(conn):
+    if conn.dialect.name == "postgresql":
+        for table_name in VERSIONED_TABLES:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table_name}_version ON {table_name}")
+        conn.exec_driver_sql("DROP FUNCTION IF EXISTS bump_reference_version()")
+    elif conn.dialect.name == "sqlite":
+        for table_name in VERSIONED_TABLES:
+            for suffix in ("ai", "au", "ad"):
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table_name}_version_{suffix}")
+    drop_tables(conn, reference_versions)
@@ -0,0 +1,67 @@
+"""Schema operations for the migrations in this package.
+
+Migrations must not import models or app code: each one declares the
+tables, columns and indexes it touches as they were at its revision, on a
+MetaData of its own, and hands those to these helpers.
+"""
+from sqlalchemy import Column, Date, Index, Table, cast, func, inspect, update
+from sqlalchemy.schema import CreateColumn, CreateIndex, DropIndex
+from sqlalchemy.engine import Connection
+
+
+def create_tables(conn: Connection, *tables: Table):
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+
+def drop_tables(conn: Connection, *tables: Table):
+    for table in tables:
+        table.drop(conn, checkfirst=True)
+
+
+def create_indexes(conn: Connection, *indexes: Index):
+    for index in indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def drop_indexes(conn: Connection, *indexes: Index):
+    for index in indexes:
+        conn.execute(DropIndex(index, if_exists=True))
+
+
+def has_column(conn: Connection, table_name: str, column_name: str) -> bool:
+    return any(column["name"] == column_name for column in inspect(conn).get_columns(table_name))
+
+
+def add_column(conn: Connection, column: Column):
+    """Add a column declared on a migration's table, unless the table already has it.
+
+    SQLite cannot add a column whose default is an expression (such as
+    now()), so there the column is added without it and existing rows are
+    backfilled with the expression instead.
+    """
+    table_name = column.table.name
+    if has_column(conn, table_name, column.name):
+        return
+    default = column.server_default
+    expression_default = default is not None and not isinstance(default.arg, str)
+    if expression_default and conn.dialect.name == "sqlite":
+        conn.exec_driver_sql(
+            f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+        )
+        conn.execute(update(column.table).values({column.name: default.arg}))
+        return
+    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+
+
+def drop_column(conn: Connection, table_name: str, column_name: str):
+    if has_column(conn, table_name, column_name):
+        conn.exec_driver_sql(f"ALTER TABLE {table_name} DROP COLUMN {column_name}")
+
+
+def month_start(conn: Connection, column):
+    """SQL expression truncating a date column to the first of its month."""
+    if conn.dialect.name == "sqlite":
+        return func.date(column, "start of month")
+    return cast(func.date_trunc("month", column), Date)
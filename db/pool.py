@@ -0,0 +1,119 @@
+import time
+from typing import Dict
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from config import settings
+from utils.metrics import Histogram
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.wait = Histogram()
+        self.connect = Histogram()
+        self.connects = 0
+        self.timeouts = 0
+        self.invalidations = 0
+
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection.
+
+    The wait includes opening a new connection when the pool is below its
+    limit; the connect histogram shows how much of that was the handshake.
+    """
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.wait.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+# Instrumented engines and their metrics, by name ("sync", "async")
+pools: Dict[str, Engine] = {}
+_metrics: Dict[str, PoolMetrics] = {}
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine keyword arguments for the pool configured in Settings."""
+    if settings.DB_NULL_POOL:
+        return {"poolclass": NullPool}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory databases live in a single connection; keep SQLAlchemy's pool for them
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def install(engine: Engine, name: str):
+    """Start collecting pool metrics for `engine` under `name`."""
+    metrics = _metrics[name] = PoolMetrics()
+    pools[name] = engine
+    engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "do_connect")
+    def start_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def end_connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        metrics.connects += 1
+        if started is not None:
+            metrics.connect.observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "invalidate")
+    def invalidated(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+
+def stats() -> dict:
+    """Current occupancy and lifetime counters of each instrumented pool."""
+    result = {}
+    for name, engine in pools.items():
+        pool, metrics = engine.pool, _metrics[name]
+        entry = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            })
+        entry.update({
+            "connects": metrics.connects,
+            "timeouts": metrics.timeouts,
+            "invalidations": metrics.invalidations,
+            "connect_seconds": metrics.connect.snapshot(),
+            "wait_seconds": metrics.wait.snapshot(),
+        })
+        result[name] = entry
+    return result
@@ -0,0 +1,75 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import settings
+from utils import metrics
+
+slow_query_log = logging.getLogger("db.slow_query")
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Holds a mutable counter so increments made in threadpool workers, which run
+# on a copy of the request context, are visible to the request that set it.
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    """Describe bound parameters by type only, so no user data reaches the log."""
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} x {parameters_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+    metrics.db_statements.inc()
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    counter = _current.get()
+    if counter is not None:
+        counter.seconds += seconds
+    if settings.SLOW_QUERY_SECONDS is not None and seconds >= settings.SLOW_QUERY_SECONDS:
+        metrics.db_slow_statements.inc()
+        slow_query_log.warning(
+            "%.3fs %s params=%s",
+            seconds, re.sub(r"\s+", " ", statement).strip()[:2000], parameters_shape(parameters, executemany)
+        )
+
+
+def install(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed within the block, e.g. one request, and their time."""
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
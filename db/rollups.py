@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+from sqlalchemy import Date, cast, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from db.dialect import upsert_insert
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.rollup import DbExpenseRollup, DbIncomeRollup
+
+
+def _upsert(db: Session, model, keys: dict, total: float, count: int):
+    insert_ = upsert_insert(db)
+    if insert_ is not None:
+        stmt = insert_(model).values(**keys, total=total, count=count)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={"total": model.total + stmt.excluded.total, "count": model.count + stmt.excluded.count}
+        ))
+        return
+
+    match = [getattr(model, key) == value for key, value in keys.items()]
+    updated = db.execute(
+        update(model).where(*match).values(total=model.total + total, count=model.count + count)
+    )
+    if updated.rowcount == 0:
+        db.execute(insert(model).values(**keys, total=total, count=count))
+
+
+def add_expense(db: Session, user_id: int, day: date, category_id: Optional[int], amount: float, count: int = 1):
+    """Apply one expense to the rollup; pass a negative amount and count to remove it.
+
+    Runs on the caller's session so it commits or rolls back with the expense itself.
+    Uncategorised expenses count toward no budget and are not rolled up.
+    """
+    if category_id is None:
+        return
+    keys = {"user_id": user_id, "month": day.replace(day=1), "category_id": category_id}
+    _upsert(db, DbExpenseRollup, keys, amount, count)
+
+
+def add_expenses(db: Session, rows: Iterable[dict]):
+    """Apply a batch of expense rows, of any users, with one upsert per (user, month, category)."""
+    totals = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        if row["category_id"] is not None:
+            total = totals[(row["user_id"], row["date"].replace(day=1), row["category_id"])]
+            total[0] += row["amount"]
+            total[1] += 1
+    for (user_id, month, category_id), (amount, count) in totals.items():
+        keys = {"user_id": user_id, "month": month, "category_id": category_id}
+        _upsert(db, DbExpenseRollup, keys, amount, count)
+
+
+def add_income(db: Session, user_id: int, day: date, source: str, amount: float, count: int = 1):
+    keys = {"user_id": user_id, "month": day.replace(day=1), "source": source}
+    _upsert(db, DbIncomeRollup, keys, amount, count)
+
+
+def add_incomes(db: Session, rows: Iterable[dict]):
+    """Apply a batch of income rows, of any users, with one upsert per (user, month, source)."""
+    totals = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        total = totals[(row["user_id"], row["date"].replace(day=1), row["source"])]
+        total[0] += row["amount"]
+        total[1] += 1
+    for (user_id, month, source), (amount, count) in totals.items():
+        keys = {"user_id": user_id, "month": month, "source": source}
+        _upsert(db, DbIncomeRollup, keys, amount, count)
+
+
+def month_start(db: Session, column):
+    """SQL expression truncating a date column to the first of its month."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column, "start of month")
+    return cast(func.date_trunc("month", column), Date)
+
+
+def rebuild(db: Session, user_id: Optional[int] = None):
+    """Recompute the rollups from the expense and income tables, for one user or everyone."""
+    expense_keys = [DbExpense.user_id, month_start(db, DbExpense.date), DbExpense.category_id]
+    income_keys = [DbIncome.user_id, month_start(db, DbIncome.date), DbIncome.source]
+    expenses = select(*expense_keys, func.sum(DbExpense.amount), func.count()).where(
+        DbExpense.category_id.is_not(None), DbExpense.deleted_at.is_(None)
+    ).group_by(*expense_keys)
+    incomes = select(*income_keys, func.sum(DbIncome.amount), func.count()).where(
+        DbIncome.deleted_at.is_(None)
+    ).group_by(*income_keys)
+    clear_expenses, clear_incomes = delete(DbExpenseRollup), delete(DbIncomeRollup)
+    if user_id is not None:
+        expenses = expenses.where(DbExpense.user_id == user_id)
+        incomes = incomes.where(DbIncome.user_id == user_id)
+        clear_expenses = clear_expenses.where(DbExpenseRollup.user_id == user_id)
+        clear_incomes = clear_incomes.where(DbIncomeRollup.user_id == user_id)
+
+    db.execute(clear_expenses)
+    db.execute(insert(DbExpenseRollup).from_select(
+        ["user_id", "month", "category_id", "total", "count"], expenses
+    ))
+    db.execute(clear_incomes)
+    db.execute(insert(DbIncomeRollup).from_select(
+        ["user_id", "month", "source", "total", "count"], incomes
+    ))
+
+
+if __name__ == "__main__":
+    import sys
+    from db.database import SessionLocal
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        sys.exit("usage: python -m db.rollups rebuild [USER_ID]")
+    db = SessionLocal()
+    rebuild(db, int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    db.commit()
+    print("Rollups rebuilt successfully!")
@@ -0,0 +1,165 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Literal, Optional, Set
+from sqlalchemy import Float, Select, event, func, literal, or_, select, table, column as sql_column
+from sqlalchemy.engine import Connection, Engine
+
+# substring: case-insensitive match anywhere in the text (the historical behaviour)
+# prefix:    match at the start of any word
+# fuzzy:     trigram similarity, tolerates typos
+SearchMode = Literal["substring", "prefix", "fuzzy"]
+
+# (table, column) pairs that get a search index
+INDEXED_COLUMNS = (
+    ("expenses", "note"),
+    ("incomes", "source"),
+    ("categories", "name"),
+)
+
+
+def _like_patterns(term: str, mode: SearchMode):
+    if mode == "prefix":
+        return [f"{term}%", f"% {term}%"]
+    return [f"%{term}%"]
+
+
+# Share of the term's trigrams a fuzzy match must contain; pg_trgm's default word_similarity_threshold
+FUZZY_THRESHOLD = 0.6
+
+
+def _word_trigrams(text: str) -> Set[str]:
+    # Words padded as pg_trgm pads them, so a typo keeps the trigrams at the word's edges
+    trigrams = set()
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def word_similarity(term: str, text: Optional[str]) -> float:
+    """Share of `term`'s trigrams found among the words of `text`, from 0 to 1."""
+    wanted = _word_trigrams(term)
+    if not wanted or not text:
+        return 0.0
+    return len(wanted & _word_trigrams(text)) / len(wanted)
+
+
+def install(engine: Engine):
+    """Register word_similarity() as an SQL function on the engine's SQLite connections."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """Portable fallback: plain ILIKE filtering without ranking.
+
+    Every backend's `matches` returns a select of (id, score) rows for the
+    rows of the column's table that match `term`; higher score is better.
+    """
+
+    @contextmanager
+    def bulk_load(self, conn: Connection, table_name: str):
+        """Wrap a large insert into `table_name` so the index is brought up to date once, at the end."""
+        yield
+
+    def matches(self, column, term: str, mode: SearchMode = "substring") -> Select:
+        id_column = column.class_.id
+        condition = or_(*(column.ilike(pattern) for pattern in _like_patterns(term, mode)))
+        return select(id_column.label("id"), literal(0.0).label("score")).where(condition)
+
+
+class Fts5SearchIndex(SearchIndex):
+    """SQLite FTS5 external-content tables using the trigram tokenizer.
+
+    Triggers on the base table keep the index in sync on insert, update and
+    delete, whichever code path writes the row. Migration m0003 creates the
+    tables and triggers; bulk_load re-creates the insert trigger as it did.
+    """
+
+    @staticmethod
+    def _fts_name(table_name: str, column_name: str) -> str:
+        return f"{table_name}_{column_name}_fts"
+
+    def _insert_trigger(self, table_name: str, column_name: str) -> str:
+        fts = self._fts_name(table_name, column_name)
+        return (
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.id, new.{column_name}); END"
+        )
+
+    @contextmanager
+    def bulk_load(self, conn: Connection, table_name: str):
+        # Indexing row by row from the trigger is about ten times slower than
+        # one INSERT ... SELECT, so the trigger is dropped for the duration.
+        # It is all one transaction: a failed load restores the trigger too.
+        columns = [column_name for name, column_name in INDEXED_COLUMNS if name == table_name]
+        last_id = conn.exec_driver_sql(f"SELECT coalesce(max(id), 0) FROM {table_name}").scalar()
+        for column_name in columns:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {self._fts_name(table_name, column_name)}_ai")
+        yield
+        for column_name in columns:
+            fts = self._fts_name(table_name, column_name)
+            conn.exec_driver_sql(
+                f"INSERT INTO {fts}(rowid, {column_name}) "
+                f"SELECT id, {column_name} FROM {table_name} WHERE id > ?", (last_id,)
+            )
+            conn.exec_driver_sql(self._insert_trigger(table_name, column_name))
+
+    def matches(self, column, term: str, mode: SearchMode = "substring") -> Select:
+        column_name = column.expression.name
+        fts = table(
+            self._fts_name(column.expression.table.name, column_name),
+            sql_column("rowid"), sql_column(column_name), sql_column("rank"),
+        )
+        fts_column = fts.c[column_name]
+        like = or_(*(fts_column.like(pattern) for pattern in _like_patterns(term, mode)))
+
+        if mode == "fuzzy":
+            # A typo can leave no trigram in common with the text ("bens" and
+            # "beans"), so the FTS index cannot find the candidates. Rows are
+            # scored with the padded word trigrams pg_trgm uses instead, on the
+            # rows the caller's other filters leave.
+            score = func.word_similarity(term, column, type_=Float)
+            return select(column.class_.id.label("id"), score.label("score")).where(score >= FUZZY_THRESHOLD)
+
+        # The trigram tokenizer cannot MATCH terms shorter than three characters
+        # and has no rank for LIKE, so short terms fall back to an unranked LIKE.
+        if len(term) < 3:
+            return select(fts.c.rowid.label("id"), literal(0.0).label("score")).where(like)
+
+        score = (-fts.c.rank).label("score")
+
+        query = select(fts.c.rowid.label("id"), score).where(fts_column.op("MATCH")(_quote(term)))
+        return query.where(like) if mode == "prefix" else query
+
+
+class TrigramSearchIndex(SearchIndex):
+    """Postgres pg_trgm GIN indexes (created by migration m0003), which serve ILIKE '%term%' and similarity operators."""
+
+    def matches(self, column, term: str, mode: SearchMode = "substring") -> Select:
+        id_column = column.class_.id
+        score = func.word_similarity(term, column).label("score")
+        if mode == "fuzzy":
+            condition = column.op("%>")(term)
+        else:
+            condition = or_(*(column.ilike(pattern) for pattern in _like_patterns(term, mode)))
+        return select(id_column.label("id"), score).where(condition)
+
+
+_backends: Dict[str, SearchIndex] = {
+    "sqlite": Fts5SearchIndex() if sqlite3.sqlite_version_info >= (3, 34) else SearchIndex(),
+    "postgresql": TrigramSearchIndex(),
+}
+
+
+def search_index(dialect_name: str) -> SearchIndex:
+    return _backends.get(dialect_name, SearchIndex())
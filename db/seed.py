@@ -1,10 +1,28 @@
+import bisect
+import csv
+import io
+import math
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.orm import Session
 from models.testimonial import DbTestimonial
 from models.category import DbCategory
 from models.payment_mode import DbPaymentMode
+from models.user import DbUser
+from models.expense import DbExpense
+from models.income import DbIncome
+from config import settings
+from db import rollups
+from db.search import search_index
+from utils.hash import get_password_hash
 
 
 def seed_data(db: Session):
+    """Reference testimonials, categories and payment modes; rows already present are skipped."""
     # Seed testimonials
     testimonials = [
         DbTestimonial(
@@ -55,22 +73,269 @@ def seed_data(db: Session):
         DbPaymentMode(name="Net Banking", icon="Bank", color="gray")
     ]
 
-    # Add all to session
+    # Add whichever rows are missing, so re-running is safe
     for testimonial in testimonials:
-        db.add(testimonial)
+        if not db.query(DbTestimonial).filter_by(name=testimonial.name).first():
+            db.add(testimonial)
 
     for category in categories:
-        db.add(category)
+        if not db.query(DbCategory).filter_by(name=category.name, icon=category.icon).first():
+            db.add(category)
 
     for payment_mode in payment_modes:
-        db.add(payment_mode)
+        if not db.query(DbPaymentMode).filter_by(name=payment_mode.name, icon=payment_mode.icon).first():
+            db.add(payment_mode)
 
     # Commit the session
     db.commit()
 
 
+# Generated users are named SEED_USER_PREFIX + index and all share SEED_PASSWORD
+SEED_USER_PREFIX = "seed_user_"
+SEED_PASSWORD = "seed-password"
+# Users generated and committed together; a failed chunk leaves no partial users
+USER_CHUNK_SIZE = 500
+
+# Share of spending, typical amount and note templates per seeded category
+CATEGORY_PROFILES = {
+    "Food expenses": (0.38, 250, ["lunch at {place}", "dinner at {place}", "groceries from {store}",
+                                  "coffee at {place}", "snacks for {person}"]),
+    "Shopping": (0.22, 900, ["clothes from {store}", "shoes from {store}", "gift for {person}",
+                             "home supplies from {store}"]),
+    "Entertainment": (0.15, 500, ["movie tickets with {person}", "concert tickets", "bowling with {person}",
+                                  "video games"]),
+    "Bills and Utilities": (0.12, 1500, ["electricity bill", "water bill", "internet bill", "mobile recharge"]),
+    "Medical": (0.08, 700, ["pharmacy", "doctor visit", "lab tests", "dentist appointment"]),
+    "Education": (0.05, 2000, ["books from {store}", "online course", "tuition fees", "exam fees"]),
+}
+PLACES = ["Cafe Mocha", "Burger Barn", "Spice Route", "Sushi Zen", "Pizza Point", "the office canteen"]
+STORES = ["FreshMart", "Big Bazaar", "Amazon", "Decathlon", "Zara", "the corner store"]
+PEOPLE = ["mom", "dad", "Priya", "Rahul", "the team", "friends"]
+PAYMENT_MODE_WEIGHTS = {"UPI": 0.4, "Credit Card": 0.25, "Debit Card": 0.15, "Cash": 0.15, "Net Banking": 0.05}
+SUBSCRIPTIONS = [("Netflix subscription", 649), ("Spotify subscription", 119), ("Gym membership", 1500),
+                 ("Cloud storage", 130)]
+# Spending by calendar month: a January lull and a festive-season peak
+SEASONALITY = (0.85, 0.9, 0.95, 1.0, 1.0, 0.95, 1.0, 1.05, 1.0, 1.15, 1.25, 1.45)
+
+# Every note each category's templates can produce, expanded once up front
+NOTES = {
+    name: sorted({
+        template.format(place=place, store=store, person=person)
+        for template in templates for place in PLACES for store in STORES for person in PEOPLE
+    })
+    for name, (_, _, templates) in CATEGORY_PROFILES.items()
+}
+
+EXPENSE_COLUMNS = ("amount", "date", "note", "recurring", "category_id", "payment_mode_id", "user_id", "version")
+INCOME_COLUMNS = ("amount", "date", "source", "is_recurring", "user_id", "version")
+# Change version of a generated user's whole history: /sync sends it as one
+# write, and the user's sync_version starts here so later writes come after it
+SEED_VERSION = 1
+
+
+def _months(start: date, months: int):
+    for offset in range(months):
+        year, month = divmod(start.month - 1 + offset, 12)
+        first = date(start.year + year, month + 1, 1)
+        following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        yield first, (following - first).days
+
+
+def _cumulative(weights: Sequence[float]) -> List[float]:
+    total, result = 0.0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def _pick(rng: random.Random, items: Sequence, cumulative: List[float]):
+    return items[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Normal approximation; the means used here are large enough for it
+    return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+
+
+def _user_rows(
+    rng: random.Random,
+    user_id: int,
+    start: date,
+    months: int,
+    expenses_per_month: float,
+    category_ids: Dict[str, int],
+    payment_mode_ids: Dict[str, int]
+):
+    """Expense and income rows (as tuples in *_COLUMNS order) for one user, at SEED_VERSION."""
+    names = [name for name in CATEGORY_PROFILES if name in category_ids]
+    # Each user leans toward some categories more than the population does
+    category_weights = _cumulative([CATEGORY_PROFILES[name][0] * rng.lognormvariate(0, 0.5) for name in names])
+    categories = [(category_ids[name], math.log(CATEGORY_PROFILES[name][1]), NOTES[name]) for name in names]
+    modes = [name for name in PAYMENT_MODE_WEIGHTS if name in payment_mode_ids] or list(payment_mode_ids)
+    mode_ids = [payment_mode_ids[name] for name in modes]
+    mode_weights = _cumulative([PAYMENT_MODE_WEIGHTS.get(name, 1.0) for name in modes])
+    spend = rng.lognormvariate(0, 0.4)
+    salary = int(round(rng.lognormvariate(math.log(50000), 0.5), -2))
+    rent = int(round(rng.uniform(8000, 25000), -2)) if rng.random() < 0.6 and "Bills and Utilities" in category_ids else None
+    subscriptions = rng.sample(SUBSCRIPTIONS, rng.randint(0, 3)) if "Entertainment" in category_ids else []
+    invests = rng.random() < 0.3
+
+    expenses, incomes = [], []
+    for first, days in _months(start, months):
+        # Recurring series land on the same day with the same amount every month
+        if rent is not None:
+            expenses.append((rent, first + timedelta(days=rng.randint(0, 4)), "house rent", True,
+                             category_ids["Bills and Utilities"], payment_mode_ids.get("Net Banking"), user_id,
+                             SEED_VERSION))
+        for note, amount in subscriptions:
+            expenses.append((amount, first + timedelta(days=min(days - 1, 14)), note, True,
+                             category_ids["Entertainment"], payment_mode_ids.get("Credit Card"), user_id,
+                             SEED_VERSION))
+        incomes.append((salary, first, "Salary", True, user_id, SEED_VERSION))
+        if rng.random() < 0.25:
+            incomes.append((int(round(rng.lognormvariate(math.log(8000), 0.7), -1)),
+                            first + timedelta(days=rng.randrange(days)), "Freelance", False, user_id, SEED_VERSION))
+        if invests and first.month % 3 == 0:
+            incomes.append((round(rng.uniform(500, 5000)), first + timedelta(days=days - 1), "Dividends", False, user_id,
+                            SEED_VERSION))
+
+        if not categories:
+            continue
+        dates = [first + timedelta(days=day) for day in range(days)]
+        for _ in range(_poisson(rng, expenses_per_month * spend * SEASONALITY[first.month - 1])):
+            category_id, typical, notes = _pick(rng, categories, category_weights)
+            day = dates[int(rng.random() * days)]
+            # Weekends are busier: re-draw some weekdays once
+            if day.weekday() < 5 and rng.random() < 0.3:
+                day = dates[int(rng.random() * days)]
+            expenses.append((
+                max(1, round(math.exp(rng.gauss(typical, 0.6)))),
+                day,
+                notes[int(rng.random() * len(notes))],
+                False,
+                category_id,
+                _pick(rng, mode_ids, mode_weights),
+                user_id,
+                SEED_VERSION
+            ))
+    return expenses, incomes
+
+
+def bulk_insert(db: Session, table, columns: Sequence[str], rows: List[tuple]):
+    """Insert `rows` through the fastest path the database offers: COPY on Postgres, executemany elsewhere."""
+    if not rows:
+        return
+    conn = db.connection()
+    with search_index(conn.dialect.name).bulk_load(conn, table.name):
+        _bulk_insert(conn, table, columns, rows)
+
+
+def _bulk_insert(conn, table, columns: Sequence[str], rows: List[tuple]):
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor = conn.connection.dbapi_connection.cursor()
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    elif conn.dialect.name == "sqlite":
+        # sqlite3's own date adapter is deprecated, so dates are bound as ISO strings
+        position = columns.index("date")
+        conn.exec_driver_sql(
+            f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [row[:position] + (row[position].isoformat(),) + row[position + 1:] for row in rows]
+        )
+    else:
+        conn.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+def generate(
+    db: Session,
+    users: int,
+    months: int = 12,
+    seed: int = 42,
+    start: date = date(2024, 1, 1),
+    expenses_per_month: float = 40
+) -> dict:
+    """Generate `users` synthetic users with a history of expenses and incomes.
+
+    Every user's data comes from its own generator seeded by (`seed`, index),
+    so the output is the same on every run and users that already exist are
+    skipped: re-running is a no-op, and raising `users` only adds the new ones.
+    """
+    started = time.perf_counter()
+    seed_data(db)
+    category_ids = {name: id for id, name in db.execute(select(DbCategory.id, DbCategory.name)).all()}
+    payment_mode_ids = {name: id for id, name in db.execute(select(DbPaymentMode.id, DbPaymentMode.name)).all()}
+    existing = set(db.scalars(select(DbUser.username).where(DbUser.username.startswith(SEED_USER_PREFIX))))
+    missing = [i for i in range(users) if f"{SEED_USER_PREFIX}{i}" not in existing]
+    password_hash = get_password_hash(SEED_PASSWORD, settings.BCRYPT_ROUNDS)
+
+    expense_count = income_count = 0
+    for offset in range(0, len(missing), USER_CHUNK_SIZE):
+        chunk = missing[offset:offset + USER_CHUNK_SIZE]
+        db.execute(insert(DbUser), [{
+            "email": f"{SEED_USER_PREFIX}{i}@example.com",
+            "username": f"{SEED_USER_PREFIX}{i}",
+            "phone_number": f"+9{i:011d}",
+            "hashed_password": password_hash,
+            "is_active": True,
+            "is_verified": True,
+            "sync_version": SEED_VERSION,
+        } for i in chunk])
+        user_ids = dict(db.execute(select(DbUser.username, DbUser.id).where(
+            DbUser.username.in_([f"{SEED_USER_PREFIX}{i}" for i in chunk])
+        )).all())
+        expenses, incomes = [], []
+        for i in chunk:
+            rng = random.Random(f"{seed}:{i}")
+            user_expenses, user_incomes = _user_rows(
+                rng, user_ids[f"{SEED_USER_PREFIX}{i}"], start, months, expenses_per_month,
+                category_ids, payment_mode_ids
+            )
+            expenses += user_expenses
+            incomes += user_incomes
+        bulk_insert(db, DbExpense.__table__, EXPENSE_COLUMNS, expenses)
+        bulk_insert(db, DbIncome.__table__, INCOME_COLUMNS, incomes)
+        # The bulk path skips column defaults, and SQLite has no server default for updated_at
+        for model in (DbExpense, DbIncome):
+            db.execute(update(model).where(
+                model.user_id.in_(user_ids.values()), model.updated_at.is_(None)
+            ).values(updated_at=func.now()))
+        db.commit()
+        expense_count += len(expenses)
+        income_count += len(incomes)
+
+    if missing:
+        rollups.rebuild(db)
+        db.commit()
+    seconds = time.perf_counter() - started
+    rows = len(missing) + expense_count + income_count
+    return {
+        "users": len(missing),
+        "skipped": users - len(missing),
+        "expenses": expense_count,
+        "incomes": income_count,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds) if seconds else 0,
+    }
+
+
 if __name__ == "__main__":
     from db.database import SessionLocal
     db = SessionLocal()
-    seed_data(db)
-    print("Database seeded successfully!")
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "generate":
+        if len(sys.argv) < 3:
+            sys.exit("usage: python -m db.seed generate USERS [MONTHS] [SEED]")
+        result = generate(
+            db,
+            users=int(sys.argv[2]),
+            months=int(sys.argv[3]) if len(sys.argv) > 3 else 12,
+            seed=int(sys.argv[4]) if len(sys.argv) > 4 else 42
+        )
+        print(f"Generated {result['users']} users ({result['skipped']} already present), "
+              f"{result['expenses']} expenses and {result['incomes']} incomes "
+              f"in {result['seconds']}s ({result['rows_per_second']} rows/s)")
+    else:
+        seed_data(db)
+        print("Database seeded successfully!")
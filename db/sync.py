@@ -0,0 +1,40 @@
+from typing import Dict, Iterable
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models.user import DbUser
+
+
+def next_version(db: Session, user_id: int) -> int:
+    """Claim the next change version for a write to the user's expenses or incomes.
+
+    Runs on the caller's session, so the version commits or rolls back with
+    the write. The update holds the user's row lock until then, so a user's
+    versions become visible in increasing order: once a client has synced up
+    to version N, no later commit can carry a version at or below N.
+    """
+    users = DbUser.__table__
+    return db.execute(
+        update(users)
+        .where(users.c.id == user_id)
+        .values(sync_version=users.c.sync_version + 1)
+        .returning(users.c.sync_version)
+    ).scalar_one()
+
+
+def next_versions(db: Session, user_ids: Iterable[int]) -> Dict[int, int]:
+    """next_version for a batch write spanning several users: user id -> version."""
+    users = DbUser.__table__
+    ids = sorted(set(user_ids))
+    # Lock in id order, so two batches over overlapping users cannot deadlock
+    db.execute(select(users.c.id).where(users.c.id.in_(ids)).order_by(users.c.id).with_for_update())
+    return dict(db.execute(
+        update(users)
+        .where(users.c.id.in_(ids))
+        .values(sync_version=users.c.sync_version + 1)
+        .returning(users.c.id, users.c.sync_version)
+    ).all())
+
+
+def current_version(db: Session, user_id: int) -> int:
+    """The user's latest change version; it moves whenever their expenses or incomes change."""
+    return db.execute(select(DbUser.sync_version).where(DbUser.id == user_id)).scalar_one()
@@ -1,17 +1,45 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from routers import expense, testimonials, categories, incomes, user
-from db.database import engine
-from db.database import Base
+from routers import expense, testimonials, categories, incomes, user, export, internal, sync, events, analytics, recurrence, summary
+from config import settings
+from db.query_counter import count_queries
+from utils import metrics, outbox, password_service
+from utils import recurrence as recurrence_scheduler
+from utils.async_routes import async_router
+from utils.auth_token import require_internal_token
 
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.AUTO_MIGRATE:
+        from db.database import engine
+        from db.migrate import upgrade
+        await asyncio.to_thread(upgrade, engine)
+    stop = asyncio.Event()
+    dispatcher = asyncio.create_task(outbox.run_dispatcher(stop)) if settings.OUTBOX_DISPATCHER else None
+    scheduler = (
+        asyncio.create_task(recurrence_scheduler.run_scheduler(stop)) if settings.RECURRENCE_SCHEDULER else None
+    )
+    yield
+    stop.set()
+    if dispatcher:
+        outbox.notify()
+        await dispatcher
+    if scheduler:
+        await scheduler
+    password_service.shutdown()
 
 
 app = FastAPI(
     title="BudgetBuddy API",
     description="API for managing testimonials, categories, expenses, incomes, and budget summaries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -21,16 +49,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+
+@app.middleware("http")
+async def count_request_queries(request: Request, call_next):
+    started = time.perf_counter()
+    with count_queries() as counter:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    # Label by route template, not the raw path, to keep series bounded
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.http_requests.inc(request.method, path, response.status_code)
+    metrics.http_request_duration.observe(request.method, path, value=elapsed)
+    metrics.db_statements_per_request.observe(request.method, path, value=counter.count)
+    metrics.db_time_per_request.observe(request.method, path, value=counter.seconds)
+    if settings.QUERY_COUNT_HEADER:
+        response.headers["X-Query-Count"] = str(counter.count)
+    if settings.MAX_QUERIES_PER_REQUEST and counter.count > settings.MAX_QUERIES_PER_REQUEST:
+        logging.getLogger(__name__).warning(
+            "%s %s issued %d SQL statements (limit %d)",
+            request.method, request.url.path, counter.count, settings.MAX_QUERIES_PER_REQUEST
+        )
+    return response
+
+
+
+def serve(router):
+    return async_router(router) if settings.DATABASE_ASYNC else router
+
+
 # Include routers
-app.include_router(testimonials.router, tags=["Testimonials"])
-app.include_router(categories.router, tags=["Categories"])
-app.include_router(expense.router, tags=["Expenses"])
-app.include_router(incomes.router, tags=["Incomes"])
-app.include_router(user.router)
+app.include_router(serve(testimonials.router), tags=["Testimonials"])
+app.include_router(serve(categories.router), tags=["Categories"])
+app.include_router(serve(expense.router), tags=["Expenses"])
+app.include_router(serve(incomes.router), tags=["Incomes"])
+app.include_router(serve(summary.router), tags=["Summary"])
+app.include_router(serve(export.router), tags=["Export"])
+app.include_router(serve(sync.router), tags=["Sync"])
+app.include_router(events.router, tags=["Events"])
+app.include_router(serve(analytics.router), tags=["Analytics"])
+app.include_router(serve(recurrence.router), tags=["Recurring"])
+app.include_router(serve(user.router))
+app.include_router(internal.router, tags=["Internal"])
 
 
 @app.get("/")
 def root():
     return {"message": "Welcome to BudgetBuddy API"}
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)]
+)
+def get_metrics():
+    """Request, latency and SQL metrics of this worker in Prometheus text format.
+
+    Off unless INTERNAL_TOKEN is set; scrape it with that as the bearer token.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -4,6 +4,10 @@ from models.payment_mode import DbPaymentMode
 from models.income import DbIncome
 from models.testimonial import DbTestimonial
 from models.user import DbUser
+from models.rollup import DbExpenseRollup, DbIncomeRollup
+from models.outbox import DbOutboxMessage
+from models.recurrence import DbRecurrenceRule
+from models.reference_version import DbReferenceVersion
 
 __all__ = [
     'DbCategory',
@@ -11,5 +15,10 @@ __all__ = [
     'DbPaymentMode',
     'DbIncome',
     'DbTestimonial',
-    'DbUser'
+    'DbUser',
+    'DbExpenseRollup',
+    'DbIncomeRollup',
+    'DbOutboxMessage',
+    'DbRecurrenceRule',
+    'DbReferenceVersion'
 ]
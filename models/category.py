@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index, func
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -12,4 +12,7 @@ class DbCategory(Base):
     color = Column(String, nullable=True)
     expenses = relationship("DbExpense", back_populates="category")
 
-
+    # NULL colors compare equal, so coalesce them for uniqueness
+    __table_args__ = (
+        Index("uq_categories_name_icon_color", name, icon, func.coalesce(color, ""), unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, Date, String
+from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, Date, DateTime, String, Index, func
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -14,7 +14,23 @@ class DbExpense(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     payment_mode_id = Column(Integer, ForeignKey("payment_modes.id"))
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # The owner's sync_version at the last write; deleted rows stay behind as tombstones
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Also set from Python: on SQLite the column was added without its now() default
+    updated_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Set on rows materialized from a recurrence rule; unique together so no occurrence is written twice
+    recurrence_id = Column(Integer, nullable=True)
+    occurrence = Column(Integer, nullable=True)
 
     category = relationship("DbCategory", back_populates="expenses")
     paymentMode = relationship("DbPaymentMode", back_populates="expenses")
-    user = relationship("DbUser", back_populates="expenses")
\ No newline at end of file
+    user = relationship("DbUser", back_populates="expenses")
+
+    __table_args__ = (
+        Index("ix_expenses_user_id_date", user_id, date.desc(), id.desc()),
+        Index("ix_expenses_user_id_category_id", user_id, category_id),
+        Index("ix_expenses_user_id_recurring", user_id, recurring),
+        Index("ix_expenses_user_id_version", user_id, version, id),
+        Index("uq_expenses_recurrence_id_occurrence", recurrence_id, occurrence, unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, Boolean, Date, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, Boolean, Date, DateTime, String, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -12,5 +12,20 @@ class DbIncome(Base):
     source = Column(String, nullable=False)
     is_recurring = Column(Boolean, default=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # The owner's sync_version at the last write; deleted rows stay behind as tombstones
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Also set from Python: on SQLite the column was added without its now() default
+    updated_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Set on rows materialized from a recurrence rule; unique together so no occurrence is written twice
+    recurrence_id = Column(Integer, nullable=True)
+    occurrence = Column(Integer, nullable=True)
 
     user = relationship("DbUser", back_populates="incomes")
+
+    __table_args__ = (
+        Index("ix_incomes_user_id_date", user_id, date.desc(), id.desc()),
+        Index("ix_incomes_user_id_is_recurring", user_id, is_recurring),
+        Index("ix_incomes_user_id_version", user_id, version, id),
+        Index("uq_incomes_recurrence_id_occurrence", recurrence_id, occurrence, unique=True),
+    )
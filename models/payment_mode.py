@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index, func
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -10,3 +10,8 @@ class DbPaymentMode(Base):
     icon = Column(String, nullable=False)
     color = Column(String, nullable=True)
     expenses = relationship("DbExpense", back_populates="paymentMode")
+
+    # NULL colors compare equal, so coalesce them for uniqueness
+    __table_args__ = (
+        Index("uq_payment_modes_name_icon_color", name, icon, func.coalesce(color, ""), unique=True),
+    )
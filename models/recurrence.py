@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, Float, Boolean, Date, String, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from db.database import Base
+
+
+class DbRecurrenceRule(Base):
+    """A repeating expense or income, materialized into rows by utils/recurrence.py as it falls due."""
+    __tablename__ = "recurrence_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)  # expense or income
+    frequency = Column(String, nullable=False)  # daily, weekly or monthly
+    interval = Column(Integer, nullable=False, default=1)  # every N days / weeks / months
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=True)
+    amount = Column(Float, nullable=False)
+    note = Column(String, nullable=False)  # the expense note, or the income source
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    payment_mode_id = Column(Integer, ForeignKey("payment_modes.id"), nullable=True)
+    # Occurrence n falls on start_date + n intervals; these point at the first one not yet materialized
+    next_occurrence = Column(Integer, nullable=False, default=0)
+    next_date = Column(Date, nullable=False)
+    active = Column(Boolean, nullable=False, default=True)
+
+    category = relationship("DbCategory")
+    paymentMode = relationship("DbPaymentMode")
+
+    __table_args__ = (
+        Index("ix_recurrence_rules_active_next_date", active, next_date),
+        Index("ix_recurrence_rules_user_id", user_id),
+    )
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from db.database import Base
+
+
+class DbReferenceVersion(Base):
+    """Change counter for a reference table, bumped by database triggers on every write to it."""
+    __tablename__ = "reference_versions"
+
+    name = Column(String, primary_key=True)  # table name
+    version = Column(Integer, nullable=False, default=0, server_default="0")
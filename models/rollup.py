@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, Date, String, ForeignKey
+from db.database import Base
+
+
+class DbExpenseRollup(Base):
+    """Per-user monthly expense totals by category, kept in step by the expense handlers."""
+    __tablename__ = "expense_monthly_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class DbIncomeRollup(Base):
+    """Per-user monthly income totals by source, kept in step by the income handlers."""
+    __tablename__ = "income_monthly_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    source = Column(String, primary_key=True)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -14,6 +14,8 @@ class DbUser(Base):
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     verification_code = Column(String, nullable=True)
+    # Bumped by every write to the user's expenses and incomes; see db.sync
+    sync_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     expenses = relationship("DbExpense", back_populates="user")
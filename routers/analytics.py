@@ -0,0 +1,95 @@
+import hashlib
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.orm import Session
+from typing import Callable, Literal, Optional
+from db.database import get_db
+from db.sync import current_version
+from models.user import DbUser
+from schemas.analytics import Forecast, Series
+from utils.auth_token import get_current_user
+from utils.cache import LRUCache
+from utils.responses import dumps
+from utils.snapshot import etag_matches
+from config import settings
+
+router = APIRouter()
+
+# (user id, change version, endpoint, parameters) -> (JSON body, ETag). A write
+# moves the version, so entries are never served stale; old ones age out.
+analytics_cache = LRUCache(settings.ANALYTICS_CACHE_SIZE, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+def _end_date(month: Optional[str]) -> date:
+    return datetime.strptime(month, "%Y-%m").date() if month else date.today()
+
+
+def _memoized(request: Request, db: Session, user_id: int, key: tuple, compute: Callable[[], dict]) -> Response:
+    cache_key = (user_id, current_version(db, user_id)) + key
+    entry = analytics_cache.get(cache_key)
+    if entry is None:
+        body = dumps(compute())
+        entry = (body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+        analytics_cache.put(cache_key, entry)
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/analytics/series", response_model=Series)
+def get_series(
+    request: Request,
+    period: Literal["month", "week"] = Query("month", description="Bucket by calendar month or by Monday-to-Sunday week"),
+    group: Literal["category", "paymentMode"] = Query("category", description="Break spend down by category or payment mode"),
+    periods: int = Query(12, gt=0, le=104, description="Number of periods, ending with the one containing `end`"),
+    window: int = Query(3, gt=0, le=12, description="Periods averaged by the rolling means"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Last month in YYYY-MM format (default: this month)"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Income, spend, net and savings rate per period, with spend per category or payment mode.
+
+    Each series has a rolling mean and a period-over-period change. Results
+    are memoized until the user's expenses or incomes change.
+    """
+    # pandas is only imported once analytics are first asked for
+    from utils import analytics
+
+    end_date = _end_date(end)
+    if period == "week" and end:
+        # The last week of that month
+        end_date = analytics.periods("month", end_date, 1)[0].end_time.date()
+
+    def compute():
+        frame = analytics.load(db, current_user.id, analytics.history_start(period, end_date, periods + window))
+        return analytics.series(frame, period, end_date, periods, window, group)
+
+    return _memoized(request, db, current_user.id, ("series", period, group, periods, window, end_date), compute)
+
+
+@router.get("/analytics/forecast", response_model=Forecast)
+def get_forecast(
+    request: Request,
+    horizon: int = Query(3, gt=0, le=12, description="Months to forecast"),
+    history: int = Query(24, ge=3, le=60, description="Months of history to forecast from; 24 or more enables the seasonal forecast"),
+    window: int = Query(3, gt=0, le=12, description="Months averaged when there is too little history for the seasonal forecast"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Last month of history in YYYY-MM format (default: last month)"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Forecast income, spend and spend per category for the coming months.
+
+    The current month is still incomplete, so by default history ends with
+    the month before and the forecast starts with this one.
+    """
+    from utils import analytics
+
+    end_date = _end_date(end) if end else date.today().replace(day=1) - date.resolution
+
+    def compute():
+        frame = analytics.load(db, current_user.id, analytics.history_start("month", end_date, history))
+        return analytics.forecast(frame, end_date, history, horizon, window)
+
+    return _memoized(request, db, current_user.id, ("forecast", horizon, history, window, end_date), compute)
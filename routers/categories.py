@@ -1,28 +1,80 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from db.database import get_db
 from models.category import DbCategory
-from models.expense import DbExpense
+from models.reference_version import DbReferenceVersion
+from models.rollup import DbExpenseRollup
+from models.user import DbUser
 from schemas.category import Category as CategorySchema, CategoryWithExpense
-from typing import List
+from typing import List, Optional
+from datetime import date, datetime
+from utils.async_routes import async_version
+from utils.auth_token import get_current_user
+from utils.snapshot import Snapshot
+from config import settings
 
 router = APIRouter()
 
+# Triggers bump the categories counter in the transaction that writes a
+# category, so it moves once that write is committed, by whichever worker.
+# Reading it is one primary key lookup per request; clients revalidate every
+# time, since a category created from the expense form must show up straight
+# away, and a 304 costs no other query.
+categories_snapshot = Snapshot(
+    lambda db: db.execute(select(
+        DbCategory.id, DbCategory.name, DbCategory.icon, DbCategory.color, DbCategory.budget
+    )).all(),
+    CategorySchema,
+    cache_control="public, no-cache",
+    ttl=settings.REFERENCE_DATA_MAX_AGE,
+    version=lambda db: db.execute(
+        select(DbReferenceVersion.version).where(DbReferenceVersion.name == "categories")
+    ).scalar()
+)
+
 @router.get("/categories", response_model=List[CategorySchema])
-def get_categories(db: Session = Depends(get_db)):
-    categories = db.query(DbCategory).all()
-    return categories
+def get_categories(request: Request, db: Session = Depends(get_db)):
+    return categories_snapshot.response(request, db)
+
+
+def category_expense_query(user_id: int, month: Optional[date] = None):
+    """Every category with the user's spend on it, all time or for one month; shared with db/explain.py."""
+    # Spend comes from the monthly rollup, so this reads one row per category
+    # and month instead of scanning the expense history
+    spend = select(
+        DbExpenseRollup.category_id,
+        func.sum(DbExpenseRollup.total).label("expense")
+    ).where(DbExpenseRollup.user_id == user_id)
+    if month:
+        spend = spend.where(DbExpenseRollup.month == month)
+    spend = spend.group_by(DbExpenseRollup.category_id).subquery()
+
+    return select(DbCategory, func.coalesce(spend.c.expense, 0).label("expense")).outerjoin(
+        spend, spend.c.category_id == DbCategory.id
+    )
 
 
 @router.get("/category_expense",response_model=List[CategoryWithExpense])
-def get_category_expenses(db: Session = Depends(get_db)):
-    query = db.query(DbCategory,
-    func.coalesce(func.sum(DbExpense.amount), 0).label("expense")).outerjoin(DbExpense).group_by(DbCategory.id)
+def get_category_expenses(
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month in YYYY-MM format (default: all time)"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    return _category_expenses(db.execute(_category_expense_query(current_user.id, month)).all())
+
+
+@async_version(get_category_expenses)
+async def get_category_expenses_async(month, db: AsyncSession, current_user: DbUser):
+    return _category_expenses((await db.execute(_category_expense_query(current_user.id, month))).all())
+
+
+def _category_expense_query(user_id: int, month: Optional[str]):
+    return category_expense_query(user_id, datetime.strptime(month, "%Y-%m").date() if month else None)
 
-    results = query.all()
-    print(results)
 
+def _category_expenses(results) -> list:
     categories = []
     for category, expense in results:
         categories.append({
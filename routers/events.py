@@ -0,0 +1,65 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from db.database import get_db
+from models.user import DbUser
+from utils.auth_token import get_current_user
+from utils.events import TooManySubscriptions, format_event, get_broker
+from config import settings
+
+router = APIRouter()
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def stream_events(
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Server-sent events for the user's budget, pushed as expense and income writes commit.
+
+    - `category_spend`: a category's spend for a month changed (`spent` is the new total)
+    - `budget_exceeded`: that change took the month's spend over the category budget
+    - `income`: income for a month changed (`received` is the new total)
+    - `resync`: the stream fell behind and dropped events; reload the dashboard
+    """
+    # The stream outlives the request's session; give its connection back to the pool now
+    db.close()
+    stream = _stream(get_broker(), current_user.id)
+    # Run the stream up to its first line here, so it is registered with the
+    # broker (and refused if over the limit) before the response starts
+    try:
+        connected = await stream.__anext__()
+    except TooManySubscriptions:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open event streams"
+        )
+
+    async def resume():
+        try:
+            yield connected
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        resume(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _stream(broker, user_id: int):
+    async with broker.subscribe(user_id, settings.EVENTS_MAX_STREAMS_PER_USER) as subscription:
+        yield ": connected\n\n"
+        # Runs until the client goes away and Starlette cancels the response
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
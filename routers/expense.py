@@ -1,113 +1,242 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import extract, func, select, tuple_
 from db.database import get_db
+from db.lookups import find_or_create_category, find_or_create_payment_mode
+from db import rollups
+from db.sync import next_version
+from db.search import SearchMode, search_index
 from models.expense import DbExpense
 from models.category import DbCategory
 from models.payment_mode import DbPaymentMode
 from models.user import DbUser
-from schemas.expense import Expense as ExpenseSchema, ExpenseCreate, ExpenseUpdate
-from typing import List, Optional
-from datetime import datetime
-import pandas as pd
+from schemas.expense import Expense as ExpenseSchema, ExpenseCreate, ExpenseUpdate, ExpenseImportRow, ExpenseImportResult
+from typing import List, Literal, Optional
+from datetime import date, datetime
 from fastapi.responses import StreamingResponse
+from utils import events
+from utils.async_routes import async_version
 from utils.auth_token import get_current_user
+from utils.export import iter_batches, iter_csv, iter_gzip
+from utils.expense_import import import_expenses, iter_csv_rows, iter_ndjson_rows, read_json_array
+from utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from utils.responses import FastJSONResponse
 from calendar import monthrange
 
 router = APIRouter()
 
+# Largest page GET /expense serves; db/explain.py checks the plan at this size
+MAX_PAGE_SIZE = 100
 
-@router.get("/expense", response_model=List[ExpenseSchema])
-def get_expenses(
-    category: Optional[str] = Query(None, min_length=1, description="Category name (case-sensitive partial match)"),
-    recurring: Optional[bool] = Query(None, description="Filter by recurring status: true or false"),
-    month: Optional[str] = Query(None, regex=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month in YYYY-MM format"),
-    search: Optional[str] = Query(None, min_length=1, description="Search expense notes (case-insensitive, partial match)"),
-    page: int = Query(1, gt=0, description="Pagination: page number (starting from 1)"),
-    db: Session = Depends(get_db),
-    current_user: DbUser = Depends(get_current_user)
+
+def expense_select():
+    """The columns of the Expense schema, with its category and payment mode joined in."""
+    return select(
+        DbExpense.id, DbExpense.amount, DbExpense.date, DbExpense.note, DbExpense.recurring,
+        DbCategory.id, DbCategory.name, DbCategory.icon, DbCategory.color, DbCategory.budget,
+        DbPaymentMode.id, DbPaymentMode.name, DbPaymentMode.icon, DbPaymentMode.color,
+    ).outerjoin(DbCategory, DbExpense.category_id == DbCategory.id).outerjoin(
+        DbPaymentMode, DbExpense.payment_mode_id == DbPaymentMode.id
+    )
+
+
+def expense_dict(row) -> dict:
+    """A row of expense_select() in the shape of the Expense schema."""
+    (id, amount, day, note, recurring, category_id, category_name, category_icon, category_color,
+     budget, payment_mode_id, payment_mode_name, payment_mode_icon, payment_mode_color) = row
+    return {
+        # The schema declares an integer amount over a float column
+        "amount": int(amount) if amount.is_integer() else amount,
+        "date": day.isoformat(),
+        "note": note,
+        "recurring": bool(recurring),
+        "category": None if category_id is None else {
+            "name": category_name, "icon": category_icon, "color": category_color,
+            "budget": 0.0 if budget is None else budget,
+        },
+        "paymentMode": None if payment_mode_id is None else {
+            "name": payment_mode_name, "icon": payment_mode_icon, "color": payment_mode_color,
+        },
+        "id": id,
+    }
+
+
+def expense_list_query(
+    db: Session,
+    user_id: int,
+    category: Optional[str] = None,
+    recurring: Optional[bool] = None,
+    month: Optional[str] = None,
+    search: Optional[str] = None,
+    match: SearchMode = "substring",
+    order: Literal["date", "relevance"] = "date",
+    cursor: Optional[str] = None
 ):
-    query = db.query(DbExpense).filter(DbExpense.user_id == current_user.id)
+    """The GET /expense statement before paging, and whether it is ordered by (date, id).
+
+    Shared with db/explain.py, which checks its plan uses the indexes.
+    """
+    # Plain rows with the category and payment mode joined in, turned straight
+    # into the response shape: no ORM instances and no response model pass
+    query = expense_select().where(DbExpense.user_id == user_id, DbExpense.deleted_at.is_(None))
+    index = search_index(db.get_bind().dialect.name)
 
     # Apply filters
     if category and category.strip():
-       query = query.filter(DbExpense.category.has(DbCategory.name.ilike(f"%{category.strip()}%")))
+        categories = index.matches(DbCategory.name, category.strip()).subquery()
+        query = query.where(DbExpense.category_id.in_(select(categories.c.id)))
 
     if recurring is not None:
-        query = query.filter(DbExpense.recurring == recurring)
+        query = query.where(DbExpense.recurring == recurring)
 
     if month:
         date = datetime.strptime(month, '%Y-%m')
         start_date = date.replace(day=1)
         last_day = monthrange(date.year, date.month)[1]
         end_date = date.replace(day=last_day)
-        query = query.filter(DbExpense.date.between(start_date, end_date))
+        query = query.where(DbExpense.date.between(start_date, end_date))
 
-    if search and search.strip():
-        query = query.filter(DbExpense.note.ilike(f"%{search.strip()}%"))
+    # Sort by most recent date, id breaks ties so the order is stable
+    order_by = [DbExpense.date.desc(), DbExpense.id.desc()]
 
-    # Sort by most recent date
-    query = query.order_by(DbExpense.date.desc())
+    if search and search.strip():
+        matches = index.matches(DbExpense.note, search.strip(), match).subquery()
+        query = query.join(matches, matches.c.id == DbExpense.id)
+        if order == "relevance":
+            order_by.insert(0, matches.c.score.desc())
 
-    # Pagination
-    limit = 10
-    offset = (page - 1) * limit
-    expenses = query.offset(offset).limit(limit).all()
+    # Seek past the cursor row
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.where(tuple_(DbExpense.date, DbExpense.id) < tuple_(last_date, last_id))
 
-    return expenses
+    return query.order_by(*order_by), len(order_by) == 2
 
 
-@router.post("/expense", response_model=ExpenseSchema, status_code=201)
-def create_expense(
-    expense: ExpenseCreate,
+@router.get("/expense", response_model=List[ExpenseSchema])
+def get_expenses(
+    category: Optional[str] = Query(None, min_length=1, description="Category name (case-sensitive partial match)"),
+    recurring: Optional[bool] = Query(None, description="Filter by recurring status: true or false"),
+    month: Optional[str] = Query(None, regex=r"^\d{4}-(0[1-9]|1[0-2])$", description="Month in YYYY-MM format"),
+    search: Optional[str] = Query(None, min_length=1, description="Search expense notes (case-insensitive, partial match)"),
+    match: SearchMode = Query("substring", description="How search matches notes: substring, prefix (start of a word) or fuzzy (typo tolerant)"),
+    order: Literal["date", "relevance"] = Query("date", description="Sort by most recent date, or by search relevance"),
+    page: int = Query(1, gt=0, description="Pagination: page number (starting from 1)"),
+    cursor: Optional[str] = Query(None, min_length=1, description=f"Keyset pagination: value of the {NEXT_CURSOR_HEADER} header from the previous page. Takes precedence over page"),
+    limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE, description="Pagination: page size"),
     db: Session = Depends(get_db),
     current_user: DbUser = Depends(get_current_user)
 ):
-    # First, find or create the category
-    category = db.query(DbCategory).filter(
-        DbCategory.name == expense.category.name,
-        DbCategory.icon == expense.category.icon,
-        DbCategory.color == expense.category.color
-    ).first()
+    query, by_date = _expense_page_query(
+        db, current_user.id, category, recurring, month, search, match, order, page, cursor, limit
+    )
+    return _expense_page(db.execute(query).all(), limit, by_date)
 
-    if not category:
-        category = DbCategory(
-            name=expense.category.name,
-            icon=expense.category.icon,
-            color=expense.category.color,
-            budget=expense.category.budget  # Include budget
-        )
-        db.add(category)
-        db.flush()
 
-    print(expense,"PaymentMode")
+@async_version(get_expenses)
+async def get_expenses_async(
+    category, recurring, month, search, match, order, page, cursor, limit,
+    db: AsyncSession, current_user: DbUser
+):
+    query, by_date = _expense_page_query(
+        db, current_user.id, category, recurring, month, search, match, order, page, cursor, limit
+    )
+    return _expense_page((await db.execute(query)).all(), limit, by_date)
 
-    paymentMode = db.query(DbPaymentMode).filter(
-        DbPaymentMode.name == expense.paymentMode.name,
-        DbPaymentMode.icon == expense.paymentMode.icon,
-        DbPaymentMode.color == expense.paymentMode.color
-    ).first()
 
-    if not paymentMode:
-        paymentMode = DbPaymentMode(**expense.paymentMode.model_dump())
-        db.add(paymentMode)
-        db.flush()
+def _expense_page_query(db, user_id, category, recurring, month, search, match, order, page, cursor, limit):
+    if cursor and order == "relevance":
+        raise HTTPException(status_code=400, detail="Cursor pagination requires order=date")
+
+    query, by_date = expense_list_query(db, user_id, category, recurring, month, search, match, order, cursor)
+    # Pagination: the cursor has already been sought past; otherwise fall back to offset paging
+    if not cursor:
+        query = query.offset((page - 1) * limit)
+    # Fetch one extra row to know whether another page exists
+    return query.limit(limit + 1), by_date
+
+
+def _expense_page(rows, limit: int, by_date: bool) -> FastJSONResponse:
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        # A relevance-ordered page cannot be continued by date
+        if by_date:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last[2], last[0])
+
+    return FastJSONResponse([expense_dict(row) for row in rows], headers=headers)
+
+
+@router.post("/expense", response_model=ExpenseSchema, status_code=201)
+def create_expense(
+    expense: ExpenseCreate,
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    # Find or create the category and payment mode (served from cache when known)
+    category_id = find_or_create_category(db, expense.category.model_dump())
+    payment_mode_id = find_or_create_payment_mode(db, expense.paymentMode.model_dump())
 
     # Create the expense with the found/created category and payment mode
     expense_data = expense.model_dump(exclude={'category', 'paymentMode'})
     db_expense = DbExpense(
         **expense_data,
-        category_id=category.id,
-        payment_mode_id=paymentMode.id,
-        user_id=current_user.id
+        category_id=category_id,
+        payment_mode_id=payment_mode_id,
+        user_id=current_user.id,
+        version=next_version(db, current_user.id)
     )
 
     db.add(db_expense)
+    rollups.add_expense(db, current_user.id, db_expense.date, category_id, db_expense.amount)
+    events.expense_changes(db, current_user.id, [(db_expense.date, category_id, db_expense.amount)])
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
 
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/jsonl"}
+CSV_EXTENSIONS = (".csv",)
+CSV_CONTENT_TYPES = {"text/csv", "application/csv", "application/vnd.ms-excel"}
+
+
+@router.post("/expense/import", response_model=ExpenseImportResult)
+def import_expenses_file(
+    file: UploadFile = File(..., description="CSV with the /getCSV columns (category and paymentMode by name), or NDJSON with one expense per line"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    # Clients may send no filename, so the content type decides when the extension cannot
+    name = (file.filename or "").lower()
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    if name.endswith(NDJSON_EXTENSIONS) or content_type in NDJSON_CONTENT_TYPES:
+        return import_expenses(db, current_user.id, iter_ndjson_rows(file.file), ExpenseCreate.model_validate_json)
+    if name.endswith(CSV_EXTENSIONS) or content_type in CSV_CONTENT_TYPES:
+        return import_expenses(db, current_user.id, iter_csv_rows(file.file), ExpenseImportRow.model_validate)
+    raise HTTPException(status_code=400, detail="Unsupported file: upload a .csv or .ndjson file")
+
+
+@router.post(
+    "/expense/import/json",
+    response_model=ExpenseImportResult,
+    description="Array of expenses in the POST /expense format, up to IMPORT_JSON_MAX_BYTES; "
+                "use /expense/import for larger files.",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": {
+        "type": "array", "items": {"$ref": "#/components/schemas/ExpenseCreate"}
+    }}}}}
+)
+def import_expenses_json(
+    expenses: list = Depends(read_json_array),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    # Items are validated one by one so a bad row is reported instead of failing the request
+    return import_expenses(db, current_user.id, expenses, ExpenseCreate.model_validate)
+
+
 @router.delete("/expense/{expense_id}")
 def delete_expense(
     expense_id: int,
@@ -116,11 +245,16 @@ def delete_expense(
 ):
     expense = db.query(DbExpense).filter(
         DbExpense.id == expense_id,
-        DbExpense.user_id == current_user.id
+        DbExpense.user_id == current_user.id,
+        DbExpense.deleted_at.is_(None)
     ).first()
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
-    db.delete(expense)
+    rollups.add_expense(db, current_user.id, expense.date, expense.category_id, -expense.amount, -1)
+    events.expense_changes(db, current_user.id, [(expense.date, expense.category_id, -expense.amount)])
+    # Kept as a tombstone so /sync can tell clients about the delete
+    expense.deleted_at = func.now()
+    expense.version = next_version(db, current_user.id)
     db.commit()
     return {"message": "Expense deleted"}
 
@@ -134,83 +268,98 @@ def update_expense(
 ):
     expense = db.query(DbExpense).filter(
         DbExpense.id == expense_id,
-        DbExpense.user_id == current_user.id
+        DbExpense.user_id == current_user.id,
+        DbExpense.deleted_at.is_(None)
     ).first()
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
 
     update_data = expense_update.model_dump(exclude_unset=True)
 
+    # Take the old values out of the rollup; the new ones go back in below
+    rollups.add_expense(db, current_user.id, expense.date, expense.category_id, -expense.amount, -1)
+    removed = (expense.date, expense.category_id, -expense.amount)
+
     # Handle category update if provided
+    # (dumped in full: exclude_unset would also drop defaults such as budget)
     if 'category' in update_data:
-        category_data = update_data.pop('category')
-        category = db.query(DbCategory).filter(
-            DbCategory.name == category_data['name'],
-            DbCategory.icon == category_data['icon'],
-            DbCategory.color == category_data.get('color')
-        ).first()
-
-        if not category:
-            category = DbCategory(**category_data)
-            db.add(category)
-            db.flush()
-
-        expense.category_id = category.id
+        update_data.pop('category')
+        expense.category_id = find_or_create_category(db, expense_update.category.model_dump())
 
     # Handle payment mode update if provided
     if 'paymentMode' in update_data:
-        payment_data = update_data.pop('paymentMode')
-        paymentMode = db.query(DbPaymentMode).filter(
-            DbPaymentMode.name == payment_data['name'],
-            DbPaymentMode.icon == payment_data['icon'],
-            DbPaymentMode.color == payment_data.get('color')
-        ).first()
-
-        if not paymentMode:
-            paymentMode = DbPaymentMode(**payment_data)
-            db.add(paymentMode)
-            db.flush()
-
-        expense.paymentMode_id = paymentMode.id
+        update_data.pop('paymentMode')
+        expense.payment_mode_id = find_or_create_payment_mode(db, expense_update.paymentMode.model_dump())
 
     # Update other fields
     for field, value in update_data.items():
         setattr(expense, field, value)
 
+    rollups.add_expense(db, current_user.id, expense.date, expense.category_id, expense.amount)
+    events.expense_changes(db, current_user.id, [removed, (expense.date, expense.category_id, expense.amount)])
+    expense.version = next_version(db, current_user.id)
     db.commit()
     db.refresh(expense)
     return expense
 
 
+def expense_csv_query(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None
+):
+    """The GET /getCSV statement; shared with db/explain.py."""
+    stmt = select(
+        DbExpense.id,
+        DbExpense.amount,
+        DbExpense.date,
+        DbExpense.note,
+        DbExpense.recurring,
+        DbCategory.name.label("category"),
+        DbPaymentMode.name.label("paymentMode")
+    ).outerjoin(DbCategory, DbExpense.category_id == DbCategory.id).outerjoin(
+        DbPaymentMode, DbExpense.payment_mode_id == DbPaymentMode.id
+    ).where(
+        DbExpense.user_id == user_id,
+        DbExpense.deleted_at.is_(None)
+    ).order_by(DbExpense.date.desc(), DbExpense.id.desc())
+
+    if start_date:
+        stmt = stmt.where(DbExpense.date >= start_date)
+    if end_date:
+        stmt = stmt.where(DbExpense.date <= end_date)
+    if category and category.strip():
+        index = search_index(db.get_bind().dialect.name)
+        categories = index.matches(DbCategory.name, category.strip()).subquery()
+        stmt = stmt.where(DbExpense.category_id.in_(select(categories.c.id)))
+    return stmt
+
+
 @router.get("/getCSV")
 def get_expenses_csv(
+    start_date: Optional[date] = Query(None, description="Only export expenses on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only export expenses on or before this date"),
+    category: Optional[str] = Query(None, min_length=1, description="Category name (case-insensitive partial match)"),
+    gzip: bool = Query(False, description="Compress the CSV on the fly"),
     db: Session = Depends(get_db),
     current_user: DbUser = Depends(get_current_user)
 ):
-    expenses = db.query(DbExpense).filter(
-        DbExpense.user_id == current_user.id
-    ).order_by(DbExpense.date.desc()).all()
-
-    # Convert to DataFrame
-    expense_data = [{
-        'id': expense.id,
-        'amount': expense.amount,
-        'date': expense.date,
-        'note': expense.note,
-        'recurring': expense.recurring,
-        'category': expense.category.name if expense.category else None,
-        'paymentMode': expense.paymentMode.name if expense.paymentMode else None
-    } for expense in expenses]
-
-    # Create CSV
-    def iter_csv():
-        df = pd.DataFrame(expense_data)
-        yield df.to_csv(index=False)
-
+    stmt = expense_csv_query(db, current_user.id, start_date, end_date, category)
+
+    # Encode batch by batch straight off the cursor, so the first bytes go out
+    # before the query has finished and memory does not grow with the account
+    chunks = iter_csv(stmt.selected_columns.keys(), iter_batches(stmt))
+    filename = f"expenses_{datetime.now().strftime('%Y%m%d')}.csv"
+    if gzip:
+        return StreamingResponse(
+            iter_gzip(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"}
+        )
     return StreamingResponse(
-        iter_csv(),
+        chunks,
         media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=expenses_{datetime.now().strftime('%Y%m%d')}.csv"
-        }
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
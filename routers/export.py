@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.category import DbCategory
+from models.payment_mode import DbPaymentMode
+from models.user import DbUser
+from typing import Literal, Optional
+from datetime import date, datetime
+from importlib.util import find_spec
+from utils.auth_token import get_current_user
+from utils.export import iter_batches, iter_csv, iter_ndjson, iter_parquet, iter_arrow, iter_gzip
+
+router = APIRouter()
+
+# column name -> (SQL expression, export type, outer join needed to reach it)
+EXPORT_COLUMNS = {
+    "expenses": (DbExpense, {
+        "id": (DbExpense.id, "int", None),
+        "amount": (DbExpense.amount, "float", None),
+        "date": (DbExpense.date, "date", None),
+        "note": (DbExpense.note, "string", None),
+        "recurring": (DbExpense.recurring, "bool", None),
+        "category": (DbCategory.name, "category", (DbCategory, DbExpense.category_id == DbCategory.id)),
+        "paymentMode": (DbPaymentMode.name, "category", (DbPaymentMode, DbExpense.payment_mode_id == DbPaymentMode.id)),
+    }),
+    "incomes": (DbIncome, {
+        "id": (DbIncome.id, "int", None),
+        "amount": (DbIncome.amount, "float", None),
+        "date": (DbIncome.date, "date", None),
+        "source": (DbIncome.source, "string", None),
+        "is_recurring": (DbIncome.is_recurring, "bool", None),
+    }),
+}
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+@router.get("/export/{resource}")
+def export(
+    resource: Literal["expenses", "incomes"],
+    format: Literal["csv", "ndjson", "parquet", "arrow"] = Query("csv", description="Output format"),
+    columns: Optional[str] = Query(None, min_length=1, description="Comma-separated columns to include (default: all)"),
+    start_date: Optional[date] = Query(None, description="Only export rows on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only export rows on or before this date"),
+    gzip: bool = Query(False, description="Compress the output on the fly"),
+    current_user: DbUser = Depends(get_current_user)
+):
+    model, available = EXPORT_COLUMNS[resource]
+
+    names = list(dict.fromkeys(name.strip() for name in columns.split(","))) if columns else list(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown columns {unknown}. Available: {list(available)}"
+        )
+
+    if format in ("parquet", "arrow") and find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail=f"{format} export requires pyarrow")
+
+    # Project only the requested columns, joining lookup tables only when needed
+    stmt = select(*(available[name][0].label(name) for name in names)).select_from(model)
+    for name in names:
+        join = available[name][2]
+        if join:
+            stmt = stmt.outerjoin(*join)
+    stmt = stmt.where(model.user_id == current_user.id, model.deleted_at.is_(None)).order_by(model.date.desc(), model.id.desc())
+
+    if start_date:
+        stmt = stmt.where(model.date >= start_date)
+    if end_date:
+        stmt = stmt.where(model.date <= end_date)
+
+    batches = iter_batches(stmt)
+    if format == "csv":
+        chunks = iter_csv(names, batches)
+    elif format == "ndjson":
+        chunks = iter_ndjson(names, batches)
+    else:
+        types = {name: available[name][1] for name in names}
+        chunks = (iter_parquet if format == "parquet" else iter_arrow)(types, batches)
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{resource}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    if gzip:
+        chunks = iter_gzip(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
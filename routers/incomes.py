@@ -1,33 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException,Query
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import extract, func, select, tuple_
 from db.database import get_db
+from db.search import SearchMode, search_index
+from db import rollups
+from db.sync import next_version
 from models.income import DbIncome
 from models.user import DbUser
 from schemas.income import Income as IncomeSchema, IncomeCreate, IncomeUpdate
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
+from utils import events
+from utils.async_routes import async_version
 from utils.auth_token import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from utils.responses import FastJSONResponse
 from calendar import monthrange
 
 router = APIRouter()
 
-
-@router.get("/income", response_model=List[IncomeSchema])
-def get_incomes(
-    recurring: Optional[bool] = Query(None, description="Filter by recurring status: true or false."),
-    source: Optional[str] = Query(None, description="Filter by income source."),
-    month: Optional[str] = Query(None, description="Filter by month in YYYY-MM format (e.g. 2024-08)"),
-    top: Optional[int] = Query(None, gt=0, description="Limit results to top N by date."),
-    db: Session = Depends(get_db),
-    current_user: DbUser = Depends(get_current_user)
+# Largest page GET /income serves; db/explain.py checks the plan at this size
+MAX_PAGE_SIZE = 500
+
+INCOME_COLUMNS = (DbIncome.id, DbIncome.amount, DbIncome.date, DbIncome.source, DbIncome.is_recurring)
+
+
+def income_dict(row) -> dict:
+    """A row of INCOME_COLUMNS in the shape of the Income schema."""
+    id, amount, day, source, is_recurring = row
+    return {
+        "amount": float(amount),
+        "date": day.isoformat(),
+        "source": source,
+        "is_recurring": bool(is_recurring),
+        "id": id,
+    }
+
+
+def income_list_query(
+    db: Session,
+    user_id: int,
+    recurring: Optional[bool] = None,
+    source: Optional[str] = None,
+    match: SearchMode = "substring",
+    order: Literal["date", "relevance"] = "date",
+    month: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
-    query = db.query(DbIncome).filter(DbIncome.user_id == current_user.id)
+    """The GET /income statement before paging, and whether it is ordered by (date, id).
+
+    Shared with db/explain.py, which checks its plan uses the indexes.
+    """
+    query = select(*INCOME_COLUMNS).where(DbIncome.user_id == user_id, DbIncome.deleted_at.is_(None))
 
     if recurring is not None:
-        query = query.filter(DbIncome.is_recurring == recurring)
+        query = query.where(DbIncome.is_recurring == recurring)
+    order_by = [DbIncome.date.desc(), DbIncome.id.desc()]
     if source and source.strip():
-        query = query.filter(DbIncome.source.ilike(f"%{source}%"))
+        index = search_index(db.get_bind().dialect.name)
+        matches = index.matches(DbIncome.source, source.strip(), match).subquery()
+        query = query.join(matches, matches.c.id == DbIncome.id)
+        if order == "relevance":
+            order_by.insert(0, matches.c.score.desc())
     if month:
         try:
             date = datetime.strptime(month, "%Y-%m")
@@ -36,17 +71,73 @@ def get_incomes(
             # Last day of month
             last_day = monthrange(date.year, date.month)[1]
             end_date = date.replace(day=last_day)
-            query = query.filter(DbIncome.date.between(start_date, end_date))
+            query = query.where(DbIncome.date.between(start_date, end_date))
         except ValueError:
             raise HTTPException(
                 status_code=400, detail="Invalid month format. Use YYYY-MM")
 
-    query = query.order_by(DbIncome.date.desc())
+    # Seek past the cursor row
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.where(tuple_(DbIncome.date, DbIncome.id) < tuple_(last_date, last_id))
+
+    return query.order_by(*order_by), len(order_by) == 2
+
+
+@router.get("/income", response_model=List[IncomeSchema])
+def get_incomes(
+    recurring: Optional[bool] = Query(None, description="Filter by recurring status: true or false."),
+    source: Optional[str] = Query(None, description="Filter by income source."),
+    match: SearchMode = Query("substring", description="How source matches: substring, prefix (start of a word) or fuzzy (typo tolerant)."),
+    order: Literal["date", "relevance"] = Query("date", description="Sort by most recent date, or by source match relevance."),
+    month: Optional[str] = Query(None, description="Filter by month in YYYY-MM format (e.g. 2024-08)"),
+    top: Optional[int] = Query(None, gt=0, deprecated=True, description="Return only the top N by date, without pagination."),
+    cursor: Optional[str] = Query(None, min_length=1, description=f"Keyset pagination: value of the {NEXT_CURSOR_HEADER} header from the previous page."),
+    limit: int = Query(100, gt=0, le=MAX_PAGE_SIZE, description="Pagination: page size"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    query, page_size, by_date = _income_page_query(
+        db, current_user.id, recurring, source, match, order, month, top, cursor, limit
+    )
+    return _income_page(db.execute(query).all(), page_size, by_date)
+
+
+@async_version(get_incomes)
+async def get_incomes_async(
+    recurring, source, match, order, month, top, cursor, limit,
+    db: AsyncSession, current_user: DbUser
+):
+    query, page_size, by_date = _income_page_query(
+        db, current_user.id, recurring, source, match, order, month, top, cursor, limit
+    )
+    return _income_page((await db.execute(query)).all(), page_size, by_date)
+
+
+def _income_page_query(db, user_id, recurring, source, match, order, month, top, cursor, limit):
+    """The statement for one page, the page size (None for `top`) and whether it is ordered by date."""
+    if cursor and order == "relevance":
+        raise HTTPException(status_code=400, detail="Cursor pagination requires order=date")
 
     if top:
-        query = query.limit(top)
+        query, _ = income_list_query(db, user_id, recurring, source, match, order, month)
+        return query.limit(top), None, False
+
+    # Fetch one extra row to know whether another page exists
+    query, by_date = income_list_query(db, user_id, recurring, source, match, order, month, cursor)
+    return query.limit(limit + 1), limit, by_date
+
+
+def _income_page(rows, limit: Optional[int], by_date: bool) -> FastJSONResponse:
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        # A relevance-ordered page cannot be continued by date
+        if by_date:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last[2], last[0])
 
-    return query.all()
+    return FastJSONResponse([income_dict(row) for row in rows], headers=headers)
 
 
 @router.post("/income", response_model=IncomeSchema, status_code=201)
@@ -55,8 +146,10 @@ def create_income(
     db: Session = Depends(get_db),
     current_user: DbUser = Depends(get_current_user)
 ):
-    db_income = DbIncome(**income.model_dump(), user_id=current_user.id)
+    db_income = DbIncome(**income.model_dump(), user_id=current_user.id, version=next_version(db, current_user.id))
     db.add(db_income)
+    rollups.add_income(db, current_user.id, db_income.date, db_income.source, db_income.amount)
+    events.income_changes(db, current_user.id, [(db_income.date, db_income.amount)])
     db.commit()
     db.refresh(db_income)
     return db_income
@@ -68,13 +161,26 @@ def get_income(
     db: Session = Depends(get_db),
     current_user: DbUser = Depends(get_current_user)
 ):
-    income = db.query(DbIncome).filter(
+    return _found(db.execute(_income_by_id(current_user.id, income_id)).first())
+
+
+@async_version(get_income)
+async def get_income_async(income_id, db: AsyncSession, current_user: DbUser):
+    return _found((await db.execute(_income_by_id(current_user.id, income_id))).first())
+
+
+def _income_by_id(user_id: int, income_id: int):
+    return select(*INCOME_COLUMNS).where(
         DbIncome.id == income_id,
-        DbIncome.user_id == current_user.id
-    ).first()
-    if not income:
+        DbIncome.user_id == user_id,
+        DbIncome.deleted_at.is_(None)
+    )
+
+
+def _found(row) -> FastJSONResponse:
+    if not row:
         raise HTTPException(status_code=404, detail="Income not found")
-    return income
+    return FastJSONResponse(income_dict(row))
 
 
 @router.patch("/income/{income_id}", response_model=IncomeSchema)
@@ -86,14 +192,21 @@ def update_income(
 ):
     db_income = db.query(DbIncome).filter(
         DbIncome.id == income_id,
-        DbIncome.user_id == current_user.id
+        DbIncome.user_id == current_user.id,
+        DbIncome.deleted_at.is_(None)
     ).first()
     if not db_income:
         raise HTTPException(status_code=404, detail="Income not found")
 
+    # Take the old values out of the rollup and put the new ones back in
+    rollups.add_income(db, current_user.id, db_income.date, db_income.source, -db_income.amount, -1)
+    removed = (db_income.date, -db_income.amount)
     update_data = income.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_income, field, value)
+    rollups.add_income(db, current_user.id, db_income.date, db_income.source, db_income.amount)
+    events.income_changes(db, current_user.id, [removed, (db_income.date, db_income.amount)])
+    db_income.version = next_version(db, current_user.id)
 
     db.commit()
     db.refresh(db_income)
@@ -108,11 +221,16 @@ def delete_income(
 ):
     income = db.query(DbIncome).filter(
         DbIncome.id == income_id,
-        DbIncome.user_id == current_user.id
+        DbIncome.user_id == current_user.id,
+        DbIncome.deleted_at.is_(None)
     ).first()
     if not income:
         raise HTTPException(status_code=404, detail="Income not found")
 
-    db.delete(income)
+    rollups.add_income(db, current_user.id, income.date, income.source, -income.amount, -1)
+    events.income_changes(db, current_user.id, [(income.date, -income.amount)])
+    # Kept as a tombstone so /sync can tell clients about the delete
+    income.deleted_at = func.now()
+    income.version = next_version(db, current_user.id)
     db.commit()
     return {"message": "Income deleted successfully"}
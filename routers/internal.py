@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from db import pool
+from db.lookups import category_cache, payment_mode_cache
+from utils.auth_token import claims_cache, principal_cache, require_internal_token
+
+# Operational data for this worker; off unless INTERNAL_TOKEN is set, then behind it
+router = APIRouter(prefix="/internal", dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """Hit/miss counters of this worker's in-process caches."""
+    return {
+        "auth_claims": claims_cache.stats(),
+        "auth_principals": principal_cache.stats(),
+        "categories": category_cache.stats(),
+        "payment_modes": payment_mode_cache.stats(),
+    }
+
+
+@router.get("/pool")
+def get_pool_stats():
+    """Connection pool occupancy, checkout wait and connect latency for this worker."""
+    return pool.stats()
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session, joinedload
+from datetime import date
+from typing import List
+from db.database import get_db
+from db.lookups import find_or_create_category, find_or_create_payment_mode
+from models.recurrence import DbRecurrenceRule
+from models.user import DbUser
+from schemas.recurrence import Recurrence as RecurrenceSchema, RecurrenceCreate
+from utils.auth_token import get_current_user
+from utils.recurrence import materialize_batch
+from config import settings
+
+router = APIRouter()
+
+
+@router.post("/recurring", response_model=RecurrenceSchema, status_code=201)
+def create_recurrence(
+    rule: RecurrenceCreate,
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Repeat an expense or income from start_date until end_date (or indefinitely).
+
+    Occurrences already due, including past ones when start_date is in the
+    past, are written straight away, up to RECURRENCE_CREATE_MAX_OCCURRENCES;
+    the scheduler writes any further ones and the rest as they fall due.
+    """
+    db_rule = DbRecurrenceRule(
+        **rule.model_dump(exclude={"category", "paymentMode"}),
+        user_id=current_user.id,
+        category_id=find_or_create_category(db, rule.category.model_dump()) if rule.category else None,
+        payment_mode_id=find_or_create_payment_mode(db, rule.paymentMode.model_dump()) if rule.paymentMode else None,
+        next_occurrence=0,
+        next_date=rule.start_date
+    )
+    db.add(db_rule)
+    db.flush()
+    materialize_batch(
+        db, date.today(), settings.RECURRENCE_CATCH_UP, rule_ids=[db_rule.id],
+        max_occurrences=settings.RECURRENCE_CREATE_MAX_OCCURRENCES
+    )
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+
+@router.get("/recurring", response_model=List[RecurrenceSchema])
+def get_recurrences(
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    return db.query(DbRecurrenceRule).options(
+        joinedload(DbRecurrenceRule.category), joinedload(DbRecurrenceRule.paymentMode)
+    ).filter(DbRecurrenceRule.user_id == current_user.id).order_by(DbRecurrenceRule.id).all()
+
+
+@router.delete("/recurring/{rule_id}")
+def stop_recurrence(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Stop writing new occurrences; the ones already written are kept."""
+    rule = db.query(DbRecurrenceRule).filter(
+        DbRecurrenceRule.id == rule_id,
+        DbRecurrenceRule.user_id == current_user.id
+    ).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Recurrence not found")
+    rule.active = False
+    db.commit()
+    return {"message": "Recurrence stopped"}
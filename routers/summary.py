@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, literal, null, select, union_all
+from calendar import monthrange
+from datetime import date, datetime
+from typing import Optional
+from db.database import get_db
+from db.rollups import month_start
+from models.category import DbCategory
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.user import DbUser
+from schemas.summary import Summary
+from utils.async_routes import async_version
+from utils.auth_token import get_current_user
+from utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+# Longest range one request may span
+MAX_MONTHS = 120
+
+
+def _month_key(value) -> str:
+    # SQLite gives the truncated date back as text, Postgres as a date
+    return (value if isinstance(value, str) else value.isoformat())[:7]
+
+
+def _months(start: date, end: date):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def summary_query(db: Session, user_id: int, start: date, last_day: date):
+    """Expense totals per (month, category) and income totals per month, as one statement.
+
+    Shared with db/explain.py, which checks its plan uses the indexes.
+    """
+    expense_month, income_month = month_start(db, DbExpense.date), month_start(db, DbIncome.date)
+    expenses = select(
+        expense_month.label("month"), literal("expense").label("kind"),
+        DbCategory.id.label("category_id"), DbCategory.name.label("category"), func.sum(DbExpense.amount).label("total")
+    ).outerjoin(DbCategory, DbExpense.category_id == DbCategory.id).where(
+        DbExpense.user_id == user_id,
+        DbExpense.deleted_at.is_(None),
+        DbExpense.date.between(start, last_day)
+    ).group_by(expense_month, DbCategory.id, DbCategory.name)
+    incomes = select(
+        income_month, literal("income"), null(), null(), func.sum(DbIncome.amount)
+    ).where(
+        DbIncome.user_id == user_id,
+        DbIncome.deleted_at.is_(None),
+        DbIncome.date.between(start, last_day)
+    ).group_by(income_month)
+    return union_all(expenses, incomes)
+
+
+@router.get("/summary", response_model=Summary)
+def get_summary(
+    from_: Optional[str] = Query(None, alias="from", pattern=MONTH_PATTERN, description="First month in YYYY-MM format (default: 11 months before `to`)"),
+    to: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month in YYYY-MM format (default: this month)"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Income, expense, net and spend per category for each month in the range.
+
+    Totals come from one grouped query over both tables, so clients no
+    longer download every income and expense to add them up. Months
+    without any rows are included with zero totals.
+    """
+    start, end, last_day = _summary_range(from_, to)
+    return _summary(start, end, db.execute(summary_query(db, current_user.id, start, last_day)))
+
+
+@async_version(get_summary)
+async def get_summary_async(from_, to, db: AsyncSession, current_user: DbUser):
+    start, end, last_day = _summary_range(from_, to)
+    return _summary(start, end, await db.execute(summary_query(db, current_user.id, start, last_day)))
+
+
+def _summary_range(from_: Optional[str], to: Optional[str]):
+    """First month, last month and last day of the requested range."""
+    end = datetime.strptime(to, "%Y-%m").date() if to else date.today().replace(day=1)
+    if from_:
+        start = datetime.strptime(from_, "%Y-%m").date()
+    else:
+        year, month = divmod(end.year * 12 + end.month - 1 - 11, 12)
+        start = date(year, month + 1, 1)
+    span = (end.year - start.year) * 12 + end.month - start.month + 1
+    if span < 1:
+        raise HTTPException(status_code=400, detail="`from` must not be after `to`")
+    if span > MAX_MONTHS:
+        raise HTTPException(status_code=400, detail=f"The range may span at most {MAX_MONTHS} months")
+    return start, end, end.replace(day=monthrange(end.year, end.month)[1])
+
+
+def _summary(start: date, end: date, rows) -> FastJSONResponse:
+    months = {
+        key: {"month": key, "income": 0.0, "expense": 0.0, "net": 0.0, "categories": []}
+        for key in _months(start, end)
+    }
+    for month, kind, category_id, category, total in rows:
+        summary = months[_month_key(month)]
+        summary[kind] += total
+        if kind == "expense":
+            summary["categories"].append({"id": category_id, "name": category, "total": total})
+
+    income = expense = 0.0
+    for summary in months.values():
+        summary["net"] = summary["income"] - summary["expense"]
+        summary["categories"].sort(key=lambda category: -category["total"])
+        income += summary["income"]
+        expense += summary["expense"]
+    return FastJSONResponse({
+        "months": list(months.values()),
+        "income": income,
+        "expense": expense,
+        "net": income - expense,
+    })
@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from db.database import get_db
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.user import DbUser
+from routers.expense import expense_dict, expense_select
+from routers.incomes import INCOME_COLUMNS, income_dict
+from schemas.sync import SyncBatch
+from typing import Optional
+from utils.async_routes import async_version
+from utils.auth_token import get_current_user
+from utils.pagination import encode_sync_token, decode_sync_token
+from utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+# Changes are sent in (version, kind, id) order; kind tells the two tables apart
+EXPENSE, INCOME = 0, 1
+# Largest batch GET /sync serves; db/explain.py checks the plan at this size
+MAX_BATCH_SIZE = 1000
+
+
+def _after(model, kind: int, since):
+    """Condition for the rows of `model` that sort after the `since` position."""
+    version, since_kind, row_id = since
+    if kind == since_kind:
+        return tuple_(model.version, model.id) > tuple_(version, row_id)
+    if kind > since_kind:
+        return model.version >= version
+    return model.version > version
+
+
+def sync_queries(user_id: int, since: Optional[str] = None):
+    """The /sync statements for each table, in change order; shared with db/explain.py."""
+    expenses = expense_select().add_columns(DbExpense.version, DbExpense.deleted_at).where(
+        DbExpense.user_id == user_id
+    )
+    incomes = select(*INCOME_COLUMNS, DbIncome.version, DbIncome.deleted_at).where(
+        DbIncome.user_id == user_id
+    )
+    if since:
+        position = decode_sync_token(since)
+        expenses = expenses.where(_after(DbExpense, EXPENSE, position))
+        incomes = incomes.where(_after(DbIncome, INCOME, position))
+    else:
+        expenses = expenses.where(DbExpense.deleted_at.is_(None))
+        incomes = incomes.where(DbIncome.deleted_at.is_(None))
+    return expenses.order_by(DbExpense.version, DbExpense.id), incomes.order_by(DbIncome.version, DbIncome.id)
+
+
+@router.get("/sync", response_model=SyncBatch)
+def sync(
+    since: Optional[str] = Query(None, min_length=1, description="The `next` token of the previous response. Omit for a full download"),
+    limit: int = Query(200, gt=0, le=MAX_BATCH_SIZE, description="Maximum number of changed rows to return"),
+    db: Session = Depends(get_db),
+    current_user: DbUser = Depends(get_current_user)
+):
+    """Expenses and incomes created, changed or deleted since the `since` token.
+
+    Every write stamps the row with the next value of the user's change
+    version, so the rows after a token are exactly what the client has not
+    seen. Repeat with the returned `next` token while `has_more` is true.
+    A full download (no token) leaves out rows that were already deleted.
+    """
+    expenses, incomes = sync_queries(current_user.id, since)
+    # Up to limit + 1 from each table is enough to fill the batch and know whether more remain
+    return _batch(since, limit, db.execute(expenses.limit(limit + 1)), db.execute(incomes.limit(limit + 1)))
+
+
+@async_version(sync)
+async def sync_async(since, limit, db: AsyncSession, current_user: DbUser):
+    expenses, incomes = sync_queries(current_user.id, since)
+    return _batch(
+        since, limit, await db.execute(expenses.limit(limit + 1)), await db.execute(incomes.limit(limit + 1))
+    )
+
+
+def _batch(since: Optional[str], limit: int, expense_rows, income_rows) -> FastJSONResponse:
+    changes = [
+        (row[-2], EXPENSE, row[0], row) for row in expense_rows
+    ] + [
+        (row[-2], INCOME, row[0], row) for row in income_rows
+    ]
+    changes.sort(key=lambda change: change[:3])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    batch = {"expenses": [], "incomes": [], "deleted": {"expenses": [], "incomes": []}}
+    for _, kind, row_id, row in changes:
+        name = "expenses" if kind == EXPENSE else "incomes"
+        if row[-1] is not None:
+            batch["deleted"][name].append(row_id)
+        elif kind == EXPENSE:
+            batch["expenses"].append(expense_dict(row[:-2]))
+        else:
+            batch["incomes"].append(income_dict(row[:-2]))
+
+    if changes:
+        batch["next"] = encode_sync_token(*changes[-1][:3])
+    else:
+        batch["next"] = since or encode_sync_token(-1, INCOME, 0)
+    batch["has_more"] = has_more
+    return FastJSONResponse(batch)
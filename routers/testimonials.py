@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from db.database import get_db
 from models.testimonial import DbTestimonial
 from schemas.testimonial import Testimonial as TestimonialSchema
 from typing import List
+from utils.snapshot import Snapshot
+from config import settings
 
 router = APIRouter()
 
+# Testimonials only change through db/seed.py, so the TTL alone keeps this fresh
+testimonials_snapshot = Snapshot(
+    lambda db: db.query(DbTestimonial).all(),
+    TestimonialSchema,
+    cache_control=f"public, max-age={settings.REFERENCE_DATA_MAX_AGE}",
+    ttl=settings.REFERENCE_DATA_MAX_AGE
+)
+
 @router.get("/testimonials", response_model=List[TestimonialSchema])
-def get_testimonials(db: Session = Depends(get_db)):
-    testimonials = db.query(DbTestimonial).all()
-    return testimonials
+def get_testimonials(request: Request, db: Session = Depends(get_db)):
+    return testimonials_snapshot.response(request, db)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from db.database import get_db
 from models.user import DbUser
 from schemas.user import UserCreate, UserVerify
-from utils.twilio_service import TwilioService
-from utils.hash import get_password_hash, verify_password
+from utils import outbox, password_service
+from utils.sms import generate_verification_code, verification_message
 from utils.auth_token import create_access_token
 from typing import Dict
 
@@ -13,12 +14,9 @@ router = APIRouter(
     prefix="/users",
     tags=["users"]
 )
-twilio_service = TwilioService()
 
 
-@router.post("/signup", response_model=Dict[str, str])
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if user already exists
+def check_available(db: Session, user: UserCreate):
     if db.query(DbUser).filter(DbUser.email == user.email).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,29 +29,32 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
             detail="Username already taken"
         )
 
+
+# signup and login are async so that waiting on the bcrypt worker pool does not
+# hold a threadpool thread; their blocking calls are pushed to the threadpool.
+@router.post("/signup", response_model=Dict[str, str])
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
+    # Check if user already exists
+    await run_in_threadpool(check_available, db, user)
+
     # Generate verification code
-    verification_code = twilio_service.generate_verification_code()
+    verification_code = generate_verification_code()
 
     # Create new user
     db_user = DbUser(
         email=user.email,
         username=user.username,
         phone_number=user.phone_number,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await password_service.hash_password(user.password),
         verification_code=verification_code
     )
 
-    # Send verification code
-    success,message = twilio_service.send_verification_code(
-        user.phone_number, verification_code)
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to send verification code {message}"
-        )
-
+    # Queue the verification code; it is sent by the outbox dispatcher once
+    # the user row is committed, so signup does not wait on Twilio
     db.add(db_user)
-    db.commit()
+    outbox.enqueue_sms(db, user.phone_number, verification_message(verification_code))
+    await run_in_threadpool(db.commit)
+    outbox.notify()
 
     return {"message": "Verification code sent to your phone number"}
 
@@ -89,15 +90,17 @@ def verify_user(verification: UserVerify, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Dict[str, str])
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(DbUser).filter(DbUser.username == form_data.username).first()
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(
+        db.query(DbUser).filter(DbUser.username == form_data.username).first)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username"
         )
 
-    if not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = await password_service.verify_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect  password"
@@ -112,7 +115,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     # Generate access token with username
     access_token = create_access_token(data={"sub": user.username})
 
-    return {
+    response = {
         "access_token": access_token,
         "token_type": "bearer",
         "username" : user.username,
@@ -120,3 +123,10 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         "user_email" : user.email
 
     }
+
+    # The stored hash uses another bcrypt cost; upgrade it while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
+
+    return response
@@ -1,5 +1,5 @@
 from schemas.category import Category, CategoryCreate, CategoryBase, CategoryWithExpense
-from schemas.expense import Expense, ExpenseCreate, ExpenseBase, ExpenseUpdate
+from schemas.expense import Expense, ExpenseCreate, ExpenseBase, ExpenseUpdate, ExpenseImportRow, ExpenseImportError, ExpenseImportResult
 from schemas.payment_mode import PaymentMode, PaymentModeCreate, PaymentModeBase
 from schemas.income import Income, IncomeCreate, IncomeBase, IncomeUpdate
 from schemas.testimonial import Testimonial, TestimonialCreate, TestimonialBase
@@ -7,6 +7,7 @@ from schemas.testimonial import Testimonial, TestimonialCreate, TestimonialBase
 __all__ = [
     'Category', 'CategoryCreate', 'CategoryBase', 'CategoryWithExpense',
     'Expense', 'ExpenseCreate', 'ExpenseBase', 'ExpenseUpdate',
+    'ExpenseImportRow', 'ExpenseImportError', 'ExpenseImportResult',
     'PaymentMode', 'PaymentModeCreate', 'PaymentModeBase',
     'Income', 'IncomeCreate', 'IncomeBase', 'IncomeUpdate',
     'Testimonial', 'TestimonialCreate', 'TestimonialBase'
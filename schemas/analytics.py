@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional
+
+
+class GroupSeries(BaseModel):
+    total: List[float]
+    rolling: List[float]
+    change: List[Optional[float]]
+
+
+class Series(BaseModel):
+    period: Literal["month", "week"]
+    # YYYY-MM for months, the Monday for weeks
+    labels: List[str]
+    income: List[float]
+    expense: List[float]
+    net: List[float]
+    # Share of income left after expenses; null when there was no income
+    savings_rate: List[Optional[float]]
+    expense_rolling: List[float]
+    expense_change: List[Optional[float]]
+    groups: Dict[str, GroupSeries]
+
+
+class Forecast(BaseModel):
+    method: Literal["seasonal", "moving_average"]
+    labels: List[str]
+    income: List[float]
+    expense: List[float]
+    net: List[float]
+    categories: Dict[str, List[float]]
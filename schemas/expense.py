@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from schemas.category import CategoryBase
 from schemas.payment_mode import PaymentModeBase
 
@@ -32,3 +32,20 @@ class Expense(ExpenseBase):
 
     class Config:
         from_attributes = True
+
+
+class ExpenseImportRow(ExpenseBase):
+    # Spreadsheet rows name an existing category / payment mode instead of nesting it
+    category: Optional[str] = None
+    paymentMode: Optional[str] = None
+
+
+class ExpenseImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ExpenseImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ExpenseImportError]
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field, model_validator
+from datetime import date
+from typing import Literal, Optional
+from schemas.category import CategoryBase
+from schemas.payment_mode import PaymentModeBase
+
+
+class RecurrenceBase(BaseModel):
+    kind: Literal["expense", "income"]
+    frequency: Literal["daily", "weekly", "monthly"] = "monthly"
+    # Every N days / weeks / months
+    interval: int = Field(1, ge=1, le=365)
+    start_date: date
+    end_date: Optional[date] = None
+    amount: float = Field(..., gt=0)
+    # The expense note, or the income source
+    note: str
+    # Expenses only
+    category: Optional[CategoryBase] = None
+    paymentMode: Optional[PaymentModeBase] = None
+
+
+class RecurrenceCreate(RecurrenceBase):
+    @model_validator(mode="after")
+    def check(self):
+        if self.end_date is not None and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        if self.kind == "expense" and not self.amount.is_integer():
+            # As for POST /expense, which takes an integer amount
+            raise ValueError("expense amounts must be whole numbers")
+        if self.kind == "income" and (self.category or self.paymentMode):
+            raise ValueError("category and paymentMode only apply to expenses")
+        return self
+
+
+class Recurrence(RecurrenceBase):
+    id: int
+    # Date of the next occurrence still to be written
+    next_date: date
+    active: bool
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class CategoryTotal(BaseModel):
+    # null for uncategorised expenses
+    id: Optional[int]
+    name: Optional[str]
+    total: float
+
+
+class MonthSummary(BaseModel):
+    month: str  # YYYY-MM
+    income: float
+    expense: float
+    net: float
+    categories: List[CategoryTotal]
+
+
+class Summary(BaseModel):
+    months: List[MonthSummary]
+    income: float
+    expense: float
+    net: float
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List
+from schemas.expense import Expense
+from schemas.income import Income
+
+
+class SyncDeleted(BaseModel):
+    expenses: List[int]
+    incomes: List[int]
+
+
+class SyncBatch(BaseModel):
+    expenses: List[Expense]
+    incomes: List[Income]
+    deleted: SyncDeleted
+    # Pass as `since` on the next call; unchanged when nothing was returned
+    next: str
+    has_more: bool
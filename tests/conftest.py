@@ -0,0 +1,125 @@
+"""Fixtures for the API tests.
+
+Every test session runs against a fresh SQLite database built by the
+migrations, with the background dispatcher and scheduler switched off.
+Tests create their own users, so they do not depend on each other's rows.
+"""
+import os
+import tempfile
+from datetime import date, timedelta
+from itertools import count
+
+_database = os.path.join(tempfile.mkdtemp(prefix="budget-buddy-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database}"
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "TWILIO_ACCOUNT_SID": "test",
+    "TWILIO_AUTH_TOKEN": "test",
+    "TWILIO_PHONE_NUMBER": "+10000000000",
+    "SMS_TRANSPORT": "fake",
+    "OUTBOX_DISPATCHER": "false",
+    "RECURRENCE_SCHEDULER": "false",
+    "BCRYPT_ROUNDS": "4",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from db import rollups  # noqa: E402
+from db.database import SessionLocal, engine  # noqa: E402
+from db.migrate import upgrade  # noqa: E402
+from db.sync import next_versions  # noqa: E402
+from models.category import DbCategory  # noqa: E402
+from models.expense import DbExpense  # noqa: E402
+from models.income import DbIncome  # noqa: E402
+from models.payment_mode import DbPaymentMode  # noqa: E402
+from models.user import DbUser  # noqa: E402
+from utils.auth_token import create_access_token  # noqa: E402
+
+_ids = count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    upgrade(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(db):
+    """A new verified user, with the bearer token header to act as them."""
+    n = next(_ids)
+    db_user = DbUser(
+        email=f"user{n}@example.com", username=f"user{n}", phone_number=f"+1{n:010d}",
+        hashed_password="x", is_active=True, is_verified=True
+    )
+    db.add(db_user)
+    db.commit()
+    db_user.headers = {"Authorization": f"Bearer {create_access_token({'sub': db_user.username})}"}
+    return db_user
+
+
+@pytest.fixture
+def category(db):
+    n = next(_ids)
+    db_category = DbCategory(name=f"Category {n}", icon="Tag", budget=1000, color="blue")
+    db.add(db_category)
+    db.commit()
+    return db_category
+
+
+@pytest.fixture
+def payment_mode(db):
+    n = next(_ids)
+    db_payment_mode = DbPaymentMode(name=f"Card {n}", icon="CreditCard", color="blue")
+    db.add(db_payment_mode)
+    db.commit()
+    return db_payment_mode
+
+
+@pytest.fixture
+def add_expenses(db):
+    """Insert `n` expenses for a user, a day apart from `start`, as one write like the bulk import."""
+    def add(user_id: int, n: int, category_id=None, payment_mode_id=None, start=date(2024, 1, 1), amount=10.0):
+        version = next_versions(db, [user_id])[user_id]
+        rows = [{
+            "amount": amount, "date": start + timedelta(days=i), "note": f"expense {i}", "recurring": False,
+            "category_id": category_id, "payment_mode_id": payment_mode_id, "user_id": user_id, "version": version,
+        } for i in range(n)]
+        db.execute(insert(DbExpense), rows)
+        rollups.add_expenses(db, rows)
+        db.commit()
+    return add
+
+
+@pytest.fixture
+def add_incomes(db):
+    def add(user_id: int, n: int, start=date(2024, 1, 1), amount=100.0):
+        version = next_versions(db, [user_id])[user_id]
+        rows = [{
+            "amount": amount, "date": start + timedelta(days=i), "source": "Salary", "is_recurring": False,
+            "user_id": user_id, "version": version,
+        } for i in range(n)]
+        db.execute(insert(DbIncome), rows)
+        rollups.add_incomes(db, rows)
+        db.commit()
+    return add
@@ -0,0 +1,93 @@
+"""Series and forecasts from /analytics against small histories with known answers."""
+from datetime import date
+
+
+def _month(user, add_expenses, category, year, month, amount):
+    add_expenses(user.id, 1, category_id=category.id, start=date(year, month, 1), amount=amount)
+
+
+def test_series_totals_rolling_means_changes_and_savings_rate(client, user, category, add_expenses, add_incomes):
+    add_expenses(user.id, 3, category_id=category.id, start=date(2024, 1, 10), amount=10.0)
+    _month(user, add_expenses, category, 2024, 2, 40.0)
+    add_incomes(user.id, 1, start=date(2024, 1, 1), amount=100.0)
+    add_incomes(user.id, 1, start=date(2024, 3, 1), amount=50.0)
+
+    response = client.get(
+        "/analytics/series", params={"periods": 3, "window": 2, "end": "2024-03"}, headers=user.headers
+    )
+
+    assert response.status_code == 200, response.text
+    series = response.json()
+    assert series["labels"] == ["2024-01", "2024-02", "2024-03"]
+    assert series["income"] == [100.0, 0.0, 50.0]
+    assert series["expense"] == [30.0, 40.0, 0.0]
+    assert series["net"] == [70.0, -40.0, 50.0]
+    # No income in February: no savings rate rather than a division by zero
+    assert series["savings_rate"] == [0.7, None, 1.0]
+    # The rolling means and changes reach back into December, which had no spend
+    assert series["expense_rolling"] == [15.0, 35.0, 20.0]
+    assert series["expense_change"] == [30.0, 10.0, -40.0]
+    assert series["groups"] == {category.name: {
+        "total": [30.0, 40.0, 0.0], "rolling": [15.0, 35.0, 20.0], "change": [30.0, 10.0, -40.0],
+    }}
+
+
+def test_weekly_series_labels_each_monday(client, user, category, add_expenses):
+    # Wednesday 2024-01-03 and Monday 2024-01-08
+    add_expenses(user.id, 1, category_id=category.id, start=date(2024, 1, 3), amount=5.0)
+    add_expenses(user.id, 1, category_id=category.id, start=date(2024, 1, 8), amount=7.0)
+
+    series = client.get(
+        "/analytics/series", params={"period": "week", "periods": 5, "end": "2024-01"}, headers=user.headers
+    ).json()
+
+    assert series["labels"] == ["2024-01-01", "2024-01-08", "2024-01-15", "2024-01-22", "2024-01-29"]
+    assert series["expense"] == [5.0, 7.0, 0.0, 0.0, 0.0]
+
+
+def test_forecast_uses_the_moving_average_with_short_history(client, user, category, add_expenses):
+    for month, amount in ((1, 30.0), (2, 60.0), (3, 90.0)):
+        _month(user, add_expenses, category, 2024, month, amount)
+
+    forecast = client.get(
+        "/analytics/forecast", params={"end": "2024-03", "history": 24, "horizon": 2, "window": 3},
+        headers=user.headers
+    ).json()
+
+    assert forecast["method"] == "moving_average"
+    assert forecast["labels"] == ["2024-04", "2024-05"]
+    assert forecast["expense"] == [60.0, 60.0]
+    assert forecast["income"] == [0.0, 0.0]
+    assert forecast["categories"] == {category.name: [60.0, 60.0]}
+
+
+def test_forecast_is_seasonal_with_two_years_and_clips_growth(client, user, category, add_expenses, add_incomes):
+    for month in range(1, 13):
+        _month(user, add_expenses, category, 2022, month, 10.0)
+        # Spend grows more than fivefold, with a February peak
+        _month(user, add_expenses, category, 2023, month, 80.0 if month == 2 else 50.0)
+        add_incomes(user.id, 1, start=date(2022, month, 1), amount=100.0)
+        # Income falls to a tenth
+        add_incomes(user.id, 1, start=date(2023, month, 1), amount=10.0)
+
+    forecast = client.get(
+        "/analytics/forecast", params={"end": "2023-12", "history": 24, "horizon": 2}, headers=user.headers
+    ).json()
+
+    assert forecast["method"] == "seasonal"
+    assert forecast["labels"] == ["2024-01", "2024-02"]
+    # Same month last year, scaled by growth clipped to at most double and at least half
+    assert forecast["expense"] == [100.0, 160.0]
+    assert forecast["income"] == [5.0, 5.0]
+    assert forecast["net"] == [-95.0, -155.0]
+
+
+def test_a_user_without_data_gets_empty_series_and_a_zero_forecast(client, user):
+    series = client.get("/analytics/series", params={"periods": 2, "end": "2024-02"}, headers=user.headers).json()
+    forecast = client.get("/analytics/forecast", params={"end": "2024-02", "horizon": 1}, headers=user.headers).json()
+
+    assert series["labels"] == ["2024-01", "2024-02"]
+    assert series["income"] == series["expense"] == series["net"] == [0.0, 0.0]
+    assert series["savings_rate"] == [None, None]
+    assert series["groups"] == {}
+    assert (forecast["method"], forecast["expense"], forecast["categories"]) == ("moving_average", [0.0], {})
@@ -0,0 +1,74 @@
+"""With DATABASE_ASYNC=true the hot reads are served by coroutines and answer as the sync app does.
+
+The setting is read when the app is imported, so the async app runs in a
+fresh interpreter against the same database.
+"""
+import json
+import os
+import subprocess
+import sys
+
+PROBE = """
+import inspect, json, sys
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from main import app
+
+def api_routes(routes):
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield route
+        elif hasattr(route, "original_router"):
+            # Routers included by reference
+            yield from api_routes(route.original_router.routes)
+
+paths, headers = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+endpoints = {
+    (route.path, method): inspect.iscoroutinefunction(route.endpoint)
+    for route in api_routes(app.routes) for method in route.methods
+}
+with TestClient(app) as client:
+    responses = [client.get(path, headers=headers) for path in paths]
+print(json.dumps({
+    "coroutines": {f"{method} {path}": value for (path, method), value in endpoints.items()},
+    "responses": [[r.status_code, r.json(), r.headers.get("x-next-cursor")] for r in responses],
+}))
+"""
+
+
+def _async_app(paths, headers):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(paths), json.dumps(headers)],
+        env={**os.environ, "DATABASE_ASYNC": "true"}, capture_output=True, text=True, timeout=60,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_async_app_serves_hot_reads_from_coroutines_with_the_same_responses(
+    client, user, category, add_expenses, add_incomes
+):
+    add_expenses(user.id, 15, category_id=category.id)
+    add_incomes(user.id, 3)
+    income_id = client.get("/income", headers=user.headers).json()[0]["id"]
+    paths = [
+        "/expense?limit=5", "/expense?month=2024-01&limit=100", "/income?limit=2", f"/income/{income_id}",
+        "/income/0", "/category_expense", "/summary?from=2024-01&to=2024-02", "/sync?limit=10",
+        "/expense?cursor=x&order=relevance",
+    ]
+    expected = []
+    for path in paths:
+        response = client.get(path, headers=user.headers)
+        expected.append([response.status_code, response.json(), response.headers.get("x-next-cursor")])
+
+    result = _async_app(paths, user.headers)
+
+    assert result["responses"] == expected
+    coroutines = result["coroutines"]
+    for route in ("GET /expense", "GET /income", "GET /income/{income_id}", "GET /category_expense",
+                  "GET /summary", "GET /sync"):
+        assert coroutines[route] is True, route
+    # Writes and CPU-heavy handlers stay on the threadpool
+    for route in ("POST /expense", "POST /expense/import", "GET /analytics/series", "POST /recurring"):
+        assert coroutines[route] is False, route
@@ -0,0 +1,66 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from config import settings
+from utils import password_service
+from utils.auth_token import principal_cache
+
+
+def test_password_change_evicts_cached_user(client, db, user):
+    assert client.get("/expense", headers=user.headers).status_code == 200
+    assert principal_cache.get(user.username) is not None
+
+    user.hashed_password = "changed"
+    db.flush()
+    # Not before the change is committed
+    assert principal_cache.get(user.username) is not None
+    db.commit()
+    assert principal_cache.get(user.username) is None
+
+
+def test_rolled_back_change_keeps_cached_user(client, db, user):
+    assert client.get("/expense", headers=user.headers).status_code == 200
+    user.hashed_password = "changed"
+    db.flush()
+    db.rollback()
+    assert principal_cache.get(user.username) is not None
+
+
+def test_deleted_user_is_rejected(client, db, user):
+    assert client.get("/expense", headers=user.headers).status_code == 200
+
+    db.delete(user)
+    db.commit()
+    assert client.get("/expense", headers=user.headers).status_code == 403
+
+
+def test_deactivated_user_is_rejected(client, db, user):
+    assert client.get("/expense", headers=user.headers).status_code == 200
+
+    user.is_active = False
+    db.commit()
+    assert client.get("/expense", headers=user.headers).status_code == 403
+
+
+@pytest.fixture
+def worker_pool():
+    yield
+    password_service.shutdown()
+
+
+def test_hash_and_verify_in_worker_processes(worker_pool, monkeypatch):
+    async def round_trip():
+        hashed = await password_service.hash_password("correct horse")
+        assert isinstance(password_service._get_executor(), ProcessPoolExecutor)
+        assert await password_service.verify_password("correct horse", hashed) == (True, None)
+        assert await password_service.verify_password("wrong horse", hashed) == (False, None)
+
+        # A changed cost comes back as a rehash with the new cost
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+        valid, new_hash = await password_service.verify_password("correct horse", hashed)
+        assert valid and new_hash.startswith("$2b$05$")
+        assert await password_service.verify_password("correct horse", new_hash) == (True, None)
+
+    asyncio.run(round_trip())
@@ -0,0 +1,86 @@
+"""Budget events: published once their transaction commits, with a bounded number of streams per user."""
+import asyncio
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from db import rollups
+from routers.events import stream_events
+from utils import events
+from utils.events import MemoryBroker, TooManySubscriptions
+
+
+@pytest.fixture
+def broker():
+    previous = events.get_broker()
+    broker = MemoryBroker(queue_size=10)
+    events.set_broker(broker)
+    yield broker
+    events.set_broker(previous)
+
+
+def _spend(db, user, category, amount):
+    rollups.add_expense(db, user.id, date(2024, 1, 5), category.id, amount)
+    events.expense_changes(db, user.id, [(date(2024, 1, 5), category.id, amount)])
+
+
+def test_events_are_published_only_after_commit(broker, db, user, category):
+    async def run():
+        async with broker.subscribe(user.id) as subscription:
+            # Over the category's budget of 1000
+            _spend(db, user, category, 1200.0)
+            await asyncio.sleep(0)
+            assert subscription.queue.empty()
+
+            db.commit()
+            spend = await asyncio.wait_for(subscription.get(), 1)
+            exceeded = await asyncio.wait_for(subscription.get(), 1)
+
+            _spend(db, user, category, 1.0)
+            db.rollback()
+            await asyncio.sleep(0)
+            assert subscription.queue.empty()
+        return spend, exceeded
+
+    spend, exceeded = asyncio.run(run())
+
+    details = {"category_id": category.id, "month": "2024-01", "spent": 1200.0, "budget": 1000}
+    assert spend == {"type": "category_spend", **details, "change": 1200.0}
+    assert exceeded == {"type": "budget_exceeded", **details}
+
+
+def test_subscribe_refuses_past_the_limit_and_frees_the_slot_on_exit(broker):
+    async def run():
+        async with broker.subscribe(1, limit=2), broker.subscribe(1, limit=2):
+            with pytest.raises(TooManySubscriptions):
+                async with broker.subscribe(1, limit=2):
+                    pass
+            # Another user's streams are counted separately
+            async with broker.subscribe(2, limit=2):
+                assert broker.subscribers(1) == 2
+        async with broker.subscribe(1, limit=2):
+            return broker.subscribers(1)
+
+    assert asyncio.run(run()) == 1
+    assert broker.subscribers(1) == 0
+
+
+def test_stream_registers_before_responding_and_unregisters_on_disconnect(broker, db, user, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "EVENTS_MAX_STREAMS_PER_USER", 1)
+
+    async def run():
+        response = await stream_events(db=db, current_user=user)
+        assert broker.subscribers(user.id) == 1
+        # The second stream is refused before any response is started
+        with pytest.raises(HTTPException) as refused:
+            await stream_events(db=db, current_user=user)
+        first = await response.body_iterator.__anext__()
+        # The client going away closes the body iterator
+        await response.body_iterator.aclose()
+        return refused.value.status_code, first
+
+    status, first = asyncio.run(run())
+
+    assert (status, first) == (429, ": connected\n\n")
+    assert broker.subscribers(user.id) == 0
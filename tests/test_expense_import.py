@@ -0,0 +1,62 @@
+import json
+
+
+def _ndjson(payment_mode):
+    row = {"amount": 12, "date": "2024-01-02", "note": "imported",
+           "paymentMode": {"name": payment_mode.name, "icon": payment_mode.icon, "color": payment_mode.color}}
+    return json.dumps(row) + "\n"
+
+
+def _csv(payment_mode):
+    return f"amount,date,note,paymentMode\n7,2024-01-03,from csv,{payment_mode.name}\n"
+
+
+def _upload(client, user, filename, body, content_type):
+    return client.post("/expense/import", files={"file": (filename, body, content_type)}, headers=user.headers)
+
+
+def test_format_comes_from_the_extension_or_the_content_type(client, user, payment_mode):
+    for filename, body, content_type in (
+        ("expenses.csv", _csv(payment_mode), "application/octet-stream"),
+        ("expenses.jsonl", _ndjson(payment_mode), "application/octet-stream"),
+        ("upload", _ndjson(payment_mode), "application/x-ndjson"),
+        ("upload", _csv(payment_mode), "text/csv; charset=utf-8"),
+    ):
+        response = _upload(client, user, filename, body, content_type)
+        assert response.status_code == 200, (filename, response.text)
+        assert response.json()["imported"] == 1, (filename, response.json())
+
+
+def test_unrecognised_file_is_rejected(client, user, payment_mode):
+    response = _upload(client, user, "upload", _csv(payment_mode), "application/octet-stream")
+
+    assert response.status_code == 400
+
+
+def test_unreadable_csv_is_reported_against_its_row(client, user, payment_mode):
+    # Decoded in blocks, so a small file fails before its first row
+    latin1 = (_csv(payment_mode) + "8,2024-01-04,café,Cash\n").encode("latin-1")
+    # A note past csv's field size limit
+    malformed = _csv(payment_mode) + '9,2024-01-05,"' + "x" * 200_000 + '",Cash\n'
+
+    for body, imported, row, message in ((latin1, 0, 1, "not UTF-8"), (malformed, 1, 2, "Line 3")):
+        response = _upload(client, user, "expenses.csv", body, "text/csv")
+        assert response.status_code == 200, response.text
+        result = response.json()
+        assert (result["imported"], result["failed"]) == (imported, 1)
+        assert result["errors"][0]["row"] == row
+        assert message in result["errors"][0]["errors"][0], result
+
+
+def test_json_import_takes_an_array_up_to_the_size_cap(client, user, payment_mode, monkeypatch):
+    from config import settings
+
+    rows = [json.loads(_ndjson(payment_mode)), {"amount": "not a number"}]
+    response = client.post("/expense/import/json", json=rows, headers=user.headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": 1, "failed": 1, "errors": response.json()["errors"]}
+
+    assert client.post("/expense/import/json", json={"amount": 1}, headers=user.headers).status_code == 422
+    assert client.post("/expense/import/json", content=b"[{", headers=user.headers).status_code == 400
+    monkeypatch.setattr(settings, "IMPORT_JSON_MAX_BYTES", 10)
+    assert client.post("/expense/import/json", json=rows, headers=user.headers).status_code == 413
@@ -0,0 +1,89 @@
+from datetime import date
+from utils.pagination import NEXT_CURSOR_HEADER
+
+
+def _walk(client, headers, path, **params):
+    """Every page of `path`, following X-Next-Cursor until it stops."""
+    pages, cursor = [], None
+    while True:
+        # Passed as params: httpx drops a query string written into the path when params are given
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_walks_every_expense_once_newest_first(client, user, add_expenses):
+    # Two rows per day, so ties on date are broken by id
+    add_expenses(user.id, 12, start=date(2024, 3, 1))
+    add_expenses(user.id, 13, start=date(2024, 3, 1))
+
+    pages = _walk(client, user.headers, "/expense", limit=10)
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    rows = [row for page in pages for row in page]
+    keys = [(row["date"], row["id"]) for row in rows]
+    assert len(set(keys)) == 25
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_cursor_is_stable_when_rows_are_added_before_it(client, user, add_expenses):
+    add_expenses(user.id, 15, start=date(2024, 3, 1))
+    first = client.get("/expense?limit=10", headers=user.headers)
+    # Newer rows land on earlier pages; the cursor still continues where the first page ended
+    add_expenses(user.id, 5, start=date(2024, 6, 1))
+
+    second = client.get(
+        "/expense", params={"limit": 10, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=user.headers
+    )
+
+    seen = {row["id"] for row in first.json()}
+    assert len(second.json()) == 5
+    assert seen.isdisjoint(row["id"] for row in second.json())
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+
+def test_page_parameter_still_pages_by_offset(client, user, add_expenses):
+    add_expenses(user.id, 15)
+
+    by_cursor = [row["id"] for page in _walk(client, user.headers, "/expense", limit=10) for row in page]
+    by_page = [
+        row["id"]
+        for page in (1, 2)
+        for row in client.get(f"/expense?limit=10&page={page}", headers=user.headers).json()
+    ]
+
+    assert by_page == by_cursor
+
+
+def test_malformed_cursor_is_rejected(client, user):
+    response = client.get("/expense", params={"cursor": "not-a-cursor"}, headers=user.headers)
+
+    assert response.status_code == 400
+
+
+def test_relevance_pages_have_no_cursor(client, user, add_expenses):
+    add_expenses(user.id, 15)
+
+    response = client.get("/expense?limit=10&search=expense&order=relevance", headers=user.headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    assert NEXT_CURSOR_HEADER not in response.headers
+    cursor = client.get("/expense?limit=10", headers=user.headers).headers[NEXT_CURSOR_HEADER]
+    assert client.get(
+        "/expense", params={"cursor": cursor, "order": "relevance"}, headers=user.headers
+    ).status_code == 400
+
+
+def test_deleted_expenses_are_not_listed(client, user, add_expenses):
+    add_expenses(user.id, 3)
+    rows = client.get("/expense", headers=user.headers).json()
+
+    assert client.delete(f"/expense/{rows[0]['id']}", headers=user.headers).status_code == 200
+
+    assert [row["id"] for row in client.get("/expense", headers=user.headers).json()] == [
+        row["id"] for row in rows[1:]
+    ]
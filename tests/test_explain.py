@@ -0,0 +1,6 @@
+from db.database import engine
+from db.explain import check_hot_queries
+
+
+def test_hot_queries_use_their_indexes():
+    assert check_hot_queries(engine) == []
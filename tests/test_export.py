@@ -0,0 +1,24 @@
+import io
+
+import pytest
+
+from config import settings
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_parquet_row_groups_span_several_fetch_batches(client, user, category, payment_mode, add_expenses, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 10)
+    monkeypatch.setattr(settings, "EXPORT_PARQUET_ROW_GROUP_SIZE", 40)
+    add_expenses(user.id, 50, category_id=category.id, payment_mode_id=payment_mode.id)
+    add_expenses(user.id, 45)
+
+    response = client.get("/export/expenses", params={"format": "parquet"}, headers=user.headers)
+
+    assert response.status_code == 200, response.text
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    sizes = [parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)]
+    assert sizes == [40, 40, 15]
+    table = parquet.read()
+    assert table.num_rows == 95
+    assert table.column("category").to_pylist().count(category.name) == 50
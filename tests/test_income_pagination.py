@@ -0,0 +1,39 @@
+from datetime import date
+from tests.test_expense_pagination import _walk
+from utils.pagination import NEXT_CURSOR_HEADER
+
+
+def test_cursor_walks_every_income_once_newest_first(client, user, add_incomes):
+    # Two rows per day, so ties on date are broken by id
+    add_incomes(user.id, 6, start=date(2024, 3, 1))
+    add_incomes(user.id, 7, start=date(2024, 3, 1))
+
+    pages = _walk(client, user.headers, "/income", limit=5)
+
+    assert [len(page) for page in pages] == [5, 5, 3]
+    keys = [(row["date"], row["id"]) for page in pages for row in page]
+    assert len(set(keys)) == 13
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_income_cursor_continues_after_newer_rows_arrive(client, user, add_incomes):
+    add_incomes(user.id, 8, start=date(2024, 3, 1))
+    first = client.get("/income?limit=5", headers=user.headers)
+    add_incomes(user.id, 4, start=date(2024, 6, 1))
+
+    second = client.get(
+        "/income", params={"limit": 5, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=user.headers
+    )
+
+    assert [row["date"] for row in second.json()] == ["2024-03-03", "2024-03-02", "2024-03-01"]
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+
+def test_malformed_or_relevance_income_cursor_is_rejected(client, user, add_incomes):
+    add_incomes(user.id, 3)
+    cursor = client.get("/income?limit=2", headers=user.headers).headers[NEXT_CURSOR_HEADER]
+
+    assert client.get("/income", params={"cursor": "not-a-cursor"}, headers=user.headers).status_code == 400
+    assert client.get(
+        "/income", params={"cursor": cursor, "order": "relevance"}, headers=user.headers
+    ).status_code == 400
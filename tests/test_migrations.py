@@ -0,0 +1,106 @@
+"""Migrations upgrade existing databases and end at the schema the models declare."""
+import warnings
+import pytest
+from sqlalchemy import create_engine, inspect
+from db.database import Base
+from db.migrate import current_version, downgrade, upgrade
+from db.migrations import MIGRATIONS
+import models  # noqa: F401  registers every table on Base.metadata
+
+
+# Indexes on expressions, which SQLite reflection skips
+EXPRESSION_INDEXES = {"uq_categories_name_icon_color", "uq_payment_modes_name_icon_color"}
+
+
+@pytest.fixture
+def scratch_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _schema(engine):
+    inspector = inspect(engine)
+    with warnings.catch_warnings():
+        # Reflecting the expression indexes warns that they are skipped
+        warnings.simplefilter("ignore")
+        return {
+            name: (
+                {column["name"] for column in inspector.get_columns(name)},
+                {index["name"] for index in inspector.get_indexes(name)},
+            )
+            for name in inspector.get_table_names()
+        }
+
+
+def test_upgrade_from_baseline_keeps_and_rolls_up_existing_rows(scratch_engine):
+    upgrade(scratch_engine, 1)
+    with scratch_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, username, phone_number, hashed_password) VALUES (1, 'a', 'a', '1', 'x')"
+        )
+        conn.exec_driver_sql("INSERT INTO categories (id, name, icon, budget) VALUES (1, 'Food', 'Utensils', 100)")
+        conn.exec_driver_sql(
+            "INSERT INTO expenses (amount, date, note, category_id, user_id) VALUES "
+            "(5, '2024-01-03', 'lunch', 1, 1), (7, '2024-01-20', 'dinner', 1, 1), (9, '2024-02-01', 'cab', NULL, 1)"
+        )
+        conn.exec_driver_sql("INSERT INTO incomes (amount, date, source, user_id) VALUES (50, '2024-01-03', 'Job', 1)")
+
+    assert upgrade(scratch_engine) == MIGRATIONS[-1].revision
+
+    with scratch_engine.begin() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT month, category_id, total, count FROM expense_monthly_rollups"
+        ).all() == [("2024-01-01", 1, 12.0, 2)]
+        assert conn.exec_driver_sql(
+            "SELECT month, source, total, count FROM income_monthly_rollups"
+        ).all() == [("2024-01-01", "Job", 50.0, 1)]
+        assert conn.exec_driver_sql(
+            "SELECT count(*) FROM expenses WHERE version = 0 AND deleted_at IS NULL AND updated_at IS NOT NULL"
+        ).scalar() == 3
+
+
+def test_migrations_build_the_schema_the_models_declare(scratch_engine):
+    upgrade(scratch_engine)
+    schema = _schema(scratch_engine)
+
+    for table in Base.metadata.sorted_tables:
+        columns, indexes = schema[table.name]
+        assert columns == {column.name for column in table.columns}, table.name
+        declared = {index.name for index in table.indexes} - EXPRESSION_INDEXES
+        assert indexes == declared, table.name
+
+
+def test_downgrade_to_zero_and_upgrade_again(scratch_engine):
+    upgrade(scratch_engine)
+    upgraded = _schema(scratch_engine)
+    with scratch_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, username, phone_number, hashed_password) VALUES (1, 'a', 'a', '1', 'x')"
+        )
+        conn.exec_driver_sql("INSERT INTO categories (id, name, icon, budget) VALUES (1, 'Food', 'Utensils', 100)")
+        conn.exec_driver_sql(
+            "INSERT INTO expenses (amount, date, note, category_id, user_id, deleted_at) VALUES "
+            "(5, '2024-01-03', 'kept', 1, 1, NULL), (7, '2024-01-20', 'deleted', 1, 1, '2024-02-01 00:00:00')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO incomes (amount, date, source, user_id, deleted_at) VALUES "
+            "(50, '2024-01-03', 'Job', 1, '2024-02-01 00:00:00')"
+        )
+
+    # Below m0007 soft deletes cannot be told apart, so the tombstones go
+    assert downgrade(scratch_engine, 6) == 6
+    with scratch_engine.begin() as conn:
+        assert conn.exec_driver_sql("SELECT note FROM expenses").scalars().all() == ["kept"]
+        assert conn.exec_driver_sql("SELECT count(*) FROM incomes").scalar() == 0
+        assert conn.exec_driver_sql(
+            "SELECT month, category_id, total, count FROM expense_monthly_rollups"
+        ).all() == [("2024-01-01", 1, 5.0, 1)]
+
+    assert downgrade(scratch_engine, 0) == 0
+    assert set(_schema(scratch_engine)) == {"schema_version"}
+
+    upgrade(scratch_engine)
+    with scratch_engine.begin() as conn:
+        assert current_version(conn) == MIGRATIONS[-1].revision
+    assert _schema(scratch_engine) == upgraded
@@ -0,0 +1,24 @@
+"""Operational endpoints are off by default and behind INTERNAL_TOKEN when on."""
+import pytest
+from config import settings
+
+PATHS = ["/internal/pool", "/internal/cache", "/metrics"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_off_without_a_configured_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "INTERNAL_TOKEN", None)
+
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers={"Authorization": "Bearer anything"}).status_code == 404
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_require_the_configured_token(client, user, monkeypatch, path):
+    monkeypatch.setattr(settings, "INTERNAL_TOKEN", "internal-secret")
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    # A user's access token is not enough
+    assert client.get(path, headers=user.headers).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer internal-secret"}).status_code == 200
@@ -0,0 +1,126 @@
+"""Outbox delivery: sent once after commit, retried with backoff, then dead-lettered."""
+import asyncio
+import logging
+from datetime import timedelta
+import pytest
+from sqlalchemy import update
+from models.outbox import DbOutboxMessage
+from utils import outbox
+from utils.sms import FakeTransport, SmsTransport, set_transport
+
+
+class FailingTransport(SmsTransport):
+    def __init__(self):
+        self.attempts = 0
+
+    def send(self, to: str, body: str) -> str:
+        self.attempts += 1
+        raise RuntimeError("provider unavailable")
+
+
+@pytest.fixture(autouse=True)
+def drained():
+    # Messages queued by other tests (sign-ups) would otherwise be claimed here
+    while outbox.dispatch_batch(FakeTransport()):
+        pass
+
+
+def _queue(db, to="+15550000001", body="Your BudgetBuddy verification code is: 123456"):
+    outbox.enqueue_sms(db, to, body)
+    db.commit()
+    return db.query(DbOutboxMessage).order_by(DbOutboxMessage.id.desc()).first()
+
+
+def _make_due(db, message):
+    db.execute(update(DbOutboxMessage).where(DbOutboxMessage.id == message.id).values(
+        next_attempt_at=outbox._now() - timedelta(seconds=1)
+    ))
+    db.commit()
+
+
+def test_committed_message_is_sent_once(db):
+    message = _queue(db)
+    transport = FakeTransport()
+
+    assert outbox.dispatch_batch(transport) == 1
+    assert outbox.dispatch_batch(transport) == 0
+
+    assert transport.sent == [(message.recipient, message.body)]
+    db.refresh(message)
+    assert (message.status, message.attempts, message.claim) == ("sent", 1, None)
+    assert message.sent_at is not None
+
+
+def test_rolled_back_message_is_never_sent(db):
+    outbox.enqueue_sms(db, "+15550000002", "never")
+    db.rollback()
+    transport = FakeTransport()
+
+    assert outbox.dispatch_batch(transport) == 0
+    assert transport.sent == []
+
+
+def test_failures_back_off_exponentially_then_dead_letter(db, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    message = _queue(db)
+    failing = FailingTransport()
+
+    delays = []
+    for _ in range(2):
+        before = outbox._now()
+        assert outbox.dispatch_batch(failing) == 1
+        db.refresh(message)
+        assert (message.status, message.last_error) == ("pending", "provider unavailable")
+        delays.append((message.next_attempt_at - before).total_seconds())
+        # Not due again until the backoff has passed
+        assert outbox.dispatch_batch(failing) == 0
+        _make_due(db, message)
+
+    base = settings.OUTBOX_RETRY_BASE_SECONDS
+    assert base <= delays[0] < base + 5
+    assert 2 * base <= delays[1] < 2 * base + 5
+
+    assert outbox.dispatch_batch(failing) == 1
+    db.refresh(message)
+    assert (message.status, message.attempts) == ("failed", 3)
+    # A dead letter is not picked up again, even by a working transport
+    _make_due(db, message)
+    working = FakeTransport()
+    assert outbox.dispatch_batch(working) == 0
+    assert working.sent == []
+    assert failing.attempts == 3
+
+
+def test_dispatcher_sends_when_notified(db):
+    transport = FakeTransport()
+    set_transport(transport)
+    message = _queue(db, body="notified")
+
+    async def run():
+        stop = asyncio.Event()
+        task = asyncio.create_task(outbox.run_dispatcher(stop))
+        outbox.notify()
+        for _ in range(100):
+            if transport.sent:
+                break
+            await asyncio.sleep(0.02)
+        stop.set()
+        outbox.notify()
+        await task
+
+    try:
+        asyncio.run(run())
+    finally:
+        set_transport(None)
+
+    assert transport.sent == [(message.recipient, "notified")]
+
+
+def test_fake_transport_does_not_log_the_message_body(caplog):
+    with caplog.at_level(logging.INFO, logger="utils.sms"):
+        message_id = FakeTransport().send("+15550000003", "Your BudgetBuddy verification code is: 654321")
+
+    assert "654321" not in caplog.text
+    assert message_id in caplog.text and "+15550000003" in caplog.text
@@ -0,0 +1,73 @@
+"""The list endpoints issue a fixed number of SQL statements, however many rows they return.
+
+An N+1 regression (a lazy relationship load per row, a lookup per category)
+shows up here as a count that grows with the data.
+"""
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from config import settings
+from db.database import engine
+from routers.categories import categories_snapshot
+
+N = 20
+
+# Statements per request once the caller's token and user are cached
+BUDGETS = {
+    "/expense?limit=100": 1,
+    "/getCSV": 1,
+    "/income?limit=500": 1,
+    # The change counter, then the rows
+    "/categories": 2,
+}
+
+
+@contextmanager
+def recorded_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _statements(client, path, headers):
+    # /categories is a cached snapshot; rebuild it so its query is counted too
+    categories_snapshot.invalidate()
+    with recorded_statements() as statements:
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.text
+    return statements
+
+
+@pytest.mark.parametrize("path", BUDGETS)
+def test_statement_count_does_not_grow_with_rows(client, user, category, payment_mode, add_expenses, add_incomes, path):
+    # Caches the token and the user, which later requests skip
+    client.get("/expense", headers=user.headers)
+
+    add_expenses(user.id, N, category_id=category.id, payment_mode_id=payment_mode.id)
+    add_incomes(user.id, N)
+    small = _statements(client, path, user.headers)
+
+    add_expenses(user.id, 9 * N, category_id=category.id, payment_mode_id=payment_mode.id)
+    add_incomes(user.id, 9 * N)
+    large = _statements(client, path, user.headers)
+
+    assert len(small) == len(large) == BUDGETS[path], large
+
+
+def test_query_count_header_is_off_by_default(client, user, monkeypatch):
+    assert "X-Query-Count" not in client.get("/expense", headers=user.headers).headers
+
+    monkeypatch.setattr(settings, "QUERY_COUNT_HEADER", True)
+    response = client.get("/expense", headers=user.headers)
+    assert int(response.headers["X-Query-Count"]) >= 1
+    # Not readable by browser code on other origins
+    cross_origin = client.get("/expense", headers={**user.headers, "Origin": "http://localhost:3000"})
+    exposed = cross_origin.headers["access-control-expose-headers"].lower()
+    assert "x-next-cursor" in exposed and "x-query-count" not in exposed
@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import func, select, update
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.recurrence import DbRecurrenceRule
+from models.rollup import DbExpenseRollup
+from utils.recurrence import last_due, materialize_batch, occurrence_date, run_once
+
+
+def _rule(client, user, **fields):
+    body = {"kind": "expense", "frequency": "monthly", "amount": 500, "note": "rent", **fields}
+    body = {key: value.isoformat() if isinstance(value, date) else value for key, value in body.items()}
+    response = client.post("/recurring", json=body, headers=user.headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _dates(db, model, rule_id):
+    return db.scalars(select(model.date).where(model.recurrence_id == rule_id).order_by(model.date)).all()
+
+
+def _materialize(db, today, rule_id, catch_up=True):
+    materialize_batch(db, today, catch_up, rule_ids=[rule_id])
+    db.commit()
+
+
+def test_monthly_occurrences_keep_the_start_day_clamped_to_shorter_months():
+    dates = [occurrence_date(date(2024, 1, 31), "monthly", 1, n) for n in range(5)]
+
+    assert dates == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)]
+    assert occurrence_date(date(2024, 11, 15), "monthly", 3, 1) == date(2025, 2, 15)
+    assert occurrence_date(date(2024, 1, 1), "weekly", 2, 3) == date(2024, 2, 12)
+
+
+@pytest.mark.parametrize("frequency,interval", [("daily", 1), ("daily", 3), ("weekly", 2), ("monthly", 1), ("monthly", 5)])
+@pytest.mark.parametrize("start", [date(2024, 1, 31), date(2024, 2, 29), date(2024, 6, 15)])
+def test_last_due_matches_stepping_through_occurrences(frequency, interval, start):
+    for until in (start - timedelta(days=1), start, start + timedelta(days=40), date(2026, 3, 30)):
+        n = -1
+        while occurrence_date(start, frequency, interval, n + 1) <= until:
+            n += 1
+        assert last_due(start, frequency, interval, until) == n, until
+
+
+def test_past_occurrences_are_written_when_the_rule_is_created(client, db, user, category):
+    category_body = {"name": category.name, "icon": category.icon, "color": category.color, "budget": category.budget}
+    rule = _rule(client, user, start_date=date(2024, 1, 31), end_date=date(2024, 5, 31), category=category_body)
+
+    assert _dates(db, DbExpense, rule["id"]) == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)
+    ]
+    # Finished: nothing falls due after end_date
+    assert rule["active"] is False
+    assert db.scalar(select(func.sum(DbExpenseRollup.count)).where(
+        DbExpenseRollup.user_id == user.id, DbExpenseRollup.category_id == category.id
+    )) == 5
+    assert len(client.get("/expense?limit=100", headers=user.headers).json()) == 5
+
+
+def test_each_occurrence_is_written_once(client, db, user):
+    rule = _rule(client, user, frequency="weekly", start_date=date(2030, 1, 1))
+    assert _dates(db, DbExpense, rule["id"]) == []
+
+    _materialize(db, date(2030, 1, 20), rule["id"])
+    _materialize(db, date(2030, 1, 20), rule["id"])
+    assert _dates(db, DbExpense, rule["id"]) == [date(2030, 1, 1), date(2030, 1, 8), date(2030, 1, 15)]
+
+    # A worker that read the rule before the first run committed starts from occurrence 0 again
+    db.execute(update(DbRecurrenceRule).where(DbRecurrenceRule.id == rule["id"]).values(
+        next_occurrence=0, next_date=date(2030, 1, 1)
+    ))
+    _materialize(db, date(2030, 1, 29), rule["id"])
+    assert _dates(db, DbExpense, rule["id"]) == [
+        date(2030, 1, 1), date(2030, 1, 8), date(2030, 1, 15), date(2030, 1, 22), date(2030, 1, 29)
+    ]
+    assert db.get(DbRecurrenceRule, rule["id"]).next_date == date(2030, 2, 5)
+
+
+def test_without_catch_up_only_the_latest_missed_occurrence_is_written(client, db, user):
+    rule = _rule(client, user, frequency="daily", start_date=date(2030, 1, 1))
+
+    _materialize(db, date(2030, 1, 10), rule["id"], catch_up=False)
+
+    assert _dates(db, DbExpense, rule["id"]) == [date(2030, 1, 10)]
+    assert db.get(DbRecurrenceRule, rule["id"]).next_date == date(2030, 1, 11)
+
+
+def test_creating_a_rule_writes_a_capped_backlog_and_leaves_the_rest_to_the_scheduler(client, db, user, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "RECURRENCE_CREATE_MAX_OCCURRENCES", 10)
+    start = date.today() - timedelta(days=29)
+    rule = _rule(client, user, frequency="daily", start_date=start)
+
+    assert _dates(db, DbExpense, rule["id"]) == [start + timedelta(days=n) for n in range(10)]
+    assert rule["active"] is True and rule["next_date"] == (start + timedelta(days=10)).isoformat()
+
+    _materialize(db, date.today(), rule["id"])
+
+    assert len(_dates(db, DbExpense, rule["id"])) == 30
+    assert db.get(DbRecurrenceRule, rule["id"]).next_date == date.today() + timedelta(days=1)
+
+
+def test_income_rules_write_incomes_and_bump_the_sync_version(client, db, user):
+    rule = _rule(client, user, kind="income", note="Salary", amount=3000, start_date=date(2030, 1, 1))
+    before = client.get("/sync", headers=user.headers).json()["next"]
+
+    _materialize(db, date(2030, 3, 1), rule["id"])
+
+    assert _dates(db, DbIncome, rule["id"]) == [date(2030, 1, 1), date(2030, 2, 1), date(2030, 3, 1)]
+    batch = client.get("/sync", params={"since": before}, headers=user.headers).json()
+    assert [(row["source"], row["amount"]) for row in batch["incomes"]] == [("Salary", 3000.0)] * 3
+
+
+def test_stopped_rules_are_not_materialized(client, db, user):
+    rule = _rule(client, user, frequency="daily", start_date=date(2030, 1, 1))
+    assert client.delete(f"/recurring/{rule['id']}", headers=user.headers).status_code == 200
+
+    _materialize(db, date(2030, 1, 10), rule["id"])
+
+    assert _dates(db, DbExpense, rule["id"]) == []
+    assert [row["active"] for row in client.get("/recurring", headers=user.headers).json()] == [False]
+
+
+def test_run_once_processes_every_due_rule_in_batches(client, db, user, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "RECURRENCE_BATCH_SIZE", 2)
+    rules = [_rule(client, user, start_date=date(2031, 1, day)) for day in (1, 2, 3, 4, 5)]
+
+    assert run_once(date(2031, 2, 3)) >= 5
+
+    assert [len(_dates(db, DbExpense, rule["id"])) for rule in rules] == [2, 2, 2, 1, 1]
+
+
+def test_invalid_rules_are_rejected(client, user):
+    for body in (
+        {"kind": "expense", "amount": 10, "note": "x", "start_date": "2024-02-01", "end_date": "2024-01-01"},
+        {"kind": "expense", "amount": 10.5, "note": "x", "start_date": "2024-01-01"},
+        {"kind": "income", "amount": 10, "note": "x", "start_date": "2024-01-01",
+         "category": {"name": "Food", "icon": "Utensils", "budget": 10}},
+    ):
+        assert client.post("/recurring", json=body, headers=user.headers).status_code == 422
@@ -0,0 +1,79 @@
+from sqlalchemy import insert, select, update
+from db.lookups import find_or_create_category
+from models.category import DbCategory
+from models.reference_version import DbReferenceVersion
+
+
+def _names(response):
+    return {row["name"] for row in response.json()}
+
+
+def test_unchanged_categories_revalidate_with_304(client):
+    first = client.get("/categories")
+
+    again = client.get("/categories", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_category_created_with_an_expense_is_listed_straight_away(client, user):
+    etag = client.get("/categories").headers["ETag"]
+
+    created = client.post("/expense", json={
+        "amount": 5, "date": "2024-01-01", "note": "x",
+        "category": {"name": "Created with an expense", "icon": "Tag", "budget": 10, "color": "red"},
+        "paymentMode": {"name": "Cash", "icon": "Wallet", "color": "green"},
+    }, headers=user.headers)
+    assert created.status_code == 201, created.text
+    response = client.get("/categories", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert "Created with an expense" in _names(response)
+
+
+def test_category_added_by_another_process_is_listed_on_the_next_request(client, db):
+    client.get("/categories")
+    # Written behind this worker's back: no cache here is told about it
+    db.execute(insert(DbCategory).values(name="Added elsewhere", icon="Tag", budget=10, color="red"))
+    db.commit()
+
+    assert "Added elsewhere" in _names(client.get("/categories"))
+
+
+def _categories_version(db):
+    return db.execute(
+        select(DbReferenceVersion.version).where(DbReferenceVersion.name == "categories")
+    ).scalar_one()
+
+
+def test_uncommitted_category_neither_shows_nor_sticks(client, db):
+    version = _categories_version(db)
+    find_or_create_category(db, {"name": "Not committed yet", "icon": "Tag", "budget": 10, "color": "red"})
+
+    assert "Not committed yet" not in _names(client.get("/categories"))
+    db.commit()
+    assert _categories_version(db) == version + 1
+    assert "Not committed yet" in _names(client.get("/categories"))
+
+
+def test_rolled_back_category_leaves_the_version_alone(db):
+    version = _categories_version(db)
+    find_or_create_category(db, {"name": "Rolled back", "icon": "Tag", "budget": 10, "color": "red"})
+
+    db.rollback()
+
+    assert _categories_version(db) == version
+
+
+def test_category_edited_in_place_is_served_on_the_next_request(client, db):
+    # Ids do not move on an update, so only a change counter catches it
+    db.execute(insert(DbCategory).values(name="Before the edit", icon="Tag", budget=10, color="red"))
+    db.commit()
+    client.get("/categories")
+
+    db.execute(update(DbCategory).where(DbCategory.name == "Before the edit").values(name="After the edit"))
+    db.commit()
+
+    names = _names(client.get("/categories"))
+    assert "After the edit" in names and "Before the edit" not in names
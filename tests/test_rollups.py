@@ -0,0 +1,82 @@
+"""The monthly rollups kept by the write handlers match a rebuild from the base tables."""
+from sqlalchemy import select
+from db import rollups
+from models.rollup import DbExpenseRollup, DbIncomeRollup
+
+
+def _category(category):
+    return {"name": category.name, "icon": category.icon, "color": category.color, "budget": category.budget}
+
+
+def _payment_mode(payment_mode):
+    return {"name": payment_mode.name, "icon": payment_mode.icon, "color": payment_mode.color}
+
+
+def _rollups(db, user_id):
+    expenses = db.execute(
+        select(DbExpenseRollup.month, DbExpenseRollup.category_id, DbExpenseRollup.total, DbExpenseRollup.count)
+        .where(DbExpenseRollup.user_id == user_id, DbExpenseRollup.count != 0)
+        .order_by(DbExpenseRollup.month, DbExpenseRollup.category_id)
+    ).all()
+    incomes = db.execute(
+        select(DbIncomeRollup.month, DbIncomeRollup.source, DbIncomeRollup.total, DbIncomeRollup.count)
+        .where(DbIncomeRollup.user_id == user_id, DbIncomeRollup.count != 0)
+        .order_by(DbIncomeRollup.month, DbIncomeRollup.source)
+    ).all()
+    return expenses, incomes
+
+
+def _rebuilt(db, user_id):
+    rollups.rebuild(db, user_id)
+    rebuilt = _rollups(db, user_id)
+    db.rollback()
+    return rebuilt
+
+
+def test_writes_keep_rollups_equal_to_a_rebuild(client, db, user, category, payment_mode):
+    food, card = _category(category), _payment_mode(payment_mode)
+    created = [
+        client.post("/expense", json={
+            "amount": amount, "date": day, "note": "test", "category": food, "paymentMode": card
+        }, headers=user.headers).json()
+        for amount, day in ((100, "2024-01-05"), (50, "2024-01-20"), (70, "2024-02-02"))
+    ]
+    # Moves an expense to another month and another category
+    response = client.patch(f"/expense/{created[0]['id']}", json={
+        "amount": 120, "date": "2024-02-10", "category": {**food, "name": food["name"] + " (moved)"}
+    }, headers=user.headers)
+    assert response.status_code == 200, response.text
+    assert client.delete(f"/expense/{created[1]['id']}", headers=user.headers).status_code == 200
+    response = client.post("/expense/import/json", json=[
+        {"amount": 30, "date": "2024-03-01", "note": "imported", "category": food, "paymentMode": card},
+        {"amount": 40, "date": "2024-03-02", "note": "uncategorised", "paymentMode": card},
+    ], headers=user.headers)
+    assert response.status_code == 200, response.text
+
+    salary = client.post("/income", json={
+        "amount": 1000, "date": "2024-01-01", "source": "Salary", "is_recurring": True
+    }, headers=user.headers).json()
+    bonus = client.post("/income", json={
+        "amount": 200, "date": "2024-01-15", "source": "Bonus", "is_recurring": False
+    }, headers=user.headers).json()
+    client.patch(f"/income/{salary['id']}", json={"amount": 1100, "date": "2024-02-01"}, headers=user.headers)
+    assert client.delete(f"/income/{bonus['id']}", headers=user.headers).status_code == 200
+
+    expenses, incomes = _rollups(db, user.id)
+    assert (expenses, incomes) == _rebuilt(db, user.id)
+    assert [(str(month), total, count) for month, _, total, count in expenses] == [
+        ("2024-02-01", 70.0, 1), ("2024-02-01", 120.0, 1), ("2024-03-01", 30.0, 1)
+    ]
+    assert [(str(month), source, total) for month, source, total, _ in incomes] == [("2024-02-01", "Salary", 1100.0)]
+
+
+def test_category_expense_reads_the_rollup(client, user, category, add_expenses):
+    add_expenses(user.id, 3, category_id=category.id, amount=25.0)
+
+    rows = {row["id"]: row for row in client.get("/category_expense", headers=user.headers).json()}
+    month = {row["id"]: row for row in client.get("/category_expense?month=2024-01", headers=user.headers).json()}
+    other = {row["id"]: row for row in client.get("/category_expense?month=2023-12", headers=user.headers).json()}
+
+    assert rows[category.id]["expense"] == 75.0
+    assert month[category.id]["expense"] == 75.0
+    assert other[category.id]["expense"] == 0.0
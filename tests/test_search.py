@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select
+
+from db.search import Fts5SearchIndex, word_similarity
+from models.expense import DbExpense
+
+NOTES = ["Coffee beans", "Toffee", "Bread and butter", "Tea", "Bus to work", "Subscription"]
+
+
+@pytest.fixture
+def notes(db, user):
+    db.execute(insert(DbExpense), [
+        {"amount": 1.0, "date": date(2024, 1, 1), "note": note, "recurring": False, "user_id": user.id}
+        for note in NOTES
+    ])
+    db.commit()
+
+
+def _search(db, user, term, mode):
+    matches = Fts5SearchIndex().matches(DbExpense.note, term, mode).subquery()
+    rows = db.execute(
+        select(DbExpense.note, matches.c.score)
+        .join(matches, matches.c.id == DbExpense.id)
+        .where(DbExpense.user_id == user.id)
+        .order_by(matches.c.score.desc(), DbExpense.id)
+    ).all()
+    return [note for note, _ in rows]
+
+
+def test_substring_matches_anywhere_in_the_text(db, user, notes):
+    assert sorted(_search(db, user, "ffee", "substring")) == ["Coffee beans", "Toffee"]
+    assert _search(db, user, "BUTTER", "substring") == ["Bread and butter"]
+
+
+def test_prefix_matches_the_start_of_any_word(db, user, notes):
+    assert sorted(_search(db, user, "bu", "prefix")) == ["Bread and butter", "Bus to work"]
+    assert _search(db, user, "bean", "prefix") == ["Coffee beans"]
+    # "ffee" is inside a word, not at its start
+    assert _search(db, user, "ffee", "prefix") == []
+
+
+def test_terms_under_three_characters(db, user, notes):
+    assert sorted(_search(db, user, "ea", "substring")) == ["Bread and butter", "Coffee beans", "Tea"]
+    assert _search(db, user, "te", "prefix") == ["Tea"]
+    assert _search(db, user, "ea", "prefix") == []
+
+
+def test_fuzzy_tolerates_typos(db, user, notes):
+    # No unpadded trigram in common, but the padded word trigrams overlap enough
+    assert _search(db, user, "bens", "fuzzy") == ["Coffee beans"]
+    assert _search(db, user, "subscripton", "fuzzy") == ["Subscription"]
+    # An exact word matches, a one-letter change at its start does not
+    assert _search(db, user, "coffee", "fuzzy") == ["Coffee beans"]
+
+
+def test_fuzzy_needs_more_than_a_shared_trigram(db, user, notes):
+    # "sub" is shared with "Subscription" and "bus" with "Bus to work", but nothing more
+    assert _search(db, user, "subway", "fuzzy") == []
+    assert word_similarity("coffee", "Toffee") < 0.6
+
+
+def test_fuzzy_search_through_the_api(client, user, notes):
+    response = client.get("/expense", headers=user.headers, params={"search": "bens", "match": "fuzzy"})
+    assert response.status_code == 200
+    assert [expense["note"] for expense in response.json()] == ["Coffee beans"]
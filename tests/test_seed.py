@@ -0,0 +1,30 @@
+from sqlalchemy import func, select
+from db.seed import SEED_USER_PREFIX, SEED_VERSION, generate
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.user import DbUser
+from utils.auth_token import create_access_token
+
+
+def test_generated_history_is_sent_by_sync_and_later_writes_follow_it(client, db):
+    generate(db, users=2, months=2, expenses_per_month=5)
+    user = db.scalar(select(DbUser).where(DbUser.username == f"{SEED_USER_PREFIX}0"))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}
+
+    assert user.sync_version == SEED_VERSION
+    for model in (DbExpense, DbIncome):
+        assert db.execute(
+            select(func.min(model.version), func.max(model.version)).where(model.user_id == user.id)
+        ).one() == (SEED_VERSION, SEED_VERSION)
+        assert db.scalar(select(func.count()).where(model.user_id == user.id, model.updated_at.is_(None))) == 0
+
+    batch = client.get("/sync", params={"limit": 1000}, headers=headers).json()
+    assert len(batch["expenses"]) == db.scalar(select(func.count()).where(DbExpense.user_id == user.id))
+    assert len(batch["incomes"]) == db.scalar(select(func.count()).where(DbIncome.user_id == user.id))
+
+    income = client.post("/income", json={
+        "amount": 10, "date": "2024-03-01", "source": "Gift", "is_recurring": False
+    }, headers=headers).json()
+    delta = client.get("/sync", params={"since": batch["next"]}, headers=headers).json()
+    assert [row["id"] for row in delta["incomes"]] == [income["id"]]
+    assert delta["expenses"] == []
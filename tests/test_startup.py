@@ -0,0 +1,24 @@
+"""Cold start stays within budget and leaves the heavy optional modules unloaded.
+
+Runs bench/startup.py's probe in fresh interpreters. Set
+STARTUP_BUDGET_SECONDS to tighten or loosen the budget for a given machine.
+"""
+import os
+import pytest
+from bench.startup import OPTIONAL_MODULES, measure, summarize
+
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", 2.5))
+
+
+@pytest.fixture(scope="module")
+def startup():
+    return summarize([measure() for _ in range(3)])
+
+
+def test_first_response_is_within_budget(startup):
+    assert startup["first_response_seconds"] <= STARTUP_BUDGET_SECONDS, startup
+
+
+@pytest.mark.parametrize("module", OPTIONAL_MODULES)
+def test_optional_module_is_not_imported_at_startup(startup, module):
+    assert module not in startup["optional_modules"]
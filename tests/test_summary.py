@@ -0,0 +1,42 @@
+from datetime import date
+
+
+def _category(db, name, budget=1000):
+    from models.category import DbCategory
+
+    category = DbCategory(name=name, icon="Tag", budget=budget, color="blue")
+    db.add(category)
+    db.commit()
+    return category
+
+
+def test_summary_totals_each_month_and_category(client, db, user, add_expenses, add_incomes):
+    food, travel = _category(db, f"Food {user.id}"), _category(db, f"Travel {user.id}")
+    add_expenses(user.id, 3, category_id=food.id, start=date(2024, 1, 10), amount=20.0)
+    add_expenses(user.id, 1, category_id=travel.id, start=date(2024, 1, 31), amount=90.0)
+    add_expenses(user.id, 2, category_id=food.id, start=date(2024, 3, 1), amount=5.0)
+    add_incomes(user.id, 2, start=date(2024, 1, 1), amount=100.0)
+    add_incomes(user.id, 1, start=date(2024, 3, 15), amount=50.0)
+    # Outside the range, and a deleted row inside it: neither counts
+    add_expenses(user.id, 1, category_id=food.id, start=date(2024, 4, 1), amount=1000.0)
+    deleted = client.get("/expense?month=2024-03", headers=user.headers).json()[0]
+    client.delete(f"/expense/{deleted['id']}", headers=user.headers)
+
+    response = client.get("/summary", params={"from": "2024-01", "to": "2024-03"}, headers=user.headers)
+
+    assert response.status_code == 200, response.text
+    summary = response.json()
+    assert [(month["month"], month["income"], month["expense"], month["net"]) for month in summary["months"]] == [
+        ("2024-01", 200.0, 150.0, 50.0), ("2024-02", 0.0, 0.0, 0.0), ("2024-03", 50.0, 5.0, 45.0),
+    ]
+    assert summary["months"][0]["categories"] == [
+        {"id": travel.id, "name": travel.name, "total": 90.0}, {"id": food.id, "name": food.name, "total": 60.0},
+    ]
+    assert summary["months"][1]["categories"] == []
+    assert (summary["income"], summary["expense"], summary["net"]) == (250.0, 155.0, 95.0)
+
+
+def test_summary_rejects_bad_ranges(client, user):
+    assert client.get("/summary", params={"from": "2024-03", "to": "2024-01"}, headers=user.headers).status_code == 400
+    assert client.get("/summary", params={"from": "2000-01", "to": "2024-01"}, headers=user.headers).status_code == 400
+    assert client.get("/summary", params={"from": "2024-13"}, headers=user.headers).status_code == 422
@@ -0,0 +1,110 @@
+from sqlalchemy import select
+
+
+def _sync(client, user, since=None, limit=None):
+    params = {key: value for key, value in (("since", since), ("limit", limit)) if value is not None}
+    response = client.get("/sync", params=params, headers=user.headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _income(client, user, amount=100):
+    return client.post("/income", json={
+        "amount": amount, "date": "2024-01-01", "source": "Salary", "is_recurring": False
+    }, headers=user.headers).json()
+
+
+def test_full_download_leaves_out_deleted_rows(client, user, add_expenses):
+    add_expenses(user.id, 3)
+    deleted = client.get("/expense", headers=user.headers).json()[0]
+    client.delete(f"/expense/{deleted['id']}", headers=user.headers)
+
+    batch = _sync(client, user)
+
+    assert len(batch["expenses"]) == 2
+    assert deleted["id"] not in {row["id"] for row in batch["expenses"]}
+    assert batch["deleted"] == {"expenses": [], "incomes": []}
+    assert batch["has_more"] is False
+
+
+def test_delta_has_changes_and_tombstones_since_the_token(client, user, add_expenses):
+    add_expenses(user.id, 2)
+    kept, edited = client.get("/expense", headers=user.headers).json()
+    income = _income(client, user)
+    token = _sync(client, user)["next"]
+
+    client.patch(f"/expense/{edited['id']}", json={"date": edited["date"], "amount": 99}, headers=user.headers)
+    client.delete(f"/income/{income['id']}", headers=user.headers)
+    batch = _sync(client, user, token)
+
+    assert [(row["id"], row["amount"]) for row in batch["expenses"]] == [(edited["id"], 99)]
+    assert batch["incomes"] == []
+    assert batch["deleted"] == {"expenses": [], "incomes": [income["id"]]}
+
+    # Nothing changed since: the same token comes back
+    empty = _sync(client, user, batch["next"])
+    assert empty["expenses"] == empty["incomes"] == []
+    assert empty["next"] == batch["next"]
+    assert kept["id"] not in {row["id"] for row in batch["expenses"]}
+
+
+def test_batches_cover_every_change_once(client, user, add_expenses):
+    token = _sync(client, user)["next"]
+    add_expenses(user.id, 3)
+    incomes = [_income(client, user, amount) for amount in (1, 2)]
+    expense = client.get("/expense", headers=user.headers).json()[0]
+    client.delete(f"/expense/{expense['id']}", headers=user.headers)
+
+    seen, batches = [], 0
+    while True:
+        batch = _sync(client, user, token, limit=2)
+        batches += 1
+        seen += [("expense", row["id"]) for row in batch["expenses"]]
+        seen += [("income", row["id"]) for row in batch["incomes"]]
+        seen += [("deleted expense", row_id) for row_id in batch["deleted"]["expenses"]]
+        token = batch["next"]
+        if not batch["has_more"]:
+            break
+
+    # The deleted expense was created in this window too, but only its tombstone is sent
+    assert len(seen) == len(set(seen)) == 5
+    assert ("deleted expense", expense["id"]) in seen
+    assert {("income", income["id"]) for income in incomes} <= set(seen)
+    assert batches == 3
+
+
+def test_other_users_changes_are_not_sent(client, user, add_expenses, db):
+    from models.user import DbUser
+    from utils.auth_token import create_access_token
+
+    other = DbUser(
+        email=f"other-{user.username}@example.com", username=f"other-{user.username}",
+        phone_number="+10000000001", hashed_password="x", is_active=True, is_verified=True
+    )
+    db.add(other)
+    db.commit()
+    add_expenses(other.id, 2)
+
+    batch = _sync(client, user)
+
+    assert batch["expenses"] == []
+    assert client.get(
+        "/sync", headers={"Authorization": f"Bearer {create_access_token({'sub': other.username})}"}
+    ).json()["expenses"]
+
+
+def test_malformed_token_is_rejected(client, user):
+    assert client.get("/sync", params={"since": "???"}, headers=user.headers).status_code == 400
+
+
+def test_created_rows_get_updated_at(client, db, user, add_expenses):
+    from models.expense import DbExpense
+    from models.income import DbIncome
+
+    add_expenses(user.id, 1)
+    created = client.post("/income", json={
+        "amount": 5, "date": "2024-01-01", "source": "Gift", "is_recurring": False
+    }, headers=user.headers).json()
+
+    assert db.scalar(select(DbExpense.updated_at).where(DbExpense.user_id == user.id)) is not None
+    assert db.get(DbIncome, created["id"]).updated_at is not None
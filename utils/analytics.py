@@ -0,0 +1,162 @@
+"""Spending series and forecasts computed with pandas over a user's whole history.
+
+Imported on first use by routers/analytics.py, so pandas stays out of the
+app's startup. Everything here works on whole columns: rows are read once
+into a DataFrame and reduced with pivot tables and rolling windows.
+"""
+from datetime import date
+from typing import Literal
+import numpy as np
+import pandas as pd
+from sqlalchemy import literal, null, select, union_all
+from sqlalchemy.orm import Session
+from models.category import DbCategory
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.payment_mode import DbPaymentMode
+
+COLUMNS = ("date", "amount", "kind", "category", "paymentMode")
+KINDS = ["income", "expense"]
+# Group label for expenses without a category / payment mode
+UNASSIGNED = "Unassigned"
+
+Period = Literal["month", "week"]
+Group = Literal["category", "paymentMode"]
+# Weeks run Monday to Sunday
+FREQUENCIES = {"month": "M", "week": "W-SUN"}
+
+
+def load(db: Session, user_id: int, since: date) -> pd.DataFrame:
+    """The user's live expenses and incomes from `since` on, as one frame from one query."""
+    expenses = select(
+        DbExpense.date, DbExpense.amount, literal("expense").label("kind"),
+        DbCategory.name.label("category"), DbPaymentMode.name.label("paymentMode")
+    ).outerjoin(DbCategory, DbExpense.category_id == DbCategory.id).outerjoin(
+        DbPaymentMode, DbExpense.payment_mode_id == DbPaymentMode.id
+    ).where(DbExpense.user_id == user_id, DbExpense.deleted_at.is_(None), DbExpense.date >= since)
+    incomes = select(
+        DbIncome.date, DbIncome.amount, literal("income"), null(), null()
+    ).where(DbIncome.user_id == user_id, DbIncome.deleted_at.is_(None), DbIncome.date >= since)
+
+    frame = pd.DataFrame.from_records(db.execute(union_all(expenses, incomes)).all(), columns=COLUMNS)
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["amount"] = frame["amount"].astype("float64")
+    frame[["category", "paymentMode"]] = frame[["category", "paymentMode"]].fillna(UNASSIGNED)
+    return frame
+
+
+def periods(period: Period, end: date, count: int) -> pd.PeriodIndex:
+    """The `count` periods ending with the one that contains `end`."""
+    return pd.period_range(end=pd.Period(end, FREQUENCIES[period]), periods=count)
+
+
+def _label(index: pd.PeriodIndex, period: Period):
+    if period == "month":
+        return index.strftime("%Y-%m").tolist()
+    return index.start_time.strftime("%Y-%m-%d").tolist()
+
+
+def _values(values) -> list:
+    """Rounded JSON numbers, with NaN and infinities as null."""
+    values = np.round(np.asarray(values, dtype="float64"), 2)
+    result = values.astype(object)
+    result[~np.isfinite(values)] = None
+    return result.tolist()
+
+
+def _pivot(frame: pd.DataFrame, index: pd.PeriodIndex, columns: str) -> pd.DataFrame:
+    table = frame.pivot_table(index="period", columns=columns, values="amount", aggfunc="sum")
+    return table.reindex(index).fillna(0.0)
+
+
+def series(frame: pd.DataFrame, period: Period, end: date, count: int, window: int, group: Group) -> dict:
+    """Income, spend, net and savings rate per period, and spend per group.
+
+    Every series comes with its rolling mean over `window` periods and its
+    change from the period before. Both are computed over enough earlier
+    periods that the first values returned are complete.
+    """
+    index = periods(period, end, count + window)
+    frame = frame.assign(period=frame["date"].dt.to_period(FREQUENCIES[period]))
+    frame = frame[(frame["period"] >= index[0]) & (frame["period"] <= index[-1])]
+
+    totals = _pivot(frame, index, "kind").reindex(columns=KINDS, fill_value=0.0)
+    totals["net"] = totals["income"] - totals["expense"]
+    totals["savings_rate"] = totals["net"] / totals["income"].where(totals["income"] > 0)
+    groups = _pivot(frame[frame["kind"] == "expense"], index, group)
+    # Biggest spend first
+    groups = groups[groups.sum().sort_values(ascending=False).index]
+
+    rolling = groups.rolling(window, min_periods=1).mean().iloc[-count:]
+    change = groups.diff().iloc[-count:]
+    expense_rolling = totals["expense"].rolling(window, min_periods=1).mean().iloc[-count:]
+    expense_change = totals["expense"].diff().iloc[-count:]
+    totals, groups = totals.iloc[-count:], groups.iloc[-count:]
+
+    return {
+        "period": period,
+        "labels": _label(totals.index, period),
+        "income": _values(totals["income"]),
+        "expense": _values(totals["expense"]),
+        "net": _values(totals["net"]),
+        "savings_rate": _values(totals["savings_rate"]),
+        "expense_rolling": _values(expense_rolling),
+        "expense_change": _values(expense_change),
+        "groups": {
+            str(name): {
+                "total": _values(groups[name]),
+                "rolling": _values(rolling[name]),
+                "change": _values(change[name]),
+            }
+            for name in groups.columns
+        },
+    }
+
+
+def _project(values: pd.DataFrame, seasonal: bool, observed: int, horizon: int, window: int) -> pd.DataFrame:
+    if seasonal:
+        last_year, year_before = values.iloc[-12:], values.iloc[-24:-12]
+        growth = (last_year.sum() / year_before.sum()).replace([np.inf, -np.inf], np.nan).fillna(1.0).clip(0.5, 2.0)
+        predicted = last_year.iloc[:horizon].to_numpy() * growth.to_numpy()
+    else:
+        recent = values.iloc[-max(1, min(window, observed)):]
+        predicted = np.tile(recent.mean().to_numpy(), (horizon, 1))
+    return pd.DataFrame(predicted, columns=values.columns)
+
+
+def forecast(frame: pd.DataFrame, end: date, history: int, horizon: int, window: int) -> dict:
+    """Income, spend and spend per category for the `horizon` months after `end`.
+
+    With two full years of history each month is forecast as the same month
+    a year earlier, scaled by how the last twelve months compare to the
+    twelve before them (clipped to between half and double). With less it
+    is the mean of the last `window` months.
+    """
+    index = periods("month", end, history)
+    frame = frame.assign(period=frame["date"].dt.to_period("M"))
+    frame = frame[(frame["period"] >= index[0]) & (frame["period"] <= index[-1])]
+
+    # Months since the first one with any data, so a new account is not forecast from empty years
+    observed = (index[-1] - frame["period"].min()).n + 1 if len(frame) else 0
+    seasonal = observed >= 24 and history >= 24
+    totals = _project(
+        _pivot(frame, index, "kind").reindex(columns=KINDS, fill_value=0.0), seasonal, observed, horizon, window
+    )
+    groups = _project(
+        _pivot(frame[frame["kind"] == "expense"], index, "category"), seasonal, observed, horizon, window
+    )
+    groups = groups[groups.sum().sort_values(ascending=False).index]
+
+    return {
+        "method": "seasonal" if seasonal else "moving_average",
+        "labels": _label(pd.period_range(start=index[-1] + 1, periods=horizon), "month"),
+        "income": _values(totals["income"]),
+        "expense": _values(totals["expense"]),
+        "net": _values(totals["income"] - totals["expense"]),
+        "categories": {str(name): _values(groups[name]) for name in groups.columns},
+    }
+
+
+def history_start(period: Period, end: date, count: int) -> date:
+    """First day of the earliest of the `count` periods ending with `end`'s."""
+    return periods(period, end, count)[0].start_time.date()
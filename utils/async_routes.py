@@ -0,0 +1,68 @@
+import inspect
+from fastapi import APIRouter, Depends
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_db, get_async_db
+from utils.auth_token import get_current_user, get_current_user_async
+
+# Route options carried over unchanged to the async version of each route
+_ROUTE_OPTIONS = (
+    "response_model", "status_code", "tags", "dependencies", "summary", "description",
+    "response_description", "responses", "deprecated", "methods", "operation_id",
+    "response_model_include", "response_model_exclude", "response_model_by_alias",
+    "response_model_exclude_unset", "response_model_exclude_defaults",
+    "response_model_exclude_none", "include_in_schema", "response_class", "name",
+)
+
+# Sync endpoint -> the coroutine async_router serves in its place
+_async_versions = {}
+
+
+def _async_signature(endpoint):
+    parameters = []
+    for parameter in inspect.signature(endpoint).parameters.values():
+        dependency = parameter.default.dependency if isinstance(parameter.default, DependsParam) else None
+        if dependency is get_db:
+            parameter = parameter.replace(annotation=AsyncSession, default=Depends(get_async_db))
+        elif dependency is get_current_user:
+            parameter = parameter.replace(default=Depends(get_current_user_async))
+        parameters.append(parameter)
+    return inspect.signature(endpoint).replace(parameters=parameters)
+
+
+def async_version(endpoint):
+    """Register the decorated coroutine as the async version of the sync `endpoint`.
+
+    The coroutine takes the same parameters by name; it is given the sync
+    endpoint's signature, with the `db: Session` dependency swapped for an
+    AsyncSession and get_current_user for its async counterpart, so the query
+    parameters and their documentation are declared once.
+    """
+    def register(coroutine):
+        coroutine.__signature__ = _async_signature(endpoint)
+        coroutine.__doc__ = coroutine.__doc__ or endpoint.__doc__
+        _async_versions[endpoint] = coroutine
+        return coroutine
+    return register
+
+
+def async_router(router: APIRouter) -> APIRouter:
+    """Copy of `router` serving the hot read endpoints from their async versions.
+
+    Only endpoints registered with @async_version are replaced. The rest stay
+    sync and run on the threadpool against the sync engine: writes are not
+    worth a second implementation, and CPU-heavy handlers (imports,
+    analytics, exports, recurrence) must not run on the event loop.
+    """
+    result = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            result.routes.append(route)
+            continue
+        result.add_api_route(
+            route.path,
+            _async_versions.get(route.endpoint, route.endpoint),
+            **{option: getattr(route, option) for option in _ROUTE_OPTIONS}
+        )
+    return result
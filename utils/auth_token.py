@@ -1,13 +1,17 @@
+import secrets
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
-from db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_db, get_async_db
 from models.user import DbUser
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt, JWTError
 from pydantic import BaseModel
 from config import settings
+from utils.cache import LRUCache
 
 
 
@@ -23,6 +27,41 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# token -> username, so repeat requests skip signature verification
+claims_cache = LRUCache(settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# username -> detached DbUser, so repeat requests skip the users lookup.
+# Entries are dropped when a change to the user's row is committed, and
+# expire after the TTL so changes made by other worker processes are picked up too.
+principal_cache = LRUCache(settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(username: str):
+    """Drop the cached principal so the next request reloads the user's row."""
+    principal_cache.pop(username)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context):
+    # Whatever path edits or deletes a user (a password change, a rehash on
+    # login, verification, deletion), its cached principal goes on commit
+    changed = session.info.setdefault("changed_usernames", set())
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, DbUser):
+            history = inspect(obj).attrs.username.history
+            changed.update(name for name in (*history.unchanged, *history.added, *history.deleted) if name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for username in session.info.pop("changed_usernames", ()):
+        invalidate_user(username)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back(session: Session, previous_transaction):
+    session.info.pop("changed_usernames", None)
+
+
 def get_current_user(token:str = Depends(oauth2_scheme),db:Session = Depends(get_db)):
 
     credential_exception = HTTPException(
@@ -31,17 +70,59 @@ def get_current_user(token:str = Depends(oauth2_scheme),db:Session = Depends(get
         headers={'WWW-Authenticate': 'Bearer'}
     )
 
-    try:
-        payload = jwt.decode(token,settings.SECRET_KEY,algorithms=['HS256'])
+    username = claims_cache.get(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token,settings.SECRET_KEY,algorithms=[settings.ALGORITHM])
+
+            username = payload.get('sub')
+            if username is None:
+                raise  credential_exception
 
-        username = payload.get('sub')
-        if username is None:
+        except JWTError:
             raise  credential_exception
-        
-    except JWTError:
-        raise  credential_exception
-    
-    user = db.query(DbUser).filter(DbUser.username == username).first()
+
+        # Never serve a token from cache past its own expiry
+        ttl = settings.AUTH_CACHE_TTL_SECONDS
+        if payload.get('exp') is not None:
+            ttl = min(ttl, payload['exp'] - datetime.now(timezone.utc).timestamp())
+        claims_cache.put(token, username, ttl=ttl)
+
+    user = principal_cache.get(username)
     if user is None:
+        user = db.query(DbUser).filter(DbUser.username == username).first()
+        if user is None:
+            raise  credential_exception
+        # Detach so the instance can be shared by later requests; routers only read its columns
+        db.expunge(user)
+        principal_cache.put(username, user)
+
+    if not user.is_active:
         raise  credential_exception
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """get_current_user for async handlers, run on the request's AsyncSession."""
+    return await db.run_sync(lambda session: get_current_user(token, session))
+
+
+internal_scheme = HTTPBearer(auto_error=False)
+
+
+def require_internal_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(internal_scheme)):
+    """Guard for operational endpoints: a bearer token equal to INTERNAL_TOKEN.
+
+    Without INTERNAL_TOKEN the endpoints are switched off and answer 404,
+    so a deployment only exposes them by choosing a token.
+    """
+    if not settings.INTERNAL_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.INTERNAL_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
@@ -0,0 +1,204 @@
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import date
+from threading import Lock
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import event, func, select, tuple_
+from sqlalchemy.orm import Session
+from models.category import DbCategory
+from models.rollup import DbExpenseRollup, DbIncomeRollup
+from utils import metrics
+from config import settings
+
+# Tells a subscriber that events were dropped and it should reload what it shows
+RESYNC = {"type": "resync"}
+
+
+class TooManySubscriptions(Exception):
+    """The user already has the most streams a subscribe() call allows."""
+
+
+class Subscription:
+    """One open event stream: a bounded queue fed on the stream's event loop.
+
+    Publishers never wait for a slow client. When the queue is full its
+    backlog is replaced by a single RESYNC event, so memory per stream stays
+    bounded and the client learns it has to refetch.
+    """
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, size: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+
+    def offer(self, event: dict):
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+            return
+        # The RESYNC covers the backlog and this event alike
+        metrics.events_dropped.inc(amount=self.queue.qsize() + 1)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+class Broker:
+    """Fans a user's events out to every stream that user has open.
+
+    publish() is called from request threads and must not block. A broker
+    shared between workers (e.g. over Redis pub/sub) would deliver to the
+    streams of every worker; MemoryBroker only reaches this process.
+    """
+
+    def publish(self, user_id: int, event: dict):
+        raise NotImplementedError
+
+    def subscribe(self, user_id: int, limit: Optional[int] = None) -> AsyncIterator[Subscription]:
+        """Async context manager yielding a Subscription for the user's events.
+
+        Raises TooManySubscriptions if the user already has `limit` streams;
+        the check and the registration are one step, so concurrent
+        subscribers cannot overshoot it.
+        """
+        raise NotImplementedError
+
+    def subscribers(self, user_id: int) -> int:
+        """Streams the user has open; events are only built when this is non-zero."""
+        raise NotImplementedError
+
+
+class MemoryBroker(Broker):
+    """In-process broker, for a single worker and for tests."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = Lock()
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            # Queues belong to their stream's event loop, which may not be this thread's
+            subscription.loop.call_soon_threadsafe(subscription.offer, event)
+        metrics.events_published.inc(amount=len(subscriptions))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int, limit: Optional[int] = None):
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if limit is not None and len(self._subscriptions.get(user_id, ())) >= limit:
+                raise TooManySubscriptions(user_id)
+            self._subscriptions[user_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[user_id].discard(subscription)
+                if not self._subscriptions[user_id]:
+                    del self._subscriptions[user_id]
+
+    def subscribers(self, user_id: int) -> int:
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+_broker: Optional[Broker] = None
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        _broker = MemoryBroker(settings.EVENTS_QUEUE_SIZE)
+    return _broker
+
+
+def set_broker(broker: Broker):
+    """Swap the broker, e.g. for one shared between workers."""
+    global _broker
+    _broker = broker
+
+
+def format_event(event: dict) -> str:
+    """One event in the text/event-stream wire format."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+# Events wait on the session until its transaction commits, like outbox messages
+
+def _queue(db: Session, user_id: int, event: dict):
+    db.info.setdefault("events", []).append((user_id, event))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session):
+    events = session.info.pop("events", None)
+    if events:
+        broker = get_broker()
+        for user_id, payload in events:
+            broker.publish(user_id, payload)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back(session: Session, previous_transaction):
+    session.info.pop("events", None)
+
+
+def expense_changes(db: Session, user_id: int, changes: Iterable[Tuple[date, Optional[int], float]]):
+    """Queue category spend events for (day, category_id, amount) changes already in the rollup.
+
+    Call after rollups.add_expense(s) on the same session. Each touched
+    (month, category) gets one `category_spend` event with the change and
+    the month's new total, plus `budget_exceeded` when the change takes the
+    total over the category's budget.
+    """
+    if not get_broker().subscribers(user_id):
+        return
+    deltas = defaultdict(float)
+    for day, category_id, amount in changes:
+        if category_id is not None:
+            deltas[(day.replace(day=1), category_id)] += amount
+    if not deltas:
+        return
+
+    rows = db.execute(
+        select(DbExpenseRollup.month, DbExpenseRollup.category_id, DbExpenseRollup.total, DbCategory.budget)
+        .join(DbCategory, DbCategory.id == DbExpenseRollup.category_id)
+        .where(
+            DbExpenseRollup.user_id == user_id,
+            tuple_(DbExpenseRollup.month, DbExpenseRollup.category_id).in_(list(deltas))
+        )
+    )
+    for month, category_id, total, budget in rows:
+        change = deltas[(month, category_id)]
+        if not change:
+            continue
+        spend = {"category_id": category_id, "month": month.strftime("%Y-%m"), "spent": total, "budget": budget}
+        _queue(db, user_id, {"type": "category_spend", **spend, "change": change})
+        if budget and total - change <= budget < total:
+            _queue(db, user_id, {"type": "budget_exceeded", **spend})
+
+
+def income_changes(db: Session, user_id: int, changes: Iterable[Tuple[date, float]]):
+    """Queue an `income` event with the month's new total for each (day, amount) change."""
+    if not get_broker().subscribers(user_id):
+        return
+    deltas = defaultdict(float)
+    for day, amount in changes:
+        deltas[day.replace(day=1)] += amount
+
+    rows = db.execute(
+        select(DbIncomeRollup.month, func.sum(DbIncomeRollup.total))
+        .where(DbIncomeRollup.user_id == user_id, DbIncomeRollup.month.in_(list(deltas)))
+        .group_by(DbIncomeRollup.month)
+    )
+    for month, total in rows:
+        if deltas[month]:
+            _queue(db, user_id, {
+                "type": "income", "month": month.strftime("%Y-%m"), "received": total, "change": deltas[month]
+            })
@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from db.lookups import find_or_create_category, find_or_create_payment_mode
+from db.rollups import add_expenses
+from db.sync import next_version
+from utils import events
+from models.category import DbCategory
+from models.expense import DbExpense
+from models.payment_mode import DbPaymentMode
+from config import settings
+
+# Every failed row is counted, but only this many are described in the response
+MAX_REPORTED_ERRORS = 1000
+
+
+class UnreadableFile(ValueError):
+    """The rest of an uploaded file cannot be read."""
+
+
+def iter_csv_rows(file) -> Iterator[Any]:
+    """Parse an uploaded CSV lazily, dropping empty cells so schema defaults apply.
+
+    Decoding and parsing happen as rows are read, so a file that turns out not
+    to be UTF-8 CSV part way through ends with an UnreadableFile in place of
+    the next row; import_expenses reports it against that row.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    try:
+        for row in reader:
+            yield {key: value for key, value in row.items() if key is not None and value not in ("", None)}
+    except UnicodeDecodeError:
+        yield UnreadableFile(f"File is not UTF-8 encoded (after line {reader.line_num})")
+    except csv.Error as e:
+        yield UnreadableFile(f"Line {reader.line_num + 1}: {e}")
+
+
+def iter_ndjson_rows(file) -> Iterator[bytes]:
+    for line in file:
+        if line.strip():
+            yield line
+
+
+async def read_json_array(request: Request) -> list:
+    """Request body as a JSON array, refused with 413 past IMPORT_JSON_MAX_BYTES.
+
+    The body is read here rather than declared with Body() so the cap holds
+    before anything is buffered or parsed.
+    """
+    limit = settings.IMPORT_JSON_MAX_BYTES
+    too_large = HTTPException(
+        status_code=413, detail=f"Body over {limit} bytes: upload the expenses as a file to /expense/import"
+    )
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=422, detail="Body must be a JSON array of expenses")
+    return rows
+
+
+def _describe(error: dict) -> str:
+    field = ".".join(map(str, error["loc"]))
+    return f"{field}: {error['msg']}" if field else error["msg"]
+
+
+class _Resolver:
+    """Resolves each distinct category / payment mode once per import."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.ids = {}
+
+    def _resolve(self, model, find_or_create, label: str, value) -> Optional[int]:
+        if value is None:
+            return None
+        key = (model, value if isinstance(value, str) else tuple(value.model_dump().values()))
+        if key not in self.ids:
+            if isinstance(value, str):
+                # Referenced by name only, as in the /getCSV output
+                self.ids[key] = self.db.execute(
+                    select(model.id).where(model.name == value).order_by(model.id).limit(1)
+                ).scalar()
+            else:
+                self.ids[key] = find_or_create(self.db, value.model_dump())
+        if self.ids[key] is None:
+            raise ValueError(f"Unknown {label} '{value}'")
+        return self.ids[key]
+
+    def category(self, value) -> Optional[int]:
+        return self._resolve(DbCategory, find_or_create_category, "category", value)
+
+    def payment_mode(self, value) -> Optional[int]:
+        return self._resolve(DbPaymentMode, find_or_create_payment_mode, "payment mode", value)
+
+
+def _stamp(db: Session, user_id: int, chunk):
+    # One change version per committed chunk, as for a single write
+    version = next_version(db, user_id)
+    for row in chunk:
+        row["version"] = version
+
+
+def _changes(chunk):
+    return ((row["date"], row["category_id"], row["amount"]) for row in chunk)
+
+
+def import_expenses(
+    db: Session,
+    user_id: int,
+    rows: Iterable[Any],
+    validate: Callable[[Any], BaseModel]
+) -> dict:
+    """Validate `rows` one by one and insert the valid ones in executemany chunks.
+
+    Each chunk of IMPORT_CHUNK_SIZE rows is committed on its own, so a failure
+    part way through keeps the chunks already written.
+    """
+    resolver = _Resolver(db)
+    chunk, errors = [], []
+    imported = failed = 0
+
+    for number, raw in enumerate(rows, start=1):
+        try:
+            if isinstance(raw, UnreadableFile):
+                raise raw
+            expense = validate(raw)
+            chunk.append({
+                "amount": expense.amount,
+                "date": expense.date,
+                "note": expense.note,
+                "recurring": expense.recurring,
+                "category_id": resolver.category(expense.category),
+                "payment_mode_id": resolver.payment_mode(expense.paymentMode),
+                "user_id": user_id,
+            })
+        except ValidationError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({
+                    "row": number,
+                    "errors": [_describe(error) for error in e.errors()]
+                })
+            continue
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": number, "errors": [str(e)]})
+            continue
+
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            _stamp(db, user_id, chunk)
+            db.execute(insert(DbExpense), chunk)
+            add_expenses(db, chunk)
+            events.expense_changes(db, user_id, _changes(chunk))
+            db.commit()
+            imported += len(chunk)
+            chunk = []
+
+    if chunk:
+        _stamp(db, user_id, chunk)
+        db.execute(insert(DbExpense), chunk)
+        add_expenses(db, chunk)
+        events.expense_changes(db, user_id, _changes(chunk))
+        db.commit()
+        imported += len(chunk)
+
+    return {"imported": imported, "failed": failed, "errors": errors}
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, Sequence
+from sqlalchemy import Select
+from db.database import SessionLocal
+from config import settings
+
+
+def iter_batches(stmt: Select, batch_size: int = None) -> Iterator[Sequence]:
+    """Yield rows of `stmt` in fixed-size batches read from a server-side cursor.
+
+    Runs on its own session so the stream outlives the request's dependencies.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    with SessionLocal() as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield batch
+
+
+def iter_csv(columns: Sequence[str], batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """Encode the header and then each batch as one CSV chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+
+
+def iter_ndjson(columns: Sequence[str], batches: Iterable[Sequence]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in batch
+        ).encode()
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_schema(pa, types: Dict[str, str]):
+    arrow_types = {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "date": pa.date32(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(name, arrow_types[kind]) for name, kind in types.items()])
+
+
+def _record_batches(pa, schema, batches: Iterable[Sequence]):
+    for batch in batches:
+        arrays = []
+        for field, values in zip(schema, zip(*batch)):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_parquet(types: Dict[str, str], batches: Iterable[Sequence], row_group_size: int = None) -> Iterator[bytes]:
+    """Collect batches into row groups of `row_group_size` rows, flushing each to the client when written.
+
+    Row groups of a few fetch batches each would compress poorly and make
+    readers pay per-group overhead, so they are sized on their own.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    row_group_size = row_group_size or settings.EXPORT_PARQUET_ROW_GROUP_SIZE
+    schema = _arrow_schema(pa, types)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    pending, pending_rows = [], 0
+    for record_batch in _record_batches(pa, schema, batches):
+        pending.append(record_batch)
+        pending_rows += record_batch.num_rows
+        if pending_rows >= row_group_size:
+            writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=row_group_size)
+            pending, pending_rows = [], 0
+            yield sink.drain()
+    if pending:
+        writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=row_group_size)
+    writer.close()
+    yield sink.drain()
+
+
+def iter_arrow(types: Dict[str, str], batches: Iterable[Sequence]) -> Iterator[bytes]:
+    """Arrow IPC stream format, one record batch per database batch."""
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa, types)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+    for record_batch in _record_batches(pa, schema, batches):
+        writer.write_batch(record_batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
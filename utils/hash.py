@@ -1,10 +1,24 @@
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# This module runs inside the password worker processes, so it takes the
+# bcrypt cost as an argument rather than importing settings.
+DEFAULT_ROUNDS = 12
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+@lru_cache(maxsize=None)
+def _context(rounds: int):
+    # passlib is only needed once something is hashed, usually in a worker process
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def get_password_hash(password: str, rounds: int = DEFAULT_ROUNDS) -> str:
+    return _context(rounds).hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _context(DEFAULT_ROUNDS).verify(plain_password, hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str, rounds: int = DEFAULT_ROUNDS) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a new hash too when the stored one uses a different cost."""
+    return _context(rounds).verify_and_update(plain_password, hashed_password)
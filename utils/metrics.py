@@ -0,0 +1,135 @@
+import bisect
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+# Upper bounds in seconds, from sub-millisecond pool checkouts to slow requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every Counter and HistogramFamily, in the order they are rendered on /metrics
+REGISTRY: List = []
+
+
+class Histogram:
+    """Bucketed observations with a running sum and count, as Prometheus reports them."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        """Cumulative count per upper bound, plus "+Inf", the sum and the count."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, buckets = 0, {}
+        for bound, bucket in zip(self.buckets, counts):
+            cumulative += bucket
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"buckets": buckets, "sum": round(total, 6), "count": count}
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class HistogramFamily:
+    """One Histogram per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._children: Dict[tuple, Histogram] = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def observe(self, *labels, value: float):
+        child = self._children.get(labels)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labels, Histogram(self.buckets))
+        child.observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for labels, histogram in children:
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {snapshot['sum']:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {snapshot['count']}")
+        return lines
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests handled, by route template and status.",
+    ("method", "route", "status")
+)
+http_request_duration = HistogramFamily(
+    "http_request_duration_seconds", "Time to produce the response, by route template.",
+    ("method", "route")
+)
+db_statements = Counter("db_statements_total", "SQL statements executed.")
+db_slow_statements = Counter("db_slow_statements_total", "SQL statements slower than SLOW_QUERY_SECONDS.")
+db_statements_per_request = HistogramFamily(
+    "db_statements_per_request", "SQL statements issued while handling one request.",
+    ("method", "route"), buckets=(1, 2, 3, 5, 10, 20, 50, 100)
+)
+db_time_per_request = HistogramFamily(
+    "db_seconds_per_request", "Time spent executing SQL while handling one request.",
+    ("method", "route")
+)
+events_published = Counter("events_published_total", "Events delivered to open event stream queues.")
+events_dropped = Counter("events_dropped_total", "Events replaced by a resync because a stream fell behind.")
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from db.database import SessionLocal
+from models.outbox import DbOutboxMessage
+from utils.sms import SmsTransport, get_transport
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_wake: Optional[asyncio.Event] = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_sms(db: Session, to: str, body: str):
+    """Queue an SMS on the caller's session; it is only sent if that transaction commits."""
+    now = _now()
+    db.add(DbOutboxMessage(recipient=to, body=body, next_attempt_at=now, created_at=now))
+
+
+def notify():
+    """Wake the in-process dispatcher after committing new messages."""
+    if _wake is not None:
+        _wake.set()
+
+
+def _claim(db: Session, now: datetime):
+    # Leasing the batch by pushing next_attempt_at forward keeps other
+    # dispatchers (threads, workers or processes) from sending the same rows;
+    # if this one dies mid-send the lease runs out and they are retried.
+    claim = uuid.uuid4().hex
+    due = select(DbOutboxMessage.id).where(
+        DbOutboxMessage.status == "pending",
+        DbOutboxMessage.next_attempt_at <= now
+    ).order_by(DbOutboxMessage.next_attempt_at).limit(settings.OUTBOX_BATCH_SIZE)
+    db.execute(update(DbOutboxMessage).where(
+        DbOutboxMessage.id.in_(due),
+        DbOutboxMessage.status == "pending",
+        DbOutboxMessage.next_attempt_at <= now
+    ).values(
+        claim=claim,
+        attempts=DbOutboxMessage.attempts + 1,
+        next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    ))
+    db.commit()
+    return db.query(DbOutboxMessage).filter(DbOutboxMessage.claim == claim).all()
+
+
+def dispatch_batch(transport: Optional[SmsTransport] = None) -> int:
+    """Send one batch of due messages, retrying failures with exponential backoff.
+
+    Returns how many messages were claimed.
+    """
+    transport = transport or get_transport()
+    db = SessionLocal()
+    try:
+        messages = _claim(db, _now())
+        for message in messages:
+            try:
+                transport.send(message.recipient, message.body)
+                message.status = "sent"
+                message.sent_at = _now()
+                message.last_error = None
+            except Exception as e:
+                message.last_error = str(e)
+                if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    message.status = "failed"
+                    logger.error("Giving up on outbox message %s: %s", message.id, e)
+                else:
+                    backoff = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (message.attempts - 1)
+                    message.next_attempt_at = _now() + timedelta(seconds=backoff)
+            message.claim = None
+            db.commit()
+        return len(messages)
+    finally:
+        db.close()
+
+
+async def run_dispatcher(stop: asyncio.Event):
+    """Drain the outbox until `stop` is set, sleeping between polls unless notified."""
+    global _wake
+    _wake = asyncio.Event()
+    while not stop.is_set():
+        try:
+            if await run_in_threadpool(dispatch_batch):
+                continue
+        except Exception:
+            logger.exception("Outbox dispatch failed")
+        _wake.clear()
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=settings.OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    # Standalone worker, for deployments that do not run the in-app dispatcher
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_dispatcher(asyncio.Event()))
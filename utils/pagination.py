@@ -0,0 +1,43 @@
+import base64
+from datetime import date
+from typing import Tuple
+from fastapi import HTTPException, status
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    """Encode the (date, id) of the last row on a page as an opaque token."""
+    raw = f"{row_date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def encode_sync_token(version: int, kind: int, row_id: int) -> str:
+    """Encode the position of the last change sent by /sync as an opaque token."""
+    raw = f"{version}|{kind}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> Tuple[int, int, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        version, kind, row_id = (int(part) for part in base64.urlsafe_b64decode(padded).decode().split("|"))
+        return version, kind, row_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync token"
+        )
@@ -0,0 +1,58 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from config import settings
+from utils import hash as hashing
+
+_executor: Optional[Executor] = None
+# Only touched from the event loop thread, so no lock is needed
+_in_flight = 0
+
+
+def _get_executor() -> Optional[Executor]:
+    """The bcrypt worker pool, started on first use.
+
+    With PASSWORD_HASH_WORKERS=0 (e.g. on platforms that cannot fork worker
+    processes) hashing falls back to the event loop's default thread pool.
+    """
+    global _executor
+    if _executor is None and settings.PASSWORD_HASH_WORKERS > 0:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def _run(fn, *args):
+    global _in_flight
+    # Reject straight away rather than queueing behind a login burst
+    if _in_flight >= max(settings.PASSWORD_HASH_WORKERS, 1) + settings.PASSWORD_HASH_QUEUE_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password requests in progress, please retry",
+            headers={"Retry-After": "1"}
+        )
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(hashing.get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Return whether the password matches, and a rehash if BCRYPT_ROUNDS has changed."""
+    return await _run(hashing.verify_and_update, plain_password, hashed_password, settings.BCRYPT_ROUNDS)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import sys
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+from db import rollups
+from db.database import SessionLocal
+from db.dialect import upsert_insert
+from db.sync import next_versions
+from models.expense import DbExpense
+from models.income import DbIncome
+from models.recurrence import DbRecurrenceRule
+from utils import events
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Days per interval of the fixed-length frequencies; monthly is calendar based
+DAYS = {"daily": 1, "weekly": 7}
+
+
+def occurrence_date(start: date, frequency: str, interval: int, n: int) -> date:
+    """The date of occurrence n. Monthly rules keep the start's day, clamped to shorter months."""
+    if frequency == "monthly":
+        year, month = divmod(start.month - 1 + n * interval, 12)
+        year += start.year
+        return date(year, month + 1, min(start.day, monthrange(year, month + 1)[1]))
+    return start + timedelta(days=DAYS[frequency] * interval * n)
+
+
+def last_due(start: date, frequency: str, interval: int, until: date) -> int:
+    """The last occurrence on or before `until` (-1 for none), worked out without stepping through them."""
+    if until < start:
+        return -1
+    if frequency == "monthly":
+        n = ((until.year - start.year) * 12 + until.month - start.month) // interval
+        if occurrence_date(start, frequency, interval, n) > until:
+            n -= 1
+        return n
+    return (until - start).days // (DAYS[frequency] * interval)
+
+
+def _insert(db: Session, model, rows: List[dict]) -> List[dict]:
+    """Insert the occurrences in one executemany and return the ones that were not there yet."""
+    if not rows:
+        return []
+    insert_ = upsert_insert(db)
+    if insert_ is None:
+        db.execute(insert(model.__table__), rows)
+        return rows
+    # The unique (recurrence_id, occurrence) index turns a repeat into a no-op,
+    # whichever worker or earlier run wrote the row first
+    stmt = insert_(model.__table__).on_conflict_do_nothing(
+        index_elements=["recurrence_id", "occurrence"]
+    ).returning(model.recurrence_id, model.occurrence)
+    written = {tuple(row) for row in db.execute(stmt, rows).all()}
+    return [row for row in rows if (row["recurrence_id"], row["occurrence"]) in written]
+
+
+def materialize_batch(
+    db: Session,
+    today: date,
+    catch_up: bool = True,
+    rule_ids: Optional[Iterable[int]] = None,
+    limit: Optional[int] = None,
+    max_occurrences: Optional[int] = None
+) -> int:
+    """Write the due occurrences of up to `limit` rules, of any users, on the caller's session.
+
+    Without `catch_up` only the latest due occurrence of each rule is
+    written and earlier missed ones are skipped. Returns how many rules
+    were processed; each comes out either not due until after `today`,
+    finished, or, past `max_occurrences` written, still due from the
+    first occurrence left for the next run.
+    """
+    rules = DbRecurrenceRule.__table__
+    due = select(rules).where(rules.c.active.is_(True), rules.c.next_date <= today).order_by(
+        rules.c.next_date, rules.c.id
+    ).limit(limit or settings.RECURRENCE_BATCH_SIZE)
+    if rule_ids is not None:
+        due = due.where(rules.c.id.in_(list(rule_ids)))
+    # Concurrent workers each take a different set of rules
+    rows = db.execute(due.with_for_update(skip_locked=True)).all()
+    if not rows:
+        return 0
+
+    expenses, incomes, advances = [], [], []
+    for rule in rows:
+        until = today if rule.end_date is None else min(today, rule.end_date)
+        last = last_due(rule.start_date, rule.frequency, rule.interval, until)
+        first = rule.next_occurrence if catch_up else max(rule.next_occurrence, last)
+        if max_occurrences is not None:
+            last = min(last, first + max_occurrences - 1)
+        for n in range(first, last + 1):
+            occurrence = {
+                "amount": rule.amount,
+                "date": occurrence_date(rule.start_date, rule.frequency, rule.interval, n),
+                "user_id": rule.user_id,
+                "recurrence_id": rule.id,
+                "occurrence": n,
+            }
+            if rule.kind == "expense":
+                expenses.append({
+                    **occurrence, "note": rule.note, "recurring": True,
+                    "category_id": rule.category_id, "payment_mode_id": rule.payment_mode_id,
+                })
+            else:
+                incomes.append({**occurrence, "source": rule.note, "is_recurring": True})
+
+        following = max(last + 1, rule.next_occurrence)
+        following_date = occurrence_date(rule.start_date, rule.frequency, rule.interval, following)
+        advances.append({
+            "rule_id": rule.id,
+            "following": following,
+            "following_date": following_date,
+            "still_active": rule.end_date is None or following_date <= rule.end_date,
+        })
+
+    if expenses or incomes:
+        versions = next_versions(db, (row["user_id"] for row in expenses + incomes))
+        for row in expenses + incomes:
+            row["version"] = versions[row["user_id"]]
+    expenses = _insert(db, DbExpense, expenses)
+    incomes = _insert(db, DbIncome, incomes)
+    rollups.add_expenses(db, expenses)
+    rollups.add_incomes(db, incomes)
+
+    changes = defaultdict(lambda: ([], []))
+    for row in expenses:
+        changes[row["user_id"]][0].append((row["date"], row["category_id"], row["amount"]))
+    for row in incomes:
+        changes[row["user_id"]][1].append((row["date"], row["amount"]))
+    for user_id, (expense_changes, income_changes) in changes.items():
+        if expense_changes:
+            events.expense_changes(db, user_id, expense_changes)
+        if income_changes:
+            events.income_changes(db, user_id, income_changes)
+
+    db.execute(
+        update(rules).where(rules.c.id == bindparam("rule_id")).values(
+            next_occurrence=bindparam("following"),
+            next_date=bindparam("following_date"),
+            active=bindparam("still_active"),
+        ),
+        advances
+    )
+    return len(rows)
+
+
+def run_once(today: Optional[date] = None, catch_up: Optional[bool] = None) -> int:
+    """Materialize everything due, one committed batch at a time. Returns the rules processed."""
+    today = today or date.today()
+    catch_up = settings.RECURRENCE_CATCH_UP if catch_up is None else catch_up
+    processed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = materialize_batch(db, today, catch_up)
+            db.commit()
+            processed += count
+            if count < settings.RECURRENCE_BATCH_SIZE:
+                return processed
+    finally:
+        db.close()
+
+
+async def run_scheduler(stop: asyncio.Event):
+    """Materialize due occurrences every RECURRENCE_POLL_SECONDS until `stop` is set."""
+    while not stop.is_set():
+        try:
+            await run_in_threadpool(run_once)
+        except Exception:
+            logger.exception("Materializing recurrence rules failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.RECURRENCE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    # Standalone worker, for deployments that do not run the in-app scheduler.
+    # `once [YYYY-MM-DD]` runs a single pass, e.g. from cron or to catch up after downtime.
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1 and sys.argv[1] == "once":
+        until = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+        print(f"Processed {run_once(until)} recurrence rules")
+    elif len(sys.argv) > 1:
+        sys.exit("usage: python -m utils.recurrence [once [YYYY-MM-DD]]")
+    else:
+        asyncio.run(run_scheduler(asyncio.Event()))
@@ -0,0 +1,33 @@
+import json
+from datetime import date
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: pip install .[json]
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for content that is already shaped like the response model.
+
+    Returning it from an endpoint skips FastAPI's response_model validation
+    and jsonable_encoder pass, so it is only for rows built by the endpoint
+    itself. Uses orjson when it is installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
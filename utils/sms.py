@@ -0,0 +1,55 @@
+import logging
+import random
+import string
+import uuid
+from typing import List, Optional, Tuple
+from config import settings
+
+
+def generate_verification_code() -> str:
+    """Generate a 6-digit OTP code."""
+    return ''.join(random.choices(string.digits, k=6))
+
+
+def verification_message(code: str) -> str:
+    return f"Your BudgetBuddy verification code is: {code}"
+
+
+class SmsTransport:
+    def send(self, to: str, body: str) -> str:
+        """Deliver one message and return a provider id; raise on failure."""
+        raise NotImplementedError
+
+
+class FakeTransport(SmsTransport):
+    """Keeps messages in memory and logs that they were sent, for tests and local development."""
+
+    def __init__(self):
+        self.sent: List[Tuple[str, str]] = []
+
+    def send(self, to: str, body: str) -> str:
+        message_id = f"fake-{uuid.uuid4().hex}"
+        self.sent.append((to, body))
+        # Bodies carry verification codes, so only the recipient and id are logged
+        logging.getLogger(__name__).info("SMS %s to %s", message_id, to)
+        return message_id
+
+
+_transport: Optional[SmsTransport] = None
+
+
+def get_transport() -> SmsTransport:
+    global _transport
+    if _transport is None:
+        if settings.SMS_TRANSPORT == "fake":
+            _transport = FakeTransport()
+        else:
+            from utils.twilio_service import TwilioService
+            _transport = TwilioService()
+    return _transport
+
+
+def set_transport(transport: SmsTransport):
+    """Swap the transport, e.g. for a FakeTransport in tests."""
+    global _transport
+    _transport = transport
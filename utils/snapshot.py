@@ -0,0 +1,70 @@
+import hashlib
+import time
+from threading import Lock
+from typing import Callable, Hashable, List, Optional
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class Snapshot:
+    """The serialized JSON of a small reference table, served with a strong ETag.
+
+    The body is rebuilt when `version(db)` changes or after `ttl` seconds.
+    A version read from the database (such as a change counter) lets
+    every worker notice another worker's writes on the next request; without
+    one, the TTL alone bounds how stale a snapshot can be. The ETag is a
+    hash of the body, so every worker gives the same representation the
+    same tag.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Session], list],
+        schema,
+        cache_control: str,
+        ttl: float,
+        version: Callable[[Session], Hashable] = lambda db: 0
+    ):
+        self.load = load
+        self.adapter = TypeAdapter(List[schema])
+        self.cache_control = cache_control
+        self.ttl = ttl
+        self.version = version
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_version = None
+        self._built_at = 0.0
+        self._lock = Lock()
+
+    def _current(self, db: Session):
+        version = self.version(db)
+        if self._body is None or version != self._built_version or time.monotonic() - self._built_at > self.ttl:
+            with self._lock:
+                if self._body is None or version != self._built_version or time.monotonic() - self._built_at > self.ttl:
+                    rows = self.adapter.validate_python(self.load(db), from_attributes=True)
+                    body = self.adapter.dump_json(rows)
+                    self._etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                    self._body, self._built_version, self._built_at = body, version, time.monotonic()
+        return self._body, self._etag
+
+    def invalidate(self):
+        self._body = None
+
+    def response(self, request: Request, db: Session) -> Response:
+        """200 with the snapshot, or 304 when If-None-Match already names it."""
+        body, etag = self._current(db)
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
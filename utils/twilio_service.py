@@ -1,29 +1,28 @@
 from twilio.rest import Client
-import random
-from config import Settings
-import string
+from config import settings
+from utils.sms import SmsTransport
 
-settings = Settings()
 
+class TwilioService(SmsTransport):
+    """SMS transport backed by the Twilio REST API."""
 
-
-class TwilioService:
     def __init__(self):
-        self.client = Client(settings.TWILIO_ACCOUNT_SID,
-                             settings.TWILIO_AUTH_TOKEN)
+        self._client = None
         self.from_number = settings.TWILIO_PHONE_NUMBER
 
-    def generate_verification_code(self) -> str:
-        """Generate a 6-digit OTP code."""
-        return ''.join(random.choices(string.digits, k=6))
+    @property
+    def client(self) -> Client:
+        # Built on first send so importing the app never constructs a client
+        if self._client is None:
+            self._client = Client(settings.TWILIO_ACCOUNT_SID,
+                                  settings.TWILIO_AUTH_TOKEN)
+        return self._client
 
-    def send_verification_code(self, phone_number: str, code: str):
-        try:
-            message = self.client.messages.create(
-                body=f"Your BudgetBuddy verification code is: {code}",
-                from_=self.from_number,
-                to=phone_number
-            )
-            return True, message.sid
-        except Exception as e:
-            return False, str(e)
+    def send(self, to: str, body: str) -> str:
+        """Send one SMS and return its Twilio sid; raises on failure."""
+        message = self.client.messages.create(
+            body=body,
+            from_=self.from_number,
+            to=to
+        )
+        return message.sid